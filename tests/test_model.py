@@ -1,14 +1,26 @@
+import glob
 import json
+import pickle
 import pytest
+import random
+import time
+from datetime import datetime, timedelta
 from decimal import Decimal
-from yangson import DataModel
+from yangson import DataModel, instvalue
 from yangson.exceptions import (
-    InvalidFeatureExpression, UnknownPrefix, NonexistentInstance,
-    NonexistentSchemaNode, RawTypeError, SchemaError,
-    XPathTypeError, InvalidXPath, NotSupported)
-from yangson.instvalue import ArrayValue
+    InstanceValueError, InvalidFeatureExpression, UnknownPrefix,
+    NonexistentInstance, NonexistentSchemaNode, RawTypeError, SchemaError,
+    SemanticError, ValidationError, XPathTypeError, InvalidXPath,
+    NotSupported, YangTypeError)
+from yangson.instvalue import ArrayValue, ObjectValue, PersistentObjectValue
 from yangson.schemadata import SchemaContext, FeatureExprParser
+from yangson.statement import ModuleParser
+from yangson.schemanode import (
+    ValidationCache, ValidationContext, ValidationProfile)
+from yangson.constraint import Pattern, PatternSet
+from yangson.datatype import ScaledDecimal
 from yangson.enumerations import ContentType
+from yangson.validators import native_validators
 from yangson.xpathparser import XPathParser
 
 tree = """+--rw (test:choiA)?
@@ -67,6 +79,7 @@ tree = """+--rw (test:choiA)?
 |  +--rw uint32? <uint32>
 |  +--rw uint64? <uint64>
 |  +--rw uint8? <uint8>
+|  +--rw union? <union>
 +--rw test:leafX? <port-number(uint16)>
 +---n testb:noA
 |  +--ro testb:leafO? <boolean>
@@ -304,7 +317,8 @@ def test_instance(data_model, instance):
     inst2 = tbln.update("hello!").top()
     assert instance.value == inst1.value
     assert instance.value != inst2.value
-    assert instance.timestamp < inst1.timestamp < inst2.timestamp
+    assert instance.revision < inst1.revision < inst2.revision
+    assert instance.timestamp <= inst1.timestamp <= inst2.timestamp
     assert inst1.json_pointer() == inst2.json_pointer() == "/"
     assert la1.namespace == "test"
     assert la1["leafE"].namespace == "test"
@@ -557,6 +571,119 @@ def test_instance_paths(data_model, instance):
         instance.goto(data_model.parse_resource_id(bad_pth))
 
 
+def test_cached_paths(instance):
+    la1 = instance["test:contA"]["listA"][1]
+    assert la1.path == ("test:contA", "listA", 1)
+    assert la1.path is la1.path
+    assert la1.json_pointer() is la1.json_pointer()
+    lw = la1["leafW"]
+    assert lw.path[:-1] == la1.path
+    assert lw.json_pointer() == "/test:contA/listA/1/leafW"
+    assert la1.previous().json_pointer() == "/test:contA/listA/0"
+    assert instance.path == () and instance.json_pointer() == "/"
+
+
+def test_revisions(instance, monkeypatch):
+    conta = instance["test:contA"]
+    assert conta.up().etag() == instance.etag()
+    lb = conta["leafB"]
+    inst1 = lb.update(10).top()
+    assert inst1.revision > instance.revision
+    assert inst1.etag() != instance.etag()
+    assert inst1["test:contT"].etag() == instance["test:contT"].etag()
+    assert inst1["test:contA"].revision == inst1.revision
+    la = inst1["test:contA"]["listA"]
+    inst2 = la[0]["leafF"].update(False).up().next().top()
+    assert inst2.revision > inst1.revision
+    ts = instance.timestamp
+    assert ts == instance.timestamp <= inst1.timestamp <= inst2.timestamp
+    monkeypatch.setattr(instvalue, "_CLOCK_RESOLUTION", 0.01)
+    time.sleep(0.02)
+    start = datetime.now() - timedelta(seconds=0.01)
+    vals = [ArrayValue([i]) for i in range(100)]
+    changed = datetime.now()
+    time.sleep(0.02)
+    nclock = len(instvalue._clock)
+    for v in vals:
+        assert start <= v.timestamp <= changed
+    assert len(instvalue._clock) == nclock
+    with pytest.deprecated_call():
+        old = ObjectValue({"a": 1}, ts=changed)
+    with pytest.deprecated_call():
+        old.timestamp = start
+    with pytest.deprecated_call():
+        root = type(instance)(ArrayValue([1], changed), None, changed)
+    assert old.timestamp == start and root.value.timestamp == changed
+    assert root.revision == root.value.revision
+    old["a"] = 2
+    assert old.timestamp > changed
+
+
+def test_cached_hashes(instance):
+    conta = instance.value["test:contA"]
+    h = hash(instance.value)
+    assert instance.value._hash == h and conta._hash is not None
+    inst1 = instance["test:contA"]["leafB"].update(10).top()
+    assert inst1.value["test:contA"]._hash is None
+    assert inst1.value["test:contT"] is instance.value["test:contT"]
+    assert inst1.value["test:contT"]._hash is not None
+    assert hash(inst1.value) != h
+    inst2 = inst1["test:contA"]["leafB"].update(9).top()
+    assert inst2.value == instance.value
+    lst = ArrayValue([1, 2])
+    h = hash(lst)
+    lst.append(3)
+    assert hash(lst) != h and hash(lst) == hash(ArrayValue([1, 2, 3]))
+    for op, res in ((lambda a: a.sort(reverse=True), [3, 2, 1]),
+                    (lambda a: a.reverse(), [3, 2, 1]),
+                    (lambda a: a.remove(2), [1, 3]),
+                    (lambda a: a.__iadd__([4]), [1, 2, 3, 4]),
+                    (lambda a: a.clear(), [])):
+        lst = ArrayValue([1, 2, 3])
+        rev = lst.revision
+        hash(lst)
+        op(lst)
+        assert lst == ArrayValue(res) and lst.revision != rev
+    for cls in (ObjectValue, PersistentObjectValue):
+        for op, res in ((lambda o: o.update(a=2), {"a": 2, "b": 1}),
+                        (lambda o: o.setdefault("c", 3), {"a": 1, "b": 1,
+                                                          "c": 3}),
+                        (lambda o: o.popitem(), {"a": 1}),
+                        (lambda o: o.__ior__({"b": 0}), {"a": 1, "b": 0}),
+                        (lambda o: o.clear(), {})):
+            obj = cls({"a": 1, "b": 1})
+            rev = obj.revision
+            hash(obj)
+            op(obj)
+            assert obj == ObjectValue(res) and obj.revision != rev
+
+
+def test_clean_up(instance):
+    conta = instance["test:contA"]
+    la1 = conta["listA"][1]
+    assert la1["leafE"].up() is la1
+    assert la1.previous().up().up() is conta
+    assert conta["leafB"].sibling("listA").up() is conta
+    assert la1["leafF"].top() is instance
+    inst1 = la1["leafE"].update("B00F").top()
+    assert inst1 is not instance
+    assert inst1.value["test:contA"]["listA"][1]["leafE"] == "B00F"
+    mod = conta["leafB"].update(10).sibling("listA")
+    assert mod.up().value["leafB"] == 10
+
+
+def test_slots(instance):
+    la1 = instance["test:contA"]["listA"][1]
+    for obj in (instance, la1, la1["leafE"], la1.before, instance.value,
+                instance.value["test:llistB"]):
+        assert not hasattr(obj, "__dict__")
+    val = instance.value
+    hash(val)
+    val2 = pickle.loads(pickle.dumps(val))
+    assert val2._hash is None and isinstance(val2["test:contA"], ObjectValue)
+    assert val2 == val and val2.revision == val.revision
+
+
 def test_edits(data_model, instance):
     laii = data_model.parse_instance_id("/test:contA/listA")
     la = instance.goto(laii)
@@ -573,6 +700,547 @@ def test_edits(data_model, instance):
         llb1.update("2001::2::1", raw=True)
 
 
+def test_key_index(instance):
+    la = instance["test:contA"]["listA"]
+    assert la.look_up(leafE="ABBA", leafF=False).index == 1
+    assert la.value._unique_index() == {("C0FFEE", True): 0, ("ABBA", False): 1}
+    la1 = la.look_up(leafE="C0FFEE", leafF=True).update(
+        {"leafE": "B00F", "leafF": False}, raw=True).up()
+    assert la1.value._index == {("B00F", False): 0, ("ABBA", False): 1}
+    assert la1.look_up(leafE="ABBA", leafF=False)["leafW"].value == 9
+    la2 = la1[1].insert_before(
+        {"leafE": "CAFE", "leafF": True}, raw=True).up()
+    assert la2.look_up(leafE="ABBA", leafF=False).index == 2
+    assert la2.delete_item(0).look_up(leafE="CAFE", leafF=True).index == 0
+    with pytest.raises(NonexistentInstance):
+        la2.look_up(leafE="C0FFEE", leafF=True)
+    arr = ArrayValue(la.value)
+    la3 = la.update(arr)
+    assert la3.look_up(leafE="ABBA", leafF=False).index == 1
+    arr.reverse()
+    assert arr._index is None
+    assert la3.look_up(leafE="ABBA", leafF=False).index == 0
+    abba = arr[0]
+    arr.remove(abba)
+    with pytest.raises(NonexistentInstance):
+        la3.look_up(leafE="ABBA", leafF=False)
+    arr += [abba]
+    assert la3.look_up(leafE="ABBA", leafF=False).index == 1
+    arr.sort(key=lambda en: en["leafE"])
+    assert la3.look_up(leafE="C0FFEE", leafF=True).index == 1
+    llb = instance["test:llistB"]
+    assert llb[0].insert_after("::2", raw=True).up().value == ArrayValue(
+        ["::1", "::2", "127.0.0.1"])
+
+
+def test_edit_transaction(data_model, instance):
+    rid = data_model.parse_resource_id
+    with instance.edit() as tx:
+        tx.set(rid("/test:contA/testb:leafN"), "hello!")
+        tx.set(rid("/test:contA/listA=ABBA,false/leafW"), 10, raw=True)
+        tx.delete(rid("/test:contA/listA=C0FFEE,true"))
+        tx.set(rid("/test:contT/int8"), 7, raw=True)
+        tx.delete(rid("/test:llistB=::1"))
+    inst = tx.result
+    assert inst.peek(rid("/test:contA/testb:leafN")) == "hello!"
+    assert inst.peek(rid("/test:contA/listA")) == ArrayValue([ObjectValue(
+        {"leafE": "ABBA", "leafW": 10, "leafF": False})])
+    assert inst.peek(rid("/test:contT/int8")) == 7
+    assert inst.peek(rid("/test:llistB")) == ArrayValue(["127.0.0.1"])
+    assert inst.value["test:contT"] is not instance.value["test:contT"]
+    assert inst.value["test:contA"]["anydA"] is instance.value[
+        "test:contA"]["anydA"]
+    assert instance.peek(rid("/test:contA/testb:leafN")) == "hi!"
+    tx = instance.edit()
+    tx.set(rid("/test:contA/listA=FFFF,true/leafW"), 1)
+    with pytest.raises(NonexistentInstance):
+        tx.commit()
+    iid = data_model.parse_instance_id
+    with instance.edit() as tx:
+        tx.set(rid("/test:contA/listA=ABBA,false/leafW"), 10)
+        tx.set(iid("/test:contA/test:listA[2]/leafF"), True)
+        tx.set(rid("/test:contA/leafA"), 1)
+        tx.set(iid("/test:contA/test:leafA"), 2)
+        tx.set(rid("/test:contT"), {"int8": 3}, raw=True)
+        tx.set(rid("/test:contT/int16"), 4)
+    inst = tx.result
+    assert inst.peek(rid("/test:contA/listA=ABBA,true/leafW")) == 10
+    assert inst.peek(rid("/test:contA/leafA")) == 2
+    assert inst.value["test:contT"] == ObjectValue({"int8": 3, "int16": 4})
+    tx = instance.edit()
+    tx.delete(rid("/test:contA/listA=ABBA,false"))
+    tx.set(iid("/test:contA/test:listA[2]/leafW"), 1)
+    with pytest.raises(NonexistentInstance):
+        tx.commit()
+
+
+def test_transient(data_model, instance):
+    rid = data_model.parse_resource_id
+    tr = instance.transient()
+    tr.set(rid("/test:contA/testb:leafN"), "hello!")
+    conta = tr.peek(rid("/test:contA"))
+    tr.set(rid("/test:contA/listA=ABBA,false/leafW"), 10, raw=True)
+    tr.append(rid("/test:llistB"), "::2", raw=True)
+    llb = tr.peek(rid("/test:llistB"))
+    assert tr.value.revision > llb.revision > instance.value.revision
+    tr.delete(rid("/test:contA/listA=C0FFEE,true"))
+    assert tr.peek(rid("/test:contA")) is conta
+    lsta = conta["listA"]
+    assert tr.value.revision > conta.revision > lsta.revision > lsta[
+        0].revision
+    inst = tr.persistent()
+    assert inst.value["test:contA"] is conta
+    assert len(conta["listA"]) == 1
+    assert inst.peek(rid("/test:contA/listA=ABBA,false/leafW")) == 10
+    assert inst.peek(rid("/test:llistB")) == ArrayValue(
+        ["::1", "127.0.0.1", "::2"])
+    assert instance.peek(rid("/test:contA/testb:leafN")) == "hi!"
+    assert len(instance.value["test:contA"]["listA"]) == 2
+    with pytest.raises(InstanceValueError):
+        tr.set(rid("/test:leafX"), 1)
+    tr2 = inst.transient()
+    tr2.set(rid("/test:contA/testb:leafN"), "bye")
+    assert inst.peek(rid("/test:contA/testb:leafN")) == "hello!"
+
+
+def test_persistent_object(data_model, monkeypatch):
+    pov = PersistentObjectValue({f"m{i}": i for i in range(1000)})
+    pov2 = pov.copy()
+    del pov2["m10"]
+    pov2["m1000"] = 1000
+    assert len(pov) == len(pov2) == 1000
+    assert "m10" in pov and "m10" not in pov2 and pov2["m999"] == 999
+    assert pov2.pop("m1000") == 1000
+    assert pov2 == ObjectValue({f"m{i}": i for i in range(1000) if i != 10})
+    assert pov != pov2 and not pov != pov.copy()
+    pov2["m10"] = 10
+    pov2["m0"] = -1
+    assert list(pov2)[:2] == ["m0", "m1"] and list(pov2)[-1] == "m10"
+    assert next(reversed(pov2)) == "m10"
+    assert dict(pov2, m0=0)["m0"] == 0 == {"m0": 1, **pov2}["m0"] + 1
+    assert list({**pov2, "m0": 0})[-2:] == ["m999", "m10"]
+    pov3 = pov2.copy()
+    pov3["m1001"] = 1001
+    assert list(pov3)[-2:] == ["m10", "m1001"] and list(pov2)[-1] == "m10"
+    assert pov3.popitem() == ("m1001", 1001) and pov3.popitem()[0] == "m10"
+    assert json.loads(json.dumps(pov2)) == dict(pov2.items())
+    assert json.dumps(PersistentObjectValue()) == "{}"
+    raw = {"test:leafX": 53531, "test:contA": {
+        "leafB": 9, "testb:leafN": "hi!", "testb:leafR": "C0FFEE"}}
+    inst0 = data_model.from_raw(raw)
+    monkeypatch.setattr(PersistentObjectValue, "min_size", 2)
+    pinst = data_model.from_raw(raw)
+    conta = pinst["test:contA"]
+    assert isinstance(conta.value, PersistentObjectValue)
+    assert pinst.value == inst0.value
+    assert list(conta.value) == list(inst0.value["test:contA"])
+    assert pinst.raw_value() == raw
+    inst1 = conta["testb:leafN"].update("hello!").top()
+    assert isinstance(inst1.value["test:contA"], PersistentObjectValue)
+    assert inst1.value["test:contA"]["testb:leafN"] == "hello!"
+    assert pinst.value["test:contA"]["testb:leafN"] == "hi!"
+    assert conta.delete_item("testb:leafR").value.keys() == (
+        conta.value.keys() - {"testb:leafR"})
+
+
+def test_diff(data_model, instance, monkeypatch):
+    rid = data_model.parse_resource_id
+    with instance.edit() as tx:
+        tx.set(rid("/test:contA/listA=ABBA,false/leafW"), 10, raw=True)
+        tx.delete(rid("/test:contA/listA=C0FFEE,true"))
+        tx.delete(rid("/test:contA/testb:leafN"))
+    inst = tx.result
+    assert instance.diff(instance) == []
+    diff = instance.diff(inst)
+    assert [str(ch) for ch in diff] == [
+        "delete /test:contA/listA/0", "replace /test:contA/listA/0/leafW",
+        "delete /test:contA/testb:leafN"]
+    assert [ch.target for ch in diff] == [
+        "/test:contA/listA=C0FFEE,true",
+        "/test:contA/listA=ABBA,false/leafW", "/test:contA/testb:leafN"]
+    assert diff.json_patch()[1] == {
+        "op": "replace", "path": "/test:contA/listA/0/leafW", "value": 10}
+    rdiff = inst.diff(instance)
+    assert [str(ch.kind) for ch in rdiff] == ["create", "replace", "create"]
+    edit = rdiff.yang_patch("undo")["ietf-yang-patch:yang-patch"]["edit"][0]
+    assert edit["target"] == "/test:contA/listA=C0FFEE,true"
+    assert edit["value"]["test:listA"][0]["leafE"] == "C0FFEE"
+    with pytest.raises(InstanceValueError):
+        instance.diff(instance["test:contA"])
+    la = instance["test:contA"]["listA"]
+    big = la.update(la.schema_node.from_raw(
+        [{"leafE": f"{i:x}", "leafF": True} for i in range(1000)]))
+    big.look_up(leafE="0", leafF=True)
+    big = big.top()
+    lasn = la.schema_node
+    entry_key = lasn._entry_key
+    keys = []
+    monkeypatch.setattr(lasn, "_entry_key", lambda en: keys.append(
+        en) or entry_key(en))
+    big2 = big["test:contA"]["listA"].look_up(leafE="1f4", leafF=True)
+    big2 = big2.update({"leafE": "1f4", "leafF": True, "leafW": 9},
+                       raw=True).up()
+    big2 = big2[999].insert_after({"leafE": "abc", "leafF": False},
+                                  raw=True).top()
+    keys.clear()
+    assert [str(ch) for ch in big.diff(big2)] == [
+        "create /test:contA/listA/1000",
+        "create /test:contA/listA/500/leafW"]
+    assert len(keys) < 10
+
+
+def test_walk(data_model, instance):
+    nodes = list(instance.walk())
+    assert len(nodes) == 28 and nodes[0] == ((), data_model.schema,
+                                              instance.value)
+    assert nodes[2][0] == ("test:llistB", 1) and nodes[2][2] == "127.0.0.1"
+    leaves = list(instance["test:contA"].iter_leaves("/test:contA/listA"))
+    assert [p[2:] for p, sn, v in leaves][-3:] == [
+        (1, "leafE"), (1, "leafW"), (1, "leafF")]
+    assert [p for p, sn, v in data_model.walk(
+        instance.value, ctype=ContentType.nonconfig, leaves=True)] == [
+            ("test:contA", "leafB")]
+    assert list(instance["test:contT"].walk("/test:contA")) == []
+
+
+def test_memory_report(instance):
+    seen = {}
+    rep = instance.memory_report(depth=2, seen=seen)
+    conta = rep["members"]["test:contA"]
+    assert rep["bytes"] > conta["bytes"] > conta["members"]["listA"]["bytes"]
+    assert "members" not in conta["members"]["listA"]
+    assert rep["lists"]["/test:contA/listA"]["entries"] == 2
+    assert instance.memory_report(seen=seen)["bytes"] == 0
+    inst1 = instance["test:contA"]["testb:leafN"].update("hello!").top()
+    rep1 = inst1.memory_report(seen=seen)
+    assert rep1["members"]["test:contT"]["bytes"] == 0
+    assert 0 < rep1["bytes"] < rep["bytes"] and rep1["sharing"] > 0.5
+    assert inst1.memory_report()["logical-bytes"] == rep1["logical-bytes"]
+
+
+def test_validate_incremental(data_model, instance, monkeypatch):
+    rid = data_model.parse_resource_id
+    vi = data_model.validate_incremental
+    all = ContentType.all
+    lasn = data_model.get_data_node("/test:contA/listA")
+    with instance.edit() as tx:
+        tx.set(rid("/test:contT/decimal64"), Decimal("1.5"))
+    data_model.clear_val_counters()
+    vi(instance, tx.result, ctype=all)
+    assert lasn.val_count == 0
+    with instance.edit() as tx:
+        tx.set(rid("/test:contA/listA=ABBA,false/leafW"), 10, raw=True)
+    with pytest.raises(SemanticError):
+        vi(instance, tx.result, ctype=all)
+    with instance.edit() as tx:
+        tx.set(rid("/test:contA/listA=C0FFEE,true/leafE"), "B00F")
+    with pytest.raises(SemanticError):
+        vi(instance, tx.result, ctype=all)
+    inst1 = instance["test:contA"]["listA"].delete_item(1).top()
+    with pytest.raises(SemanticError):
+        vi(instance, inst1, ctype=all)
+    inst2 = instance["test:contA"].put_member("leafA", 5).top()
+    with pytest.raises(SemanticError):
+        vi(instance, inst2, ctype=all)
+    inst3 = instance["test:contA"].delete_item("anydA").top()
+    with pytest.raises(SchemaError):
+        vi(instance, inst3, ctype=all)
+    lfsn = data_model.get_data_node("/test:contA/listA/leafF")
+    check_must = lfsn._check_must
+    checked = []
+    monkeypatch.setattr(lfsn, "_check_must", lambda inst, *args: (
+        checked.append(inst.path) or check_must(inst, *args)))
+    inst4 = instance["test:contA"]["listA"][1].put_member(
+        "leafF", True).top()
+    vi(instance, inst4, ctype=all)
+    assert checked == [("test:contA", "listA", 1, "leafF")]
+
+
+def test_compiled_pattern(data_model, instance):
+    sn = data_model.schema
+    cp = sn._compiled_pattern
+    names = list(cp.slots) + ["test:foo"]
+    for n in range(1 << len(names)):
+        val = ObjectValue({m: instance.value.get(m, 0)
+                           for i, m in enumerate(names) if n & (1 << i)})
+        inst = instance.update(val)
+        for ctype in ContentType:
+            vctx = ValidationContext()
+            p = sn.schema_pattern
+            p._eval_when(inst, vctx)
+            for m in inst:
+                p = p.deriv(m, ctype, vctx)
+            assert cp.check(inst, ctype, vctx) == p.nullable(ctype, vctx)
+
+
+def test_concurrent_validation(data_model, instance):
+    from concurrent.futures import ThreadPoolExecutor
+
+    def check(inst):
+        try:
+            inst.validate(ctype=ContentType.all)
+        except ValidationError as e:
+            return type(e), e.tag
+        return None
+    bad = instance.put_member("testb:leafQ", "ABBA").top()
+    insts = [instance, bad] * 20
+    data_model.clear_val_counters()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        res = list(pool.map(check, insts))
+    assert res == [None, (SchemaError, "member-not-allowed")] * 20
+    assert data_model.schema.val_count == 20
+
+
+def test_collect_errors(instance):
+    assert instance.validate(ctype=ContentType.all, collect=True) == []
+    la = instance["test:contA"]["listA"]
+    bad = la[0].put_member("leafF", 5).up().up()
+    bad = bad[1].put_member("leafF", "x").top()
+    bad = bad.put_member("testb:leafQ", "ABBA").top()
+    errs = bad.validate(ctype=ContentType.all, collect=True)
+    assert [(type(e), e.path, e.tag) for e in errs[:3]] == [
+        (SchemaError, "/", "member-not-allowed"),
+        (YangTypeError, "/test:contA/listA/0/leafF", "invalid-type"),
+        (YangTypeError, "/test:contA/listA/1/leafF", "invalid-type")]
+    assert len(bad.validate(ctype=ContentType.all, collect=True,
+                            max_errors=2)) == 2
+    with pytest.raises(SchemaError):
+        bad.validate(ctype=ContentType.all)
+
+
+def test_parallel_validation(data_model, instance, monkeypatch):
+    monkeypatch.setattr("yangson.instance._SHARD_SIZE", 1)
+    assert pickle.loads(pickle.dumps(data_model)).module_set_id() == \
+        data_model.module_set_id()
+    assert instance.validate(ctype=ContentType.all, workers=2) is None
+    la = instance["test:contA"]["listA"]
+    bad = la[0].put_member("leafF", 5).up().up()
+    bad = bad[1].put_member("leafF", "x").top()
+    bad = bad.put_member("testb:leafQ", "ABBA").top()
+    errs = bad.validate(ctype=ContentType.all, collect=True)
+    perrs = bad.validate(ctype=ContentType.all, collect=True, workers=3)
+    assert sorted(map(str, errs)) == sorted(map(str, perrs))
+    dup = la[1].update(la[0].value).top()
+    with pytest.raises(SemanticError) as exc:
+        dup.validate(ctype=ContentType.all, workers=2)
+    assert exc.value.tag == "non-unique-key"
+    monkeypatch.undo()
+    entries = la.schema_node.from_raw(
+        [{"leafE": f"{i:x}", "leafF": True} for i in range(448)])
+    big = la.update(ArrayValue(list(la.value) + list(entries)))
+    big = big[123].put_member("leafF", 5).up().up()
+    big = big[250].put_member("leafE", "xyz").up().up()
+    big = big[401].put_member("leafF", 5).top()
+    errs = big.validate(ctype=ContentType.all, collect=True)
+    perrs = big.validate(ctype=ContentType.all, collect=True, workers=2)
+    assert len(errs) == 3 and list(map(str, errs)) == list(map(str, perrs))
+    for cnt in (1, 2):
+        assert list(map(str, big.validate(
+            ctype=ContentType.all, collect=True, max_errors=cnt,
+            workers=2))) == list(map(str, errs[:cnt]))
+    with pytest.raises(YangTypeError) as exc:
+        big.validate(ctype=ContentType.all, workers=2)
+    assert exc.value.path == "/test:contA/listA/123/leafF"
+    dup = big["test:contA"]["listA"][5].update(entries[0]).top()
+    dup = dup["test:llistB"][0].update("1.2.3.400").top()
+    err = dup.validate(ctype=ContentType.all, collect=True, max_errors=1)[0]
+    with pytest.raises(YangTypeError) as exc:
+        dup.validate(ctype=ContentType.all, workers=2)
+    assert str(exc.value) == str(err)
+
+
+def test_unique(data_model, instance):
+    lasn = data_model.get_data_node("/test:contA/listA")
+    assert None not in lasn._unique_extractors
+    la = instance["test:contA"]["listA"]
+    assert lasn._check_unique(la) is None
+    dup = la[1].put_member("contD", {"leafG": "foo1-bar"}, raw=True).top()
+    with pytest.raises(SemanticError) as exc:
+        dup.validate(ctype=ContentType.all)
+    assert exc.value.tag == "data-not-unique"
+
+
+def test_validation_cache(data_model, instance):
+    assert XPathParser("../../foo[bar = current()/../baz]",
+                       SchemaContext(data_model.schema_data, "test",
+                                     ("test", ""))).parse().reach() == 2
+    assert not data_model.get_data_node("/test:contA/listA")._cacheable
+    assert data_model.get_data_node("/test:contA/listA/contD")._cacheable
+    cache = ValidationCache(maxsize=2)
+    assert instance.validate(ctype=ContentType.all, cache=cache) is None
+    assert (len(cache), cache.hits, cache.misses) == (2, 0, 3)
+    assert instance.validate(ctype=ContentType.all, cache=cache) is None
+    assert cache.hits == 2
+    cd = instance["test:contA"]["listA"][0]["contD"]
+    bad = cd.put_member("leafG", "9lives").top()
+    errs = bad.validate(ctype=ContentType.all, collect=True, cache=cache)
+    assert [type(e) for e in errs] == [YangTypeError]
+    with pytest.raises(YangTypeError):
+        bad.validate(ctype=ContentType.all, cache=cache)
+    assert cache.hits == 3
+    ce = cd["contE"]
+    good = ce.put_member("leafP", 0).top()
+    assert good.validate(ctype=ContentType.all, cache=cache) is None
+    bad = ce.put_member("leafP", 2**61 - 1).top()
+    assert hash(bad.value) == hash(good.value)
+    with pytest.raises(YangTypeError):
+        bad.validate(ctype=ContentType.all, cache=cache)
+
+
+def test_validation_profile(data_model, instance):
+    prof = ValidationProfile()
+    assert instance.validate(ctype=ContentType.all, profile=prof) is None
+    rep = json.loads(prof.report())
+    nodes = {r["node"]: r for r in rep["nodes"]}
+    assert nodes["/"]["calls"] == 1
+    ca = nodes["/test:contA"]
+    assert ca["time"] > ca["xpath"] + ca["pattern"] > 0
+    assert nodes["/test:contA/listA"]["calls"] == 1
+    assert nodes["/test:contA/leafB"]["type"] > 0
+    must = [(r["node"], r["calls"]) for r in rep["expressions"]
+            if r["expression"] == "not(test:leafA <= test:leafB)"]
+    assert must == [("/test:contA", 1)]
+    assert "+--rw test:contA <" in data_model.ascii_tree(profile=prof)
+
+
+def test_pattern_memo(data_model, instance):
+    gtype = data_model.get_data_node("/test:contA/listA/contD/leafG").type
+    assert Pattern(gtype.patterns[0].pattern).regex is gtype.patterns[0].regex
+    assert PatternSet.get(gtype.patterns) is gtype._pattern_set
+    PatternSet.clear_memos()
+    assert instance.validate(ctype=ContentType.all) is None
+    hits, misses = PatternSet.memo_info()
+    assert misses > 0
+    assert instance.validate(ctype=ContentType.all) is None
+    assert PatternSet.memo_info() == (2 * hits + misses, misses)
+    assert gtype._check("foo-bar") is None
+    assert gtype._check("XMLfoo") == gtype._check("xml")
+    assert gtype._pattern_set.check("xml") == 1
+
+
+def test_compiled_checkers(data_model):
+    atype = data_model.get_data_node("/test:contA/leafA").type
+    assert atype.range.bounds() == ([-6378], [412])
+    for val in (-6379, -6378, 0, 412, 413, True, "1", 1.0):
+        assert atype._checker(val) == atype._check(val)
+    assert atype._checker(413)[0] == "invalid-type"
+    wtype = data_model.get_data_node("/test:contA/listA/leafW").type
+    assert wtype._checker(1) is None
+    assert wtype._checker(413) == atype._checker(413)
+    etype = data_model.get_data_node("/test:contA/listA/leafE").type
+    assert etype._checker("") == ("invalid-type", "invalid length")
+    assert etype._checker("F0x")[1] == "pattern '[0-9A-Fa-f]*'"
+    assert "Ab" in etype and 12 not in etype
+
+
+def test_union_dispatch(data_model):
+    llb = data_model.get_data_node("/test:llistB").type
+    v4, v6 = llb.types
+    assert llb._lexical_mask() == v6._lexical_mask() == 1
+    assert llb._raw_members("::1") == (v6,)
+    assert llb._raw_members("10.0.0.1") == (v4, v6)
+    assert llb._raw_members("10.0.0.0/8") == ()
+    assert llb._raw_members(True) == ()
+    assert llb.from_raw("::1") == "::1"
+    assert llb.parse_value("10.0.0.1") == "10.0.0.1"
+    assert llb.from_raw("10.0.0.0/8") is None
+    assert llb._text_members("::1") == (v6,)
+    assert Pattern("[0-9a-f:]*").admits(":")
+    assert not Pattern("[0-9a-f:]*").admits("/")
+    assert Pattern("x.*").admits("/")
+
+
+def test_native_validators(data_model):
+    samples = {
+        "ipv4-address": ["0.0.0.0", "10.1.2.3%eth0", "1.2.3.04", "1.2.3"],
+        "ipv4-address-no-zone": ["1.2.3.4", "1.2.3.4%eth0", "256.1.1.1"],
+        "ipv4-prefix": ["10.0.0.0/8", "1.2.3.4/32", "1.2.3.4/33"],
+        "ipv6-address": ["::", "fe80::1%eth0", "1:2:3:4:5:6:7:8",
+                         "1::2::3", "12345::", "::ffff:1.2.3.4"],
+        "ipv6-address-no-zone": ["2001:DB8::1", "1:2:3:4:5:6:7::", "::1%a"],
+        "ipv6-prefix": ["2001:db8::/32", "::1/128", "1::/05", "::/129"],
+        "domain-name": [".", "example.com.", "_s.x-1.Z", "-a.b", "a..b"],
+        "dotted-quad": ["249.250.199.10", "1.2.3.4.5"],
+        "yang-identifier": ["xm", "Xm.l", "foo-bar_1.2", "XMLfoo", "1a"],
+        "mac-address": ["00:1b:44:11:3A:B7", "00:1b:44:11:3A"],
+        "phys-address": ["", "00:11:22", "0:11"],
+        "hex-string": ["ff:00", "ff:0g"],
+        "uuid": ["f81d4fae-7dec-11d0-a765-00a0c91e6bf6", "f81d4fae"],
+        "date-and-time": ["2023-10-19T12:34:56.123+02:00",
+                          "2023-10-19T12:34:56z", "2023-10-19T12:34:56Z"]}
+    rnd = random.Random(0)
+    alphabet = "0123456789abcdefABCDEF:.-_/%xXmlTZ+ \n\u0663"
+    mods = {}
+    for fn in glob.glob("yang-modules/ietf/ietf-*-types@*.yang"):
+        with open(fn, encoding="utf-8") as infile:
+            mst = ModuleParser(infile.read()).parse()
+        mods.setdefault(mst.argument, []).append(mst)
+
+    def patterns(mst, tname):
+        tst = mst.find1("typedef", tname, required=True).find1("type")
+        base = tst.argument.partition(":")[2]
+        return ((patterns(mst, base) if base else ()) +
+                tuple([(p.argument, p.find1("modifier") is not None)
+                       for p in tst.find_all("pattern")]))
+    for (mod, tname), (key, nv) in native_validators.items():
+        assert patterns(mods[mod][0], tname) == key
+        pset = PatternSet(key)
+        for val in samples[tname] + [
+                "".join(rnd.choice(alphabet) if rnd.random() < 0.1 else c
+                        for c in rnd.choice(samples[tname]))
+                for i in range(200)]:
+            if nv(val):
+                assert pset.check(val) is None
+            elif val.isascii() and not tname.startswith("ipv6"):
+                assert pset.check(val) is not None
+    for typ in data_model.get_data_node("/test:llistB").type.types:
+        assert typ._native is not None
+        for val in samples[typ.name]:
+            assert typ._checker(val) == typ._check(val)
+
+
+def test_scaled_decimal64(instance):
+    sdm = DataModel.from_file("yang-modules/test/yang-library.json",
+                              ["yang-modules/test", "yang-modules/ietf"],
+                              scaled_decimal=True)
+    d64 = sdm.get_data_node("/test:contT/decimal64").type
+    pi = d64.from_raw("3.141592653589793238")
+    assert isinstance(pi, ScaledDecimal) and pi == 3141592653589793238
+    assert pi in d64 and pi.to_decimal() == Decimal("3.141592653589793238")
+    assert float(pi) == 3.141592653589793
+    assert d64.from_raw(Decimal("1.25")) == d64.from_raw(1.25) == 125 * 10**16
+    assert d64.from_raw("1.0000000000000000005") == 10**18
+    assert d64.from_raw("-.5") == -5 * 10**17
+    assert d64.from_raw("1.2.3") is d64.from_raw("NaN") is None
+    assert d64.from_raw("0") not in d64
+    assert d64.from_raw("9.223372036854775808") not in d64
+    assert Decimal("1.5") not in d64
+    assert d64.canonical_string(d64.from_raw("-2.50")) == "-2.5"
+    assert str(d64.from_raw("-0.00")) == "0.0"
+    assert str(d64.from_raw("12")) == "12.0"
+    assert d64.canonical_string(Decimal("2.50")) == "2.5"
+    union = sdm.get_data_node("/test:contT/union").type
+    for raw in ("1.5", 7, "-2.0"):
+        val = union.from_raw(raw)
+        assert json.loads(json.dumps(union.to_raw(val))) == raw
+    i8 = sdm.get_data_node("/test:contT/int8").type
+    assert 15 in i8 and union.from_raw("1.5") not in i8
+    pi2 = pickle.loads(pickle.dumps(pi))
+    assert pi2 == pi and type(pi2) is type(pi)
+    assert pickle.loads(pickle.dumps(sdm)).schema_data.scaled_decimal
+    raw = json.loads(json.dumps(instance.raw_value()))
+    sinst = sdm.from_raw(raw)
+    assert sinst.validate(ctype=ContentType.all) is None
+    assert json.loads(json.dumps(sinst.raw_value())) == raw
+    assert str(sinst["test:contT"]["decimal64"]) == "4.5"
+    sctx = SchemaContext(sdm.schema_data, "test",
+                         sdm.schema_data.last_revision("test"))
+    for expr, res in [("t:contT/t:decimal64 > 4.4", True),
+                      ("t:contT/t:decimal64 = 4.5", True),
+                      ("sum(t:contT/t:decimal64)", 4.5)]:
+        assert XPathParser(expr, sctx).parse().evaluate(sinst) == res
+
+
 def test_validation(instance):
     assert instance.validate(ctype=ContentType.all) is None
     inst2 = instance.put_member("testb:leafQ", "ABBA").top()
@@ -0,0 +1,133 @@
+"""
+This script measures memory allocations during validation of a large
+list-heavy instance document.
+
+It creates a YANG module with a list whose entries contain several leaves
+and a leaf-list, builds an instance with the number of list entries given
+as the (optional) parameter, validates it and prints the number of
+objects and bytes created per validated leaf for the main classes of
+instance nodes, cooked values, linked lists and route selectors, together
+with the peak memory consumed by the validation.
+"""
+
+from collections import Counter
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from yangson import DataModel
+from yangson import instance, instvalue
+
+entries = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+"""Number of list entries."""
+
+module = """
+module bench {
+  yang-version "1.1";
+  namespace "http://example.com/bench";
+  prefix "b";
+  container top {
+    list item {
+      key "id";
+      leaf id {
+        type uint32;
+      }
+      leaf name {
+        type string {
+          pattern "[a-z]+-[0-9]+";
+        }
+      }
+      leaf enabled {
+        type boolean;
+      }
+      leaf weight {
+        type decimal64 {
+          fraction-digits 2;
+        }
+      }
+      leaf-list tag {
+        type string;
+      }
+    }
+  }
+}
+"""
+"""Text of the benchmark YANG module."""
+
+yang_library = {
+    "ietf-yang-library:modules-state": {
+        "module-set-id": "bench",
+        "module": [{
+            "name": "bench",
+            "revision": "",
+            "namespace": "http://example.com/bench",
+            "conformance-type": "implement"
+        }]
+    }
+}
+"""YANG library data for the benchmark data model."""
+
+tracked = (instance.ObjectMember, instance.ArrayEntry, instance.RootNode,
+           instance.LinkedList, instance.ArraySlice, instance.MemberName,
+           instance.EntryIndex, instance.EntryKeys, instance.EntryValue,
+           instvalue.ObjectValue, instvalue.ArrayValue)
+"""Classes whose instances are counted."""
+
+counts = Counter()
+"""Number of created objects per class."""
+sizes = Counter()
+"""Number of bytes of created objects per class."""
+
+
+def counting(cls):
+    """Wrap the constructor of `cls` so that it counts created objects."""
+    orig = cls.__dict__.get("__init__")
+    if orig is None:
+        return
+
+    def init(self, *args, **kwargs):
+        orig(self, *args, **kwargs)
+        name = type(self).__name__
+        counts[name] += 1
+        sizes[name] += sys.getsizeof(self) + (
+            sys.getsizeof(self.__dict__) if hasattr(self, "__dict__") else 0)
+    cls.__init__ = init
+
+
+def raw_instance():
+    """Return raw instance document."""
+    return {"bench:top": {"item": [{
+        "id": i, "name": f"item-{i}", "enabled": i % 2 == 0,
+        "weight": f"{i % 100}.5", "tag": ["red", "green"]}
+        for i in range(entries)]}}
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with open(os.path.join(tmpdir, "bench.yang"), "w") as yfile:
+            yfile.write(module)
+        dm = DataModel(json.dumps(yang_library), [tmpdir])
+    inst = dm.from_raw(raw_instance())
+    leaves = sum(1 for _ in inst.iter_leaves())
+    for cls in tracked:
+        counting(cls)
+    tracemalloc.start()
+    start = time.perf_counter()
+    inst.validate()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"validated leaves: {leaves}, time: {elapsed:.3f} s, "
+          f"peak memory: {peak / leaves:.1f} B/leaf")
+    print(f"{'class':<16}{'objects/leaf':>14}{'bytes/leaf':>12}")
+    for name, cnt in counts.most_common():
+        print(f"{name:<16}{cnt / leaves:>14.2f}{sizes[name] / leaves:>12.1f}")
+    print(f"{'total':<16}{sum(counts.values()) / leaves:>14.2f}"
+          f"{sum(sizes.values()) / leaves:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+This script compares native validators of well-known typedefs with
+checking of their regular expression patterns.
+
+For every typedef that has a registered native validator, it creates a
+leaf of that type, generates the number of distinct valid values given
+as the (optional) parameter, and checks all of them, first with the
+compiled type checker that uses the native validator and then with the
+checker that uses only the patterns. The memos of pattern sets are
+cleared before each run, so that every value is actually matched.
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from yangson import DataModel
+from yangson.constraint import PatternSet
+from yangson.validators import native_validators
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+"""Number of values per type."""
+
+ietf_dir = os.path.join(os.path.dirname(__file__), "..", "..",
+                        "yang-modules", "ietf")
+"""Directory with the bundled IETF modules."""
+
+prefixes = {"ietf-inet-types": "inet", "ietf-yang-types": "yang"}
+"""Prefixes of the imported modules."""
+
+module = """
+module bench {{
+  yang-version "1.1";
+  namespace "http://example.com/bench";
+  prefix "b";
+  import ietf-inet-types {{
+    prefix "inet";
+  }}
+  import ietf-yang-types {{
+    prefix "yang";
+  }}
+{}
+}}
+"""
+"""Template of the benchmark YANG module."""
+
+yang_library = {
+    "ietf-yang-library:modules-state": {
+        "module-set-id": "bench",
+        "module": [{
+            "name": "bench",
+            "revision": "",
+            "namespace": "http://example.com/bench",
+            "conformance-type": "implement"
+        }, {
+            "name": "ietf-inet-types",
+            "revision": "2013-07-15",
+            "namespace": "urn:ietf:params:xml:ns:yang:ietf-inet-types",
+            "conformance-type": "import"
+        }, {
+            "name": "ietf-yang-types",
+            "revision": "2013-07-15",
+            "namespace": "urn:ietf:params:xml:ns:yang:ietf-yang-types",
+            "conformance-type": "import"
+        }]
+    }
+}
+"""YANG library data for the benchmark data model."""
+
+rnd = random.Random(0)
+
+
+def hexa(n):
+    """Return random hexadecimal digits."""
+    return "".join([rnd.choice("0123456789abcdefABCDEF") for _ in range(n)])
+
+
+def ipv4():
+    return ".".join([str(rnd.randrange(256)) for _ in range(4)])
+
+
+def ipv6():
+    groups = [hexa(rnd.randint(1, 4)) for _ in range(8)]
+    i = rnd.randrange(8)
+    j = rnd.randint(i, 8)
+    return (":".join(groups) if i == j else
+            ":".join(groups[:i]) + "::" + ":".join(groups[j:]))
+
+
+def label():
+    return rnd.choice("abcdefghijklmnopqrstuvwxyz") + "".join(
+        [rnd.choice("abcdefghijklmnopqrstuvwxyz0123456789-")
+         for _ in range(rnd.randint(0, 14))]) + hexa(1)
+
+
+def stamp():
+    return (f"{rnd.randint(1970, 2099)}-{rnd.randint(1, 12):02d}-"
+            f"{rnd.randint(1, 28):02d}T{rnd.randrange(24):02d}:"
+            f"{rnd.randrange(60):02d}:{rnd.randrange(60):02d}."
+            f"{rnd.randrange(1000000)}"
+            + rnd.choice(["Z", "+02:00", "-05:30"]))
+
+
+generators = {
+    "ipv4-address": ipv4,
+    "ipv4-address-no-zone": ipv4,
+    "ipv4-prefix": lambda: f"{ipv4()}/{rnd.randint(0, 32)}",
+    "ipv6-address": ipv6,
+    "ipv6-address-no-zone": ipv6,
+    "ipv6-prefix": lambda: f"{ipv6()}/{rnd.randint(0, 128)}",
+    "domain-name": lambda: ".".join(
+        [label() for _ in range(rnd.randint(1, 4))]),
+    "dotted-quad": ipv4,
+    "yang-identifier": lambda: "y" + label() + "_" + label(),
+    "mac-address": lambda: ":".join([hexa(2) for _ in range(6)]),
+    "phys-address": lambda: ":".join(
+        [hexa(2) for _ in range(rnd.randint(1, 8))]),
+    "hex-string": lambda: ":".join(
+        [hexa(2) for _ in range(rnd.randint(1, 16))]),
+    "uuid": lambda: "-".join([hexa(8), hexa(4), hexa(4), hexa(4), hexa(12)]),
+    "date-and-time": stamp
+}
+"""Generators of valid values for the benchmarked typedefs."""
+
+
+def run(checker, values):
+    """Return time per value in nanoseconds."""
+    PatternSet.clear_memos()
+    start = time.perf_counter()
+    for v in values:
+        if checker(v) is not None:
+            raise ValueError(v)
+    return (time.perf_counter() - start) / len(values) * 1e9
+
+
+def main():
+    leaves = "\n".join([f"  leaf {t} {{\n    type {prefixes[m]}:{t};\n  }}"
+                        for m, t in native_validators])
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with open(os.path.join(tmpdir, "bench.yang"), "w") as yfile:
+            yfile.write(module.format(leaves))
+        dm = DataModel(json.dumps(yang_library), [tmpdir, ietf_dir])
+    print(f"{'typedef':<22}{'native ns':>11}{'regex ns':>10}{'speedup':>9}")
+    for _, tname in native_validators:
+        typ = dm.get_data_node("/bench:" + tname).type
+        values = list({generators[tname]() for _ in range(count)})
+        native = run(typ._compile_checker(), values)
+        nv = typ._native
+        typ._native = None
+        regex = run(typ._compile_checker(), values)
+        typ._native = nv
+        print(f"{tname:<22}{native:>11.0f}{regex:>10.0f}"
+              f"{regex / native:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
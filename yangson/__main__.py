@@ -29,13 +29,15 @@ from yangson.exceptions import (
     BadYangLibraryData, FeaturePrerequisiteError, MultipleImplementedRevisions,
     ModuleNotFound, ModuleNotRegistered, RawMemberError, RawTypeError,
     SchemaError, SemanticError, YangTypeError)
+from yangson.schemanode import ValidationProfile
 
 
 def main(ylib: str = None, path: str = None,
          scope: ValidationScope = ValidationScope.all,
          ctype: ContentType = ContentType.config, set_id: bool = False,
          tree: bool = False, no_types: bool = False,
-         digest: bool = False, validate: str = None) -> int:
+         digest: bool = False, validate: str = None,
+         profile: str = None) -> int:
     """Entry-point for a validation script.
 
     Args:
@@ -48,6 +50,8 @@ def main(ylib: str = None, path: str = None,
         no_types: If `True`, don't print types in schema tree.
         digest: If `True`, print schema digest.
         validate: Name of file to validate against the schema.
+        profile: If it is "json" or "tree", print validation profile
+            in JSON format or as annotated schema tree.
 
     Returns:
         Numeric return code (0=no error, 2=YANG error, 1=other)
@@ -90,6 +94,9 @@ def main(ylib: str = None, path: str = None,
         parser.add_argument(
             "-n", "--no-types", action="store_true",
             help="suppress type info in tree output")
+        parser.add_argument(
+            "-P", "--profile", choices=["json", "tree"],
+            help="print validation profile in JSON format or as schema tree")
         args = parser.parse_args()
         ylib: str = args.ylib
         path: Optional[str] = args.path
@@ -100,6 +107,7 @@ def main(ylib: str = None, path: str = None,
         no_types = args.no_types
         digest: bool = args.digest
         validate: str = args.validate
+        profile: Optional[str] = args.profile
     try:
         with open(ylib, encoding="utf-8") as infile:
             yl = infile.read()
@@ -151,8 +159,9 @@ def main(ylib: str = None, path: str = None,
     except RawTypeError as e:
         print("Invalid type:", str(e), file=sys.stderr)
         return 3
+    prof = ValidationProfile() if profile else None
     try:
-        i.validate(scope, ctype)
+        i.validate(scope, ctype, profile=prof)
     except SchemaError as e:
         print("Schema error:", str(e), file=sys.stderr)
         return 3
@@ -162,6 +171,10 @@ def main(ylib: str = None, path: str = None,
     except YangTypeError as e:
         print("Invalid type:", str(e), file=sys.stderr)
         return 3
+    finally:
+        if prof:
+            print(prof.report() if profile == "json" else
+                  dm.ascii_tree(no_types, profile=prof))
     return 0
 
 
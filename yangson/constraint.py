@@ -22,12 +22,15 @@ This module implements the following classes:
 * Constraint: Abstract class representing annotated YANG constraints.
 * Intervals: Class representing a sequence of numeric intervals.
 * Pattern: Class representing regular expression pattern.
+* PatternSet: Sequence of patterns with a memo of matching results.
 * Must: Class representing the constraint specified by a "must" statement.
 """
 
+from bisect import bisect_right
 import decimal
 import re
-from typing import Callable, List, Optional, Union
+import unicodedata
+from typing import Callable, Dict, List, Optional, Tuple, Union
 from pyxb.utils.xmlre import RegularExpressionError, XMLToPython
 
 from .exceptions import InvalidArgument
@@ -40,6 +43,12 @@ Number = Union[int, decimal.Decimal]
 Interval = List[Number]
 """Numeric interval consisting either of one number or a pair of bounds."""
 
+PatternKey = Tuple[Tuple[str, bool], ...]
+"""Sequence of pattern texts, each with the invert-match flag."""
+
+_regexes: Dict[str, "re.Pattern"] = {}
+"""Process-wide registry of compiled regular expressions."""
+
 
 class Constraint:
     """Abstract class representing annotated YANG constraints."""
@@ -65,16 +74,24 @@ class Intervals(Constraint):
         super().__init__(error_tag, error_message)
         self.intervals = intervals
         self.parser = parser if parser else _pint
+        self._set_bounds()
 
     def __contains__(self, value: Number):
         """Return ``True`` if the receiver contains the value."""
-        for r in self.intervals:
-            if len(r) == 1:
-                if r[0] == value:
-                    return True
-            elif r[0] <= value <= r[1]:
-                return True
-        return False
+        i = bisect_right(self._lows, value)
+        return i > 0 and value <= self._highs[i - 1]
+
+    def bounds(self) -> Tuple[List[Number], List[Number]]:
+        """Return lower and upper bounds of the receiver's intervals.
+
+        The intervals are disjoint and sorted in ascending order, so a
+        value can be located in the first list by bisection.
+        """
+        return (self._lows, self._highs)
+
+    def _set_bounds(self) -> None:
+        self._lows = [r[0] for r in self.intervals]
+        self._highs = [r[-1] for r in self.intervals]
 
     def __str__(self) -> str:
         """Return string representation of the receiver."""
@@ -120,6 +137,7 @@ class Intervals(Constraint):
                 [simpl([lo, parse(ran[0][-1])])] +
                 [to_num(r) for r in ran[1:-1]] +
                 [simpl([parse(ran[-1][0]), hi])]))
+        self._set_bounds()
         if error_tag:
             self.error_tag = error_tag
         if error_message:
@@ -137,10 +155,183 @@ class Pattern(Constraint):
                          error_message if error_message else f"pattern '{pattern}'")
         self.pattern = pattern
         self.invert_match = invert_match
-        try:
-            self.regex = re.compile(XMLToPython(pattern))
-        except RegularExpressionError:
-            raise InvalidArgument(pattern) from None
+        self.regex = self.compile(pattern)
+
+    @staticmethod
+    def compile(pattern: str) -> "re.Pattern":
+        """Return the compiled regular expression for a YANG pattern.
+
+        Regular expressions are interned, so that every pattern is
+        translated and compiled only once per process.
+
+        Args:
+            pattern: YANG regular expression.
+
+        Raises:
+            InvalidArgument: If `pattern` is not a valid YANG pattern.
+        """
+        regex = _regexes.get(pattern)
+        if regex is None:
+            try:
+                regex = re.compile(XMLToPython(pattern))
+            except RegularExpressionError:
+                raise InvalidArgument(pattern) from None
+            regex = _regexes.setdefault(pattern, regex)
+        return regex
+
+    def admits(self, char: str) -> bool:
+        """Return ``False`` if no string matching the pattern contains `char`.
+
+        The result is conservative: the pattern is only scanned for
+        literals, ranges and escapes that may match `char`, so ``True``
+        may also be returned for some patterns that exclude it. The
+        invert-match modifier is not taken into account.
+
+        Args:
+            char: The character to look for.
+        """
+        pat = self.pattern
+        n = len(pat)
+        i = 0
+        in_class = False
+        while i < n:
+            c = pat[i]
+            i += 1
+            if c == "\\":
+                esc = pat[i:i + 1]
+                i += 1
+                if esc in ("p", "P") and pat[i:i + 1] == "{":
+                    j = pat.find("}", i)
+                    prop = pat[i + 1:j]
+                    i = j + 1
+                    if j < 0 or prop.startswith("Is") or len(prop) > 2:
+                        return True         # block escape
+                    if unicodedata.category(char).startswith(prop) == (
+                            esc == "p"):
+                        return True
+                    continue
+                if esc == "d":
+                    if unicodedata.category(char) == "Nd":
+                        return True
+                    continue
+                if esc == "s":
+                    if char in " \t\n\r":
+                        return True
+                    continue
+                if esc in "iIcCDSwW":
+                    return True
+                c = {"n": "\n", "r": "\r", "t": "\t"}.get(esc, esc)
+            elif in_class:
+                if c == "]":
+                    in_class = False
+                    continue
+                if c == "-" and pat[i:i + 1] == "[":
+                    continue                # subtraction
+                if c == "^" and pat[i - 2] == "[":
+                    return True             # negative class
+            elif c == "[":
+                in_class = True
+                continue
+            elif c == "{":
+                i = pat.find("}", i) + 1    # quantifier
+                if i == 0:
+                    return True
+                continue
+            elif c == ".":
+                if char not in "\n\r":
+                    return True
+                continue
+            elif c in "()|*+?":
+                continue
+            if in_class and pat[i:i + 1] == "-" and pat[i + 1:i + 2] not in (
+                    "", "[", "]"):
+                hi = pat[i + 1]
+                if hi == "\\":
+                    return True
+                i += 2
+                if c <= char <= hi:
+                    return True
+            elif c == char:
+                return True
+        return False
+
+
+class PatternSet:
+    """Sequence of patterns with a memo of matching results.
+
+    Pattern sets are interned, so all types with the same patterns
+    share one instance, also across data models. Results for recently
+    checked values are kept in a bounded memo that approximates LRU
+    replacement with two generations of entries: an entry survives
+    while it is used at least once per `memo_size` / 2 new values.
+    """
+
+    memo_size = 4096
+    """Maximum number of memoized values per pattern set."""
+
+    _registry: Dict[PatternKey, "PatternSet"] = {}
+
+    @classmethod
+    def get(cls, patterns: List[Pattern]) -> "PatternSet":
+        """Return the interned pattern set for a list of patterns."""
+        key = tuple([(p.pattern, p.invert_match) for p in patterns])
+        res = cls._registry.get(key)
+        if res is None:
+            res = cls._registry.setdefault(key, cls(key))
+        return res
+
+    @classmethod
+    def memo_info(cls) -> Tuple[int, int]:
+        """Return the total numbers of memo hits and misses."""
+        sets = list(cls._registry.values())
+        return (sum([ps.hits for ps in sets]),
+                sum([ps.misses for ps in sets]))
+
+    @classmethod
+    def clear_memos(cls) -> None:
+        """Clear memos and counters of all pattern sets."""
+        for ps in list(cls._registry.values()):
+            ps._recent = {}
+            ps._older = {}
+            ps.hits = ps.misses = 0
+
+    def __init__(self, key: PatternKey):
+        """Initialize the class instance."""
+        self.key = key
+        self.regexes = [(Pattern.compile(p), inv) for p, inv in key]
+        self.hits = 0
+        """Number of checks answered from the memo."""
+        self.misses = 0
+        """Number of checks that required matching."""
+        self._recent: Dict[str, Optional[int]] = {}
+        self._older: Dict[str, Optional[int]] = {}
+
+    def check(self, value: str) -> Optional[int]:
+        """Check a string value against the receiver's patterns.
+
+        Returns:
+            Index of the first pattern that `value` doesn't satisfy, or
+            ``None`` if it satisfies all of them.
+        """
+        res = self._recent.get(value, -1)
+        if res != -1:
+            self.hits += 1
+            return res
+        res = self._older.get(value, -1)
+        if res == -1:
+            self.misses += 1
+            res = None
+            for i, (regex, invert) in enumerate(self.regexes):
+                if (regex.fullmatch(value) is not None) == invert:
+                    res = i
+                    break
+        else:
+            self.hits += 1
+        if len(self._recent) >= self.memo_size // 2:
+            self._older = self._recent
+            self._recent = {}
+        self._recent[value] = res
+        return res
 
 
 class Must(Constraint):
@@ -24,14 +24,20 @@ This module implements the following class:
 
 import hashlib
 import json
-from typing import Optional, Tuple
-from .enumerations import ContentType
-from .exceptions import BadYangLibraryData
-from .instance import (InstanceRoute, InstanceIdParser, ResourceIdParser,
-                       RootNode)
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from .enumerations import ContentType, ValidationScope
+from .exceptions import BadYangLibraryData, NonexistentInstance
+from .instance import (InstanceNode, InstanceRoute, InstanceIdParser,
+                       ResourceIdParser, RootNode, _walk)
+from .instvalue import ArrayValue, InstanceKey, ObjectValue, Value
 from .schemadata import SchemaData, SchemaContext
-from .schemanode import DataNode, SchemaTreeNode, RawObject, SchemaNode
-from .typealiases import DataPath, SchemaPath
+from .schemanode import (
+    DataNode, InternalNode, NotificationNode, RpcActionNode, SchemaTreeNode,
+    RawObject, SchemaNode, SequenceNode, TerminalNode, ValidationContext,
+    ValidationProfile)
+from .datatype import LeafrefType, LinkType
+from .typealiases import DataPath, QualName, SchemaPath
+from .xpathast import Expr
 
 
 class DataModel:
@@ -39,13 +45,15 @@ class DataModel:
 
     @classmethod
     def from_file(cls, name: str, mod_path: Tuple[str] = (".",),
-                  description: str = None) -> "DataModel":
+                  description: str = None,
+                  scaled_decimal: bool = False) -> "DataModel":
         """Initialize the data model from a file with YANG library data.
 
         Args:
             name: Name of a file with YANG library data.
             mod_path: Tuple of directories where to look for YANG modules.
             description:  Optional description of the data model.
+            scaled_decimal: Represent decimal64 values as scaled integers.
 
         Returns:
             The data model instance.
@@ -55,16 +63,18 @@ class DataModel:
         """
         with open(name, encoding="utf-8") as infile:
             yltxt = infile.read()
-        return cls(yltxt, mod_path, description)
+        return cls(yltxt, mod_path, description, scaled_decimal)
 
     def __init__(self, yltxt: str, mod_path: Tuple[str] = (".",),
-                 description: str = None):
+                 description: str = None, scaled_decimal: bool = False):
         """Initialize the class instance.
 
         Args:
             yltxt: JSON text with YANG library data.
             mod_path: Tuple of directories where to look for YANG modules.
             description: Optional description of the data model.
+            scaled_decimal: Represent decimal64 values as scaled integers
+                (see :class:`~.datatype.ScaledDecimal`).
 
         Raises:
             BadYangLibraryData: If YANG library data is invalid.
@@ -75,19 +85,30 @@ class DataModel:
             ModuleNotFound: If a YANG module wasn't found in any of the
                 directories specified in `mod_path`.
         """
+        self._args = (yltxt, mod_path, description, scaled_decimal)
         self.schema = SchemaTreeNode()
         self.schema._ctype = ContentType.all
+        self.schema.data_model = self
         try:
             self.yang_library = json.loads(yltxt)
         except json.JSONDecodeError as e:
             raise BadYangLibraryData(str(e)) from None
-        self.schema_data = SchemaData(self.yang_library, mod_path)
+        self.schema_data = SchemaData(self.yang_library, mod_path,
+                                      scaled_decimal)
         self._build_schema()
         self.schema.description = description if description else (
             "Data model ID: " +
             self.yang_library["ietf-yang-library:modules-state"]
             ["module-set-id"])
 
+    def __reduce__(self) -> Tuple[type, Tuple[str, Tuple[str], str, bool]]:
+        """Pickle the receiver as the arguments of its constructor.
+
+        The schema is then built anew when the data model is unpickled,
+        for example in a worker process.
+        """
+        return (self.__class__, self._args)
+
     def module_set_id(self) -> str:
         """Compute unique id of YANG modules comprising the data model.
 
@@ -107,7 +128,113 @@ class DataModel:
             Root instance node.
         """
         cooked = self.schema.from_raw(robj)
-        return RootNode(cooked, self.schema, cooked.timestamp)
+        return RootNode(cooked, self.schema, cooked.revision)
+
+    def walk(self, value: ObjectValue, data_path: DataPath = None,
+             ctype: ContentType = None, leaves: bool = False
+             ) -> Iterator[Tuple[Tuple[InstanceKey], DataNode, Value]]:
+        """Iterate over a cooked data tree without creating instance nodes.
+
+        Args:
+            value: Cooked value of the data tree root.
+            data_path: Only visit instances of this data node or its
+                descendants.
+            ctype: Only visit instances of this content type.
+            leaves: Flag to be set if only leaf and leaf-list instances
+                are to be visited.
+
+        Returns:
+            Iterator of tuples containing path, schema node and value of
+            each instance, see :meth:`~.InstanceNode.walk`.
+        """
+        return _walk((), self.schema, value, data_path, None, ctype, leaves)
+
+    def validate_incremental(
+            self, old_root: RootNode, new_root: RootNode,
+            scope: ValidationScope = ValidationScope.all,
+            ctype: ContentType = ContentType.config) -> None:
+        """Validate a data tree obtained by changing a valid data tree.
+
+        Only the changed subtrees are validated completely. Apart from
+        them, the method checks the schema patterns and list properties
+        around the changes, and re-evaluates the "must", "when" and
+        leafref constraints whose dependencies, as extracted from their
+        XPath expressions, include a changed data node. If the reach of
+        these expressions is bounded (see :meth:`.Expr.reach`), they are
+        re-evaluated only for instances whose reachable subtree contains
+        a change.
+
+        Args:
+            old_root: Root of the original data tree that is known to be
+                valid with the same `scope` and `ctype`.
+            new_root: Root of the data tree to be validated.
+            scope: Scope of the validation (syntax, semantics or all).
+            ctype: Content type of the data trees.
+
+        Raises:
+            SchemaError: If the value doesn't conform to the schema.
+            SemanticError: If the value violates a semantic constraint.
+            YangTypeError: If the value is a scalar of incorrect type.
+        """
+        names = set()
+        full = set()
+        parents = set()
+        arrays = set()
+        changed = set()
+        for ch in old_root.diff(new_root):
+            path = ch.path
+            changed.update([path[:i] for i in range(len(path) + 1)])
+            sn = ch.schema_node
+            while sn is not None:
+                if isinstance(sn, DataNode):
+                    names.add(sn.qual_name)
+                sn = sn.parent
+            for val in (ch.old_value, ch.new_value):
+                if val is not None:
+                    names.update([csn.qual_name for p, csn, v in _walk(
+                        (), ch.schema_node, val, None, None, None, False)])
+            if ch.new_value is not None:
+                full.add(path)
+            if ch.old_value is None or ch.new_value is None:
+                parents.add(path[:-1])
+            arrays.update([path[:i] for i in range(1, len(path))
+                           if isinstance(path[i], int)])
+        syntax = scope.value & ValidationScope.syntax.value
+        semantics = scope.value & ValidationScope.semantics.value
+        vctx = ValidationContext()
+        try:
+            for path in full:
+                inst = self._instance(new_root, path)
+                inst.schema_node._validate(inst, scope, ctype, vctx)
+            for path in parents:
+                inst = self._instance(new_root, path)
+                if (syntax and not self._covered(path, full) and
+                        isinstance(inst.schema_node, InternalNode) and
+                        isinstance(inst.value, ObjectValue)):
+                    inst.schema_node._check_schema_pattern(inst, ctype, vctx)
+            for path in arrays:
+                if semantics and not self._covered(path, full):
+                    inst = self._instance(new_root, path)
+                    inst.schema_node._check_list_props(inst)
+                    inst.schema_node._check_cardinality(inst)
+            for (kind, sn), (deps, esc) in self._dependencies.items():
+                if (not (syntax if kind == "when" else semantics) or
+                        deps is not None and not (deps & names)):
+                    continue
+                for inst in self._schema_instances(new_root, sn):
+                    if (self._covered(inst.path, full) or esc is not None and
+                            self._ancestor_path(inst.path, esc)
+                            not in changed):
+                        continue
+                    if kind == "must":
+                        sn._check_must(inst)
+                    elif kind == "link":
+                        sn._validate(inst, ValidationScope.semantics, ctype,
+                                     vctx)
+                    else:
+                        sn._check_schema_pattern(inst, ctype, vctx)
+        finally:
+            vctx.commit()
 
     def get_schema_node(self, path: SchemaPath) -> Optional[SchemaNode]:
         """Return the schema node addressed by a schema path.
@@ -144,17 +271,19 @@ class DataModel:
                 return None
         return node
 
-    def ascii_tree(self, no_types: bool = False, val_count: bool = False) -> str:
+    def ascii_tree(self, no_types: bool = False, val_count: bool = False,
+                   profile: ValidationProfile = None) -> str:
         """Generate ASCII art representation of the schema tree.
 
         Args:
             no_types: Suppress output of data type info.
             val_count: Show accumulated validation counts.
+            profile: Validation profile whose times are shown.
 
         Returns:
             String with the ASCII tree.
         """
-        return self.schema._ascii_tree("", no_types, val_count)
+        return self.schema._ascii_tree("", no_types, val_count, profile)
 
     def clear_val_counters(self):
         """Clear validation counters in the entire schema tree."""
@@ -190,3 +319,114 @@ class DataModel:
                 self.schema._augment_stmt(aug, sctx)
         self.schema._post_process()
         self.schema._make_schema_patterns()
+        self._dependencies = self._xpath_dependencies()
+
+    def _xpath_dependencies(self) -> Dict[
+            Tuple[str, SchemaNode], Tuple[Optional[Set[QualName]],
+                                          Optional[int]]]:
+        """Extract dependencies of XPath-based constraints.
+
+        Returns:
+            Dictionary whose keys are pairs of constraint kind ("must",
+            "link" or "when") and schema node whose instances are to be
+            checked. The values are pairs of the set of qualified names
+            of data nodes that the constraints depend on, or ``None`` if
+            they may depend on any data node, and the number of levels
+            above the checked instance that the constraints may access,
+            or ``None`` if it is not bounded.
+        """
+        res = {}
+
+        def add(kind: str, sn: SchemaNode, expr: Optional[Expr],
+                ctx: Optional[DataNode], level: int = 0) -> None:
+            key = (kind, sn)
+            deps = None if expr is None else expr.dependencies()
+            if deps is not None and None in deps:
+                deps.discard(None)
+                if ctx is None:
+                    deps = None
+                else:
+                    deps.add(ctx.qual_name)
+            reach = None if expr is None else expr.reach()
+            esc = None if reach is None else max(reach - level, 0)
+            odeps, oesc = res.get(key, (set(), 0))
+            res[key] = (None if deps is None or odeps is None
+                        else odeps | deps,
+                        None if esc is None or oesc is None
+                        else max(esc, oesc))
+        todo = [self.schema]
+        while todo:
+            sn = todo.pop()
+            if isinstance(sn, DataNode):
+                for m in sn.must:
+                    add("must", sn, m.expression, sn)
+                if (isinstance(sn, TerminalNode) and
+                        isinstance(sn.type, LinkType) and
+                        sn.type.require_instance):
+                    add("link", sn, sn.type.path if isinstance(
+                        sn.type, LeafrefType) else None, sn)
+            if sn.when:
+                dp = sn.data_parent()
+                add("when", dp if dp else self.schema, sn.when,
+                    sn if isinstance(sn, DataNode) else dp,
+                    1 if isinstance(sn, DataNode) else 0)
+            if isinstance(sn, InternalNode):
+                todo.extend([c for c in sn.children if not isinstance(
+                    c, (RpcActionNode, NotificationNode))])
+        return res
+
+    @staticmethod
+    def _instance(root: RootNode, path: Tuple[InstanceKey]) -> InstanceNode:
+        """Return the instance node with the given path."""
+        inst = root
+        for k in path:
+            inst = inst[k]
+        return inst
+
+    @staticmethod
+    def _ancestor_path(path: Tuple[InstanceKey],
+                       levels: int) -> Tuple[InstanceKey]:
+        """Return the path of an ancestor that is `levels` data nodes up.
+
+        As in XPath, the parent of a list or leaf-list entry is the
+        instance containing the (leaf-)list.
+        """
+        i = len(path)
+        for _ in range(levels):
+            if i == 0:
+                break
+            i -= 1
+            if isinstance(path[i], int):
+                i -= 1
+        return path[:i]
+
+    @staticmethod
+    def _covered(path: Tuple[InstanceKey],
+                 full: Set[Tuple[InstanceKey]]) -> bool:
+        """Return ``True`` if a prefix of `path` is in `full`."""
+        return any([path[:i] in full for i in range(len(path) + 1)])
+
+    def _schema_instances(self, root: RootNode,
+                          sn: SchemaNode) -> List[InstanceNode]:
+        """Return all instances of a data node or the schema root."""
+        route = []
+        while sn is not self.schema:
+            if isinstance(sn, DataNode):
+                route.append(sn)
+            sn = sn.parent
+        res = [root]
+        for dn in reversed(route):
+            iname = dn.iname()
+            nxt = []
+            for inst in res:
+                if not (isinstance(inst.value, ObjectValue) and
+                        iname in inst.value):
+                    continue
+                mem = inst._member(iname)
+                if (isinstance(mem.value, ArrayValue) and
+                        isinstance(dn, SequenceNode)):
+                    nxt.extend(mem)
+                else:
+                    nxt.append(mem)
+            res = nxt
+        return res
@@ -36,6 +36,7 @@ This module implements the following classes:
 * Int32Type: YANG int32 type.
 * Int64Type: YANG int64 type.
 * NumericType: Abstract class for numeric types.
+* ScaledDecimal: Decimal64 value represented by a scaled integer.
 * StringType: YANG string type.
 * Uint8Type: YANG uint8 type.
 * Uint16Type: YANG uint16 type.
@@ -45,11 +46,13 @@ This module implements the following classes:
 """
 
 import base64
+from bisect import bisect_right
 import decimal
 import numbers
-from typing import Any, Dict, List, Optional, Tuple, Union, TYPE_CHECKING
+from typing import (Any, Callable, Dict, List, Optional, Tuple, Union,
+                    TYPE_CHECKING)
 
-from .constraint import Intervals, Pattern
+from .constraint import Intervals, Number, Pattern, PatternSet
 from .exceptions import (
     InvalidArgument, ParserException, ModuleNotRegistered, UnknownPrefix,
     InvalidLeafrefPath)
@@ -57,6 +60,7 @@ from .schemadata import SchemaContext
 from .instance import InstanceNode, InstanceIdParser, InstanceRoute
 from .statement import Statement
 from .typealiases import QualName, RawScalar, ScalarValue, YangIdentifier
+from .validators import NativeValidator, find_validator
 from .xpathparser import XPathParser
 if TYPE_CHECKING:
     from .schemanode import TerminalNode
@@ -67,6 +71,15 @@ class DataType:
 
     _option_template = '<option value="{}"{}>{}</option>'
 
+    _value_classes = None  # type: Optional[Tuple[type, ...]]
+    """Python classes of cooked values (``None`` means unknown)."""
+
+    _raw_classes = (str,)  # type: Optional[Tuple[type, ...]]
+    """Python classes of raw values accepted by :meth:`from_raw`."""
+
+    _excluded_classes = ()  # type: Tuple[type, ...]
+    """Subclasses of :attr:`_value_classes` that are not cooked values."""
+
     def __init__(self, sctx: SchemaContext, name: Optional[YangIdentifier]):
         """Initialize the class instance."""
         self.sctx = sctx
@@ -74,6 +87,8 @@ class DataType:
         self.name = name
         self.error_tag = None
         self.error_message = None
+        self._checker = self._check
+        """Type checker, compiled when the schema is post-processed."""
 
     def __contains__(self, val: ScalarValue) -> bool:
         """Return ``True`` if the receiver type contains `val`.
@@ -81,7 +96,11 @@ class DataType:
         If the result is ``False``, set also `error_tag` and `error_message`
         properties.
         """
-        return True
+        err = self._checker(val)
+        if err is None:
+            return True
+        self.error_tag, self.error_message = err
+        return False
 
     def __str__(self):
         """Return YANG name of the receiver type."""
@@ -134,17 +153,52 @@ class DataType:
         """Return YANG name of the receiver."""
         return self.__class__.__name__[:-4].lower()
 
-    def _set_error_info(self, error_tag: str = None, error_message: str = None):
-        self.error_tag = error_tag if error_tag else "invalid-type"
-        self.error_message = (error_message if error_message else
-                              "expected " + str(self))
+    def _check(self, val: ScalarValue) -> Optional[Tuple[str, str]]:
+        """Check whether `val` belongs to the receiver type.
+
+        Unlike :meth:`__contains__`, this method doesn't modify the
+        receiver, so it can be used by concurrent validations.
+
+        Args:
+            val: Value to check.
+
+        Returns:
+            ``None`` if `val` is valid, otherwise a tuple of error tag
+            and error message.
+        """
+        return None
+
+    def _compile_checker(self) -> Callable[
+            [ScalarValue], Optional[Tuple[str, str]]]:
+        """Return a function specialised for checking the receiver's values.
+
+        The returned function has the same semantics as :meth:`_check`,
+        but restrictions and error descriptors are resolved in advance.
+        This implementation returns :meth:`_check` itself.
+        """
+        return self._check
+
+    def _error_info(self, error_tag: str = None,
+                    error_message: str = None) -> Tuple[str, str]:
+        return (error_tag if error_tag else "invalid-type",
+                error_message if error_message else "expected " + str(self))
+
+    def _lexical_mask(self) -> int:
+        """Return lexical features that string forms of values may have.
+
+        Bit 0 of the result is set if a raw or textual value of the
+        receiver type may contain a colon, and bit 1 if it may contain
+        a slash (see :meth:`UnionType._lexical_key`).
+        """
+        return 3
 
     def _post_process(self, tnode: "TerminalNode") -> None:
         """Post-process the receiver type on behalf of a terminal node.
 
-        By default do nothing.
+        The schema is complete at this point, so the type checker is
+        compiled.
         """
-        pass
+        self._checker = self._compile_checker()
 
     @classmethod
     def _resolve_type(cls, stmt: Statement, sctx: SchemaContext) -> "DataType":
@@ -178,6 +232,7 @@ class DataType:
                 btyp = False
             else:
                 res._handle_restrictions(typst, tsc)
+            res._handle_typedef(tdef, tsc)
             dfst = tdef.find1("default")
             if dfst:
                 res.default = res.from_yang(dfst.argument)
@@ -197,6 +252,14 @@ class DataType:
         """Handle type restriction substatements."""
         pass
 
+    def _handle_typedef(self, tdef: Statement, sctx: SchemaContext) -> None:
+        """Handle a typedef from which the receiver is derived.
+
+        This method is called after restrictions of the typedef have
+        been applied. By default do nothing.
+        """
+        pass
+
     def _type_digest(self, config: bool) -> Dict[str, Any]:
         """Return receiver's type digest.
 
@@ -212,14 +275,15 @@ class DataType:
 class EmptyType(DataType):
     """Class representing YANG "empty" type."""
 
+    _value_classes = (tuple,)
+    _raw_classes = (list,)
+
     def canonical_string(self, val: Tuple[None]) -> Optional[str]:
         return ""
 
-    def __contains__(self, val: Tuple[None]) -> bool:
-        if val == (None,):
-            return True
-        self._set_error_info()
-        return False
+    def _check(self, val: Tuple[None]) -> Optional[Tuple[str, str]]:
+        if val != (None,):
+            return self._error_info()
 
     def parse_value(self, text: str) -> Optional[Tuple[None]]:
         if text == "":
@@ -229,10 +293,15 @@ class EmptyType(DataType):
         if raw == [None]:
             return (None,)
 
+    def _lexical_mask(self) -> int:
+        return 0
+
 
 class BitsType(DataType):
     """Class representing YANG "bits" type."""
 
+    _value_classes = (tuple,)
+
     def __init__(self, sctx: SchemaContext, name: YangIdentifier):
         """Initialize the class instance."""
         super().__init__(sctx, name)
@@ -248,16 +317,17 @@ class BitsType(DataType):
         except AttributeError:
             return None
 
-    def __contains__(self, val: Tuple[str]) -> bool:
+    def _check(self, val: Tuple[str]) -> Optional[Tuple[str, str]]:
         for b in val:
             if b not in self.bit:
-                self._set_error_info(error_message="unknown bit " + b)
-                return False
-        return True
+                return self._error_info(error_message="unknown bit " + b)
 
     def to_raw(self, val: Tuple[str]) -> str:
         return self.canonical_string(val)
 
+    def _lexical_mask(self) -> int:
+        return 0
+
     def as_int(self, val: Tuple[str]) -> int:
         """Transform a "bits" value to an integer."""
         res = 0
@@ -318,11 +388,23 @@ class BitsType(DataType):
 class BooleanType(DataType):
     """Class representing YANG "boolean" type."""
 
-    def __contains__(self, val: bool) -> bool:
-        if isinstance(val, bool):
-            return True
-        self._set_error_info()
-        return False
+    _value_classes = (bool,)
+    _raw_classes = (bool,)
+
+    def _check(self, val: bool) -> Optional[Tuple[str, str]]:
+        if not isinstance(val, bool):
+            return self._error_info()
+
+    def _compile_checker(self) -> Callable[[bool], Optional[Tuple[str, str]]]:
+        err = self._error_info()
+
+        def check(val: bool) -> Optional[Tuple[str, str]]:
+            if val is not True and val is not False:
+                return err
+        return check
+
+    def _lexical_mask(self) -> int:
+        return 0
 
     def from_raw(self, raw: RawScalar) -> Optional[bool]:
         """Override superclass method."""
@@ -363,11 +445,37 @@ class LinearType(DataType):
                     [[0, 4294967295]], error_message="invalid length")
             self.length.restrict_with(lstmt.argument, *lstmt.get_error_info())
 
-    def __contains__(self, val: Union[str, bytes]) -> bool:
+    def _check(self, val: Union[str, bytes]) -> Optional[Tuple[str, str]]:
         if self.length and len(val) not in self.length:
-            self._set_error_info(self.length.error_tag, self.length.error_message)
-            return False
-        return True
+            return self._error_info(self.length.error_tag,
+                                    self.length.error_message)
+
+    def _length_bounds(self) -> Tuple[Optional[List[int]], List[int],
+                                      Tuple[str, str]]:
+        """Return bounds of length intervals and the error descriptor.
+
+        The lower bounds are ``None`` if length is not restricted.
+        """
+        if self.length is None:
+            return (None, [], self._error_info())
+        return self.length.bounds() + (self._error_info(
+            self.length.error_tag, self.length.error_message),)
+
+    def _compile_checker(self) -> Callable[
+            [Union[str, bytes]], Optional[Tuple[str, str]]]:
+        vclass = self._value_classes[0]
+        err = self._error_info()
+        lows, highs, lerr = self._length_bounds()
+
+        def check(val: Union[str, bytes]) -> Optional[Tuple[str, str]]:
+            if val.__class__ is not vclass and not isinstance(val, vclass):
+                return err
+            if lows is not None:
+                n = len(val)
+                i = bisect_right(lows, n)
+                if i == 0 or n > highs[i - 1]:
+                    return lerr
+        return check
 
     def _type_digest(self, config: bool) -> Dict[str, Any]:
         res = super()._type_digest(config)
@@ -379,10 +487,16 @@ class LinearType(DataType):
 class StringType(LinearType):
     """Class representing YANG "string" type."""
 
+    _value_classes = (str,)
+
     def __init__(self, sctx: SchemaContext, name: YangIdentifier):
         """Initialize the class instance."""
         super().__init__(sctx, name)
         self.patterns = []  # type: List[Pattern]
+        self._pattern_set = None  # type: Optional[PatternSet]
+        self._native = None  # type: Optional[NativeValidator]
+        self._native_count = 0
+        """Number of leading patterns covered by the native validator."""
 
     def _handle_restrictions(self, stmt: Statement, sctx: SchemaContext) -> None:
         super()._handle_restrictions(stmt, sctx)
@@ -390,18 +504,64 @@ class StringType(LinearType):
             invm = pst.find1("modifier", "invert-match") is not None
             self.patterns.append(Pattern(
                 pst.argument, invm, *pst.get_error_info()))
+        if self.patterns:
+            self._pattern_set = PatternSet.get(self.patterns)
+
+    def _handle_typedef(self, tdef: Statement, sctx: SchemaContext) -> None:
+        """Attach the native validator registered for the typedef."""
+        nv = find_validator(sctx.text_mid[0], tdef.argument, self.patterns)
+        if nv:
+            self._native = nv
+            self._native_count = len(self.patterns)
 
-    def __contains__(self, val: str) -> bool:
+    def _check(self, val: str) -> Optional[Tuple[str, str]]:
         if not isinstance(val, str):
-            self._set_error_info()
-            return False
-        if not super().__contains__(val):
-            return False
+            return self._error_info()
+        err = super()._check(val)
+        if err:
+            return err
+        if self._pattern_set:
+            i = self._pattern_set.check(val)
+            if i is not None:
+                p = self.patterns[i]
+                return self._error_info(p.error_tag, p.error_message)
+
+    def _compile_checker(self) -> Callable[[str], Optional[Tuple[str, str]]]:
+        err = self._error_info()
+        lows, highs, lerr = self._length_bounds()
+        pcheck = self._pattern_set.check if self._pattern_set else None
+        perrs = [self._error_info(p.error_tag, p.error_message)
+                 for p in self.patterns]
+        native = self._native
+        nc = self._native_count
+        rest = (PatternSet.get(self.patterns[nc:]).check
+                if len(self.patterns) > nc else None)
+
+        def check(val: str) -> Optional[Tuple[str, str]]:
+            if val.__class__ is not str and not isinstance(val, str):
+                return err
+            if lows is not None:
+                n = len(val)
+                i = bisect_right(lows, n)
+                if i == 0 or n > highs[i - 1]:
+                    return lerr
+            if native is not None and native(val):
+                if rest is not None:
+                    i = rest(val)
+                    if i is not None:
+                        return perrs[nc + i]
+            elif pcheck is not None:
+                i = pcheck(val)
+                if i is not None:
+                    return perrs[i]
+        return check
+
+    def _lexical_mask(self) -> int:
+        res = 3
         for p in self.patterns:
-            if (p.regex.match(val) is not None) == p.invert_match:
-                self._set_error_info(p.error_tag, p.error_message)
-                return False
-        return True
+            if not p.invert_match:
+                res &= p.admits(":") | p.admits("/") << 1
+        return res
 
     def _type_digest(self, config: bool) -> Dict[str, Any]:
         res = super()._type_digest(config)
@@ -417,18 +577,20 @@ class StringType(LinearType):
 class BinaryType(LinearType):
     """Class representing YANG "binary" type."""
 
+    _value_classes = (bytes,)
+    _raw_classes = (str, bytes)
+
     def from_raw(self, raw: RawScalar) -> Optional[bytes]:
         """Override superclass method."""
         try:
             return base64.b64decode(raw, validate=True)
-        except TypeError:
+        except (TypeError, ValueError):
             return None
 
-    def __contains__(self, val: bytes) -> bool:
+    def _check(self, val: bytes) -> Optional[Tuple[str, str]]:
         if not isinstance(val, bytes):
-            self._set_error_info()
-            return False
-        return super().__contains__(val)
+            return self._error_info()
+        return super()._check(val)
 
     def to_raw(self, val: bytes) -> str:
         return self.canonical_string(val)
@@ -436,10 +598,15 @@ class BinaryType(LinearType):
     def canonical_string(self, val: bytes) -> Optional[str]:
         return base64.b64encode(val).decode("ascii")
 
+    def _lexical_mask(self) -> int:
+        return 2
+
 
 class EnumerationType(DataType):
     """Class representing YANG "enumeration" type."""
 
+    _value_classes = (str,)
+
     def __init__(self, sctx: SchemaContext, name: YangIdentifier):
         """Initialize the class instance."""
         super().__init__(sctx, name)
@@ -449,11 +616,24 @@ class EnumerationType(DataType):
         """Return list of enum items sorted by value."""
         return sorted(self.enum.items(), key=lambda x: x[1])
 
-    def __contains__(self, val: str) -> bool:
-        if val in self.enum:
-            return True
-        self._set_error_info()
-        return False
+    def _check(self, val: str) -> Optional[Tuple[str, str]]:
+        if val not in self.enum:
+            return self._error_info()
+
+    def _compile_checker(self) -> Callable[[str], Optional[Tuple[str, str]]]:
+        names = frozenset(self.enum)
+        err = self._error_info()
+
+        def check(val: str) -> Optional[Tuple[str, str]]:
+            if not isinstance(val, str) or val not in names:
+                return err
+        return check
+
+    def _lexical_mask(self) -> int:
+        res = 0
+        for e in self.enum:
+            res |= (":" in e) | ("/" in e) << 1
+        return res
 
     def _handle_properties(self, stmt: Statement, sctx: SchemaContext) -> None:
         """Handle **enum** statements."""
@@ -518,8 +698,31 @@ class LeafrefType(LinkType):
     def canonical_string(self, val: ScalarValue) -> Optional[str]:
         return self.ref_type.canonical_string(val)
 
-    def __contains__(self, val: ScalarValue) -> bool:
-        return val in self.ref_type
+    @property
+    def _value_classes(self) -> Optional[Tuple[type, ...]]:
+        return self.ref_type._value_classes if self.ref_type else None
+
+    @property
+    def _raw_classes(self) -> Optional[Tuple[type, ...]]:
+        return self.ref_type._raw_classes if self.ref_type else None
+
+    @property
+    def _excluded_classes(self) -> Tuple[type, ...]:
+        return self.ref_type._excluded_classes if self.ref_type else ()
+
+    def _lexical_mask(self) -> int:
+        return self.ref_type._lexical_mask() if self.ref_type else 3
+
+    def _check(self, val: ScalarValue) -> Optional[Tuple[str, str]]:
+        return self.ref_type._check(val)
+
+    def _compile_checker(self) -> Callable[
+            [ScalarValue], Optional[Tuple[str, str]]]:
+        ref = self.ref_type
+
+        def check(val: ScalarValue) -> Optional[Tuple[str, str]]:
+            return ref._checker(val)
+        return check
 
     def from_raw(self, raw: RawScalar) -> Optional[ScalarValue]:
         return self.ref_type.from_raw(raw)
@@ -536,6 +739,7 @@ class LeafrefType(LinkType):
         if ref is None:
             raise InvalidLeafrefPath(tnode.qual_name)
         self.ref_type = ref.type
+        super()._post_process(tnode)
 
     def _type_digest(self, config: bool) -> Dict[str, Any]:
         res = super()._type_digest(config)
@@ -546,6 +750,8 @@ class LeafrefType(LinkType):
 class InstanceIdentifierType(LinkType):
     """Class representing YANG "instance-identifier" type."""
 
+    _value_classes = (InstanceRoute,)
+
     def __str__(self):
         return "instance-identifier"
 
@@ -570,6 +776,8 @@ class InstanceIdentifierType(LinkType):
 class IdentityrefType(DataType):
     """Class representing YANG "identityref" type."""
 
+    _value_classes = (tuple,)
+
     def __init__(self, sctx: SchemaContext, name: YangIdentifier):
         """Initialize the class instance."""
         super().__init__(sctx, name)
@@ -582,16 +790,18 @@ class IdentityrefType(DataType):
             return None
         return (i2, i1) if s else (i1, self.sctx.default_ns)
 
-    def __contains__(self, val: QualName) -> bool:
+    def _check(self, val: QualName) -> Optional[Tuple[str, str]]:
         for b in self.bases:
             if not self.sctx.schema_data.is_derived_from(val, b):
-                self._set_error_info(error_message=f"not derived from {b[1]}:{b[0]}")
-                return False
-        return True
+                return self._error_info(
+                    error_message=f"not derived from {b[1]}:{b[0]}")
 
     def to_raw(self, val: QualName) -> str:
         return self.canonical_string(val)
 
+    def _lexical_mask(self) -> int:
+        return 1
+
     def from_yang(self, text: str) -> Optional[QualName]:
         """Override the superclass method."""
         try:
@@ -625,17 +835,41 @@ class NumericType(DataType):
         super().__init__(sctx, name)
         self.range = None  # type: Optional[Intervals]
 
-    def __contains__(self, val: Union[int, decimal.Decimal]) -> bool:
+    def _check(self, val: Union[int, decimal.Decimal]
+               ) -> Optional[Tuple[str, str]]:
         if self.range is None:
-            if self._range[0] <= val <= self._range[1]:
-                return True
-            else:
-                self._set_error_info()
-                return False
-        if val in self.range:
-            return True
-        self._set_error_info(self.range.error_tag, self.range.error_message)
-        return False
+            if not self._range[0] <= val <= self._range[1]:
+                return self._error_info()
+        elif val not in self.range:
+            return self._error_info(self.range.error_tag,
+                                    self.range.error_message)
+
+    def _range_bounds(self) -> Tuple[List[Number], List[Number],
+                                     Tuple[str, str]]:
+        """Return bounds of range intervals and the error descriptor."""
+        if self.range is None:
+            return ([self._range[0]], [self._range[1]], self._error_info())
+        return self.range.bounds() + (self._error_info(
+            self.range.error_tag, self.range.error_message),)
+
+    def _compile_checker(self) -> Callable[
+            [Number], Optional[Tuple[str, str]]]:
+        vclass = self._value_classes[0]
+        excl = self._excluded_classes
+        err = self._error_info()
+        lows, highs, rerr = self._range_bounds()
+
+        def check(val: Number) -> Optional[Tuple[str, str]]:
+            if val.__class__ is not vclass and (
+                    not isinstance(val, vclass) or isinstance(val, excl)):
+                return err
+            i = bisect_right(lows, val)
+            if i == 0 or val > highs[i - 1]:
+                return rerr
+        return check
+
+    def _lexical_mask(self) -> int:
+        return 0
 
     def _handle_restrictions(self, stmt: Statement, sctx: SchemaContext) -> None:
         rstmt = stmt.find1("range")
@@ -653,16 +887,92 @@ class NumericType(DataType):
         return res
 
 
+class ScaledDecimal(int):
+    """Decimal64 value represented by a scaled integer.
+
+    The integer is the value multiplied by 10 to the power of the
+    number of fraction digits. The number of fraction digits is a
+    class attribute: a subclass is created for each of its values, see
+    :meth:`scaled_class`. Values with the same number of fraction
+    digits are thus compared as integers, whereas conversions to
+    :class:`float`, :class:`str` and :class:`decimal.Decimal` take
+    the scale into account. In particular, instances never compare
+    equal to decimal numbers, which have to be converted first.
+    """
+
+    __slots__ = ()
+
+    fraction_digits = 0  # type: int
+    """Number of fraction digits."""
+
+    _scale = 1  # type: int
+
+    _classes = {}  # type: Dict[int, type]
+
+    @classmethod
+    def scaled_class(cls, fraction_digits: int) -> type:
+        """Return the subclass for a number of fraction digits."""
+        res = cls._classes.get(fraction_digits)
+        if res is None:
+            res = cls._classes.setdefault(fraction_digits, type(
+                cls.__name__, (cls,),
+                {"__slots__": (), "fraction_digits": fraction_digits,
+                 "_scale": 10 ** fraction_digits}))
+        return res
+
+    @classmethod
+    def _restore(cls, fraction_digits: int, scaled: int) -> "ScaledDecimal":
+        return cls.scaled_class(fraction_digits)(scaled)
+
+    def __reduce__(self) -> Tuple[Callable, Tuple[int, int]]:
+        """Pickle the receiver with the number of fraction digits."""
+        return (ScaledDecimal._restore, (self.fraction_digits, int(self)))
+
+    def __float__(self) -> float:
+        """Return the receiver's value as a floating-point number."""
+        return self / self._scale
+
+    def __str__(self) -> str:
+        """Return the canonical string of the receiver's value."""
+        fd = self.fraction_digits
+        digits = str(abs(self)).rjust(fd + 1, "0")
+        return (("-" if self < 0 else "") + digits[:-fd] + "." +
+                (digits[-fd:].rstrip("0") or "0"))
+
+    def __repr__(self) -> str:
+        """Return a representation of the receiver."""
+        return f"{self.__class__.__name__}('{self.to_decimal()}')"
+
+    def to_decimal(self) -> decimal.Decimal:
+        """Return the receiver's value as a decimal number."""
+        return decimal.Decimal(int(self)).scaleb(-self.fraction_digits)
+
+
 class Decimal64Type(NumericType):
     """Class representing YANG "decimal64" type."""
 
+    _value_classes = (decimal.Decimal,)
+    _raw_classes = (str, numbers.Real)
+
+    _limit = 10 ** 28
+    """Bound of scaled integers that are parsed without decimals.
+
+    Larger values are parsed via :class:`decimal.Decimal`, which
+    rejects them in the default context.
+    """
+
     def __init__(self, sctx: SchemaContext, name: YangIdentifier):
         """Initialize the class instance."""
         super().__init__(sctx, name)
         self._epsilon = decimal.Decimal(0)  # type: decimal.Decimal
+        self._scale = None  # type: Optional[int]
+        """Scale of integer values, or ``None`` if they are decimals."""
 
     @property
-    def _range(self) -> List[decimal.Decimal]:
+    def _range(self) -> List[Number]:
+        if self._scale is not None:
+            vclass = self._value_classes[0]
+            return [vclass(-9223372036854775808), vclass(9223372036854775807)]
         quot = decimal.Decimal(10**self.fraction_digits)
         lim = decimal.Decimal(9223372036854775808)
         return [-lim / quot, (lim - 1) / quot]
@@ -671,9 +981,33 @@ class Decimal64Type(NumericType):
         self.fraction_digits = int(
             stmt.find1("fraction-digits", required=True).argument)
         self._epsilon = decimal.Decimal(10) ** -self.fraction_digits
+        if sctx.schema_data.scaled_decimal:
+            self._scale = 10 ** self.fraction_digits
+            self._scales = [10 ** (self.fraction_digits - i)
+                            for i in range(self.fraction_digits + 1)]
+            self._value_classes = (
+                ScaledDecimal.scaled_class(self.fraction_digits),)
+            self._raw_classes = (str, numbers.Real, decimal.Decimal)
         super()._handle_properties(stmt, sctx)
 
-    def from_raw(self, raw: RawScalar) -> Optional[decimal.Decimal]:
+    def from_raw(self, raw: RawScalar) -> Optional[Number]:
+        if self._scale is not None:
+            if raw.__class__ is str:
+                ipart, sep, fpart = raw.partition(".")
+                flen = len(fpart)
+                if flen <= self.fraction_digits and (
+                        fpart.isdecimal() or not sep):
+                    try:
+                        res = int(ipart + fpart) * self._scales[flen]
+                    except ValueError:
+                        res = self._limit
+                    if -self._limit < res < self._limit:
+                        return self._value_classes[0](res)
+            elif raw.__class__ is int:
+                res = raw * self._scale
+                if -self._limit < res < self._limit:
+                    return self._value_classes[0](res)
+            return self._scaled_from_decimal(raw)
         if not isinstance(raw, (str, numbers.Real)):
             return None
         try:
@@ -681,20 +1015,38 @@ class Decimal64Type(NumericType):
         except decimal.InvalidOperation:
             return None
 
-    def to_raw(self, val: decimal.Decimal) -> str:
+    def _scaled_from_decimal(self, raw: RawScalar) -> Optional[ScaledDecimal]:
+        """Return a scaled integer for a raw value parsed as a decimal.
+
+        Plain decimal strings and integers are converted directly by
+        :meth:`from_raw`, other raw values are handled here with the
+        same result as in the default representation. Decimal numbers
+        are also accepted.
+        """
+        if not isinstance(raw, (str, numbers.Real, decimal.Decimal)):
+            return None
+        try:
+            res = decimal.Decimal(raw).quantize(self._epsilon)
+        except decimal.InvalidOperation:
+            return None
+        return self._value_classes[0](res.scaleb(self.fraction_digits)) if (
+            res.is_finite()) else None
+
+    def to_raw(self, val: Number) -> str:
         return self.canonical_string(val)
 
-    def canonical_string(self, val: decimal.Decimal) -> Optional[str]:
+    def canonical_string(self, val: Number) -> Optional[str]:
+        if isinstance(val, ScaledDecimal):
+            return str(val)
         if val == 0:
             return "0.0"
         sval = str(val.quantize(self._epsilon)).rstrip("0")
         return (sval + "0") if sval.endswith(".") else sval
 
-    def __contains__(self, val: decimal.Decimal) -> bool:
-        if not isinstance(val, decimal.Decimal):
-            self._set_error_info()
-            return False
-        return super().__contains__(val)
+    def _check(self, val: Number) -> Optional[Tuple[str, str]]:
+        if not isinstance(val, self._value_classes[0]):
+            return self._error_info()
+        return super()._check(val)
 
     def _type_digest(self, config: bool) -> Dict[str, Any]:
         res = super()._type_digest(config)
@@ -705,11 +1057,14 @@ class Decimal64Type(NumericType):
 class IntegralType(NumericType):
     """Abstract class for integral data types."""
 
-    def __contains__(self, val: int) -> bool:
-        if not isinstance(val, int) or isinstance(val, bool):
-            self._set_error_info()
-            return False
-        return super().__contains__(val)
+    _value_classes = (int,)
+    _raw_classes = (int,)
+    _excluded_classes = (bool, ScaledDecimal)
+
+    def _check(self, val: int) -> Optional[Tuple[str, str]]:
+        if not isinstance(val, int) or isinstance(val, self._excluded_classes):
+            return self._error_info()
+        return super()._check(val)
 
     def parse_value(self, text: str) -> Optional[int]:
         """Override superclass method."""
@@ -760,6 +1115,7 @@ class Int64Type(IntegralType):
     """Class representing YANG "int64" type."""
 
     _range = [-9223372036854775808, 9223372036854775807]
+    _raw_classes = (str, int)
 
     def from_raw(self, raw: RawScalar) -> Optional[int]:
         """Override superclass method.
@@ -799,6 +1155,7 @@ class Uint64Type(IntegralType):
     """Class representing YANG "uint64" type."""
 
     _range = [0, 18446744073709551615]
+    _raw_classes = (str, int)
 
     def from_raw(self, raw: RawScalar) -> Optional[int]:
         """Override superclass method.
@@ -823,48 +1180,152 @@ class UnionType(DataType):
         """Initialize the class instance."""
         super().__init__(sctx, name)
         self.types = []  # type: List[DataType]
+        self._reset_dispatch()
 
     def to_raw(self, val: ScalarValue) -> RawScalar:
-        for t in self.types:
-            if val in t:
+        for t in self._value_members(val):
+            if t._checker(val) is None:
                 return t.to_raw(val)
 
     def canonical_string(self, val: ScalarValue) -> Optional[str]:
-        for t in self.types:
-            if val in t:
+        for t in self._value_members(val):
+            if t._checker(val) is None:
                 return t.canonical_string(val)
         return None
 
     def parse_value(self, text: str) -> Optional[ScalarValue]:
-        for t in self.types:
+        for t in self._text_members(text):
             val = t.parse_value(text)
-            if val is not None and val in t:
+            if val is not None and t._checker(val) is None:
                 return val
         return None
 
     def from_raw(self, raw: RawScalar) -> Optional[ScalarValue]:
-        for t in self.types:
+        for t in self._raw_members(raw):
             val = t.from_raw(raw)
-            if val is not None and val in t:
+            if val is not None and t._checker(val) is None:
                 return val
         return None
 
-    def __contains__(self, val: Any) -> bool:
+    @property
+    def _value_classes(self) -> Optional[Tuple[type, ...]]:
+        res = ()
+        for t in self.types:
+            if t._value_classes is None:
+                return None
+            res += t._value_classes
+        return res
+
+    @property
+    def _raw_classes(self) -> Optional[Tuple[type, ...]]:
+        res = ()
+        for t in self.types:
+            if t._raw_classes is None:
+                return None
+            res += t._raw_classes
+        return res
+
+    def _lexical_mask(self) -> int:
+        res = 0
+        for t in self.types:
+            res |= t._lexical_mask()
+        return res
+
+    @staticmethod
+    def _lexical_key(text: str) -> int:
+        """Return lexical features of a string as a bit mask.
+
+        The features are presence of a colon (bit 0) and a slash (bit 1).
+        """
+        return (":" in text) | ("/" in text) << 1
+
+    def _reset_dispatch(self) -> None:
+        """Clear dispatch tables of member types.
+
+        The tables map a dispatch key to a tuple of member types that
+        may succeed for values with that key. They are filled lazily,
+        and every tuple preserves the order of member types, so that
+        the first member type that succeeds always wins.
+        """
+        self._value_table = {}  # type: Dict[type, Tuple[DataType, ...]]
+        self._raw_table = {}  # type: Dict[Any, Tuple[DataType, ...]]
+        self._text_table = {}  # type: Dict[int, Tuple[DataType, ...]]
+
+    def _value_members(self, val: ScalarValue) -> Tuple[DataType, ...]:
+        """Return member types that may contain a cooked value."""
+        vclass = val.__class__
+        res = self._value_table.get(vclass)
+        if res is None:
+            res = self._value_table.setdefault(vclass, tuple(
+                [t for t in self.types if t._value_classes is None or
+                 issubclass(vclass, t._value_classes) and
+                 not issubclass(vclass, t._excluded_classes)]))
+        return res
+
+    def _raw_members(self, raw: RawScalar) -> Tuple[DataType, ...]:
+        """Return member types that may accept a raw value.
+
+        Raw strings are dispatched also on their lexical features.
+        """
+        rclass = raw.__class__
+        key = self._lexical_key(raw) if rclass is str else rclass
+        res = self._raw_table.get(key)
+        if res is None:
+            res = self._raw_table.setdefault(key, tuple(
+                [t for t in self.types
+                 if (t._raw_classes is None or
+                     issubclass(rclass, t._raw_classes)) and
+                 (rclass is not str or key & ~t._lexical_mask() == 0)]))
+        return res
+
+    def _text_members(self, text: str) -> Tuple[DataType, ...]:
+        """Return member types that may parse a textual value."""
+        key = self._lexical_key(text)
+        res = self._text_table.get(key)
+        if res is None:
+            res = self._text_table.setdefault(key, tuple(
+                [t for t in self.types if key & ~t._lexical_mask() == 0]))
+        return res
+
+    def _check(self, val: Any) -> Optional[Tuple[str, str]]:
         for t in self.types:
             try:
-                if val in t:
-                    return True
+                if t._check(val) is None:
+                    return None
             except TypeError:
                 continue
-        return False
+        return self._error_info()
+
+    def _compile_checker(self) -> Callable[
+            [ScalarValue], Optional[Tuple[str, str]]]:
+        """Override the superclass method.
+
+        Only member types whose values may be instances of the class
+        of the checked value are tried, in the order of their definition.
+        """
+        err = self._error_info()
+        members = self._value_members
+
+        def check(val: ScalarValue) -> Optional[Tuple[str, str]]:
+            for t in members(val):
+                try:
+                    if t._checker(val) is None:
+                        return None
+                except TypeError:
+                    continue
+            return err
+        return check
 
     def _handle_properties(self, stmt: Statement, sctx: SchemaContext) -> None:
         self.types = [self._resolve_type(ts, sctx)
                       for ts in stmt.find_all("type")]
+        self._reset_dispatch()
 
     def _post_process(self, tnode: "TerminalNode") -> None:
         for t in self.types:
             t._post_process(tnode)
+        self._reset_dispatch()
+        super()._post_process(tnode)
 
 
 DataType.dtypes = {"binary": BinaryType,
@@ -42,6 +42,21 @@ class ValidationScope(Enum):
     """Both syntax and semantics."""
 
 
+class ChangeType(Enum):
+    """Enumeration of instance changes."""
+
+    create = "create"
+    """New instance."""
+    delete = "delete"
+    """Removed instance."""
+    replace = "replace"
+    """Instance with a different value."""
+
+    def __str__(self) -> str:
+        """Return string representation of the change type."""
+        return self.value
+
+
 class DefaultDeny(Enum):
     """Enumeration of NACM default deny values."""
 
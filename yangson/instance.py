@@ -20,38 +20,52 @@
 This module implements the following classes:
 
 * LinkedList: Persistent linked list of instance values.
+* ArraySlice: Persistent linked list backed by a part of an array.
 * InstanceNode: Abstract class for instance nodes.
 * RootNode: Root of the data tree.
 * ObjectMember: Instance node that is an object member.
 * ArrayEntry: Instance node that is an array entry.
+* EditTransaction: Batch of edits applied to a data tree at once.
+* TransientRoot: Data tree temporarily open for in-place changes.
+* InstanceChange: Change of an instance between two data trees.
+* InstanceDiff: List of changes between two data trees.
 * InstanceRoute: Route into an instance value.
 * ResourceIdParser: Parser for RESTCONF resource identifiers.
 * InstanceIdParser: Parser for instance identifiers.
 """
 
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import json
-from typing import Dict, List, Optional, Tuple, Union
-from urllib.parse import unquote
-from .enumerations import ContentType, ValidationScope
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import quote, unquote
+import warnings
+from .enumerations import ChangeType, ContentType, ValidationScope
 from .exceptions import (BadSchemaNodeType, EndOfInput, InstanceException,
                          InstanceValueError, InvalidKeyValue,
                          NonexistentInstance, NonDataNode,
-                         NonexistentSchemaNode, UnexpectedInput)
+                         NonexistentSchemaNode, UnexpectedInput,
+                         ValidationError, YangsonException)
 from .instvalue import (ArrayValue, InstanceKey, ObjectValue, Value,
-                        ScalarValue, StructuredValue)
+                        ScalarValue, StructuredValue, new_revision,
+                        revision_etag, revision_time)
 from .parser import Parser
-from .typealiases import (InstanceName, JSONPointer, QualName, RawValue,
-                          SchemaRoute, _Singleton, YangIdentifier)
+from .typealiases import (DataPath, InstanceName, JSONPointer, QualName,
+                          RawObject, RawValue, SchemaRoute, _Singleton,
+                          YangIdentifier)
 
 __all__ = ["InstanceNode", "RootNode", "ObjectMember", "ArrayEntry",
-           "InstanceIdParser", "ResourceIdParser", "InstanceRoute",
-           "InstanceException", "InstanceValueError", "NonexistentInstance"]
+           "EditTransaction", "TransientRoot", "InstanceChange",
+           "InstanceDiff", "InstanceIdParser",
+           "ResourceIdParser", "InstanceRoute", "InstanceException", "InstanceValueError", "NonexistentInstance"]
 
 
 class LinkedList:
     """Persistent linked list of instance values."""
 
+    __slots__ = ("head", "tail")
+
     @classmethod
     def from_list(cls, vals: List[Value] = [], reverse: bool = False) -> "LinkedList":
         """Create an instance from a standard list.
@@ -102,10 +116,25 @@ class LinkedList:
         """
         return (self.head, self.tail)
 
+    def to_list(self) -> List[Value]:
+        """Return receiver's entries as a standard list."""
+        res = []
+        cdr = self
+        while cdr:
+            cdr = cdr._unload(res)
+        return res
+
+    def _unload(self, res: List[Value]) -> "LinkedList":
+        """Append receiver's head to `res` and return the rest."""
+        res.append(self.head)
+        return self.tail
+
 
 class EmptyList(LinkedList, metaclass=_Singleton):
     """Singleton class representing the empty linked list."""
 
+    __slots__ = ()
+
     def __init__(self):
         pass
 
@@ -119,29 +148,93 @@ class EmptyList(LinkedList, metaclass=_Singleton):
         raise IndexError
 
 
+class ArraySlice(LinkedList):
+    """Persistent linked list backed by a part of an array.
+
+    The entries are taken from the array either forward, from `start`
+    to the end of the array, or backward, from `start` down to the
+    first entry. No entries are copied, so that the receiver can be
+    created in constant time.
+    """
+
+    __slots__ = ("array", "start", "backward")
+
+    def __init__(self, array: ArrayValue, start: int, backward: bool = False):
+        """Initialize the class instance.
+
+        Args:
+            array: Underlying array.
+            start: Index of the head entry.
+            backward: Flag to be set if entries are taken backward.
+        """
+        self.array = array
+        self.start = start
+        self.backward = backward
+
+    @property
+    def head(self) -> Value:
+        """Head of the linked list."""
+        return self.array[self.start]
+
+    @property
+    def tail(self) -> LinkedList:
+        """Tail of the linked list."""
+        return ArraySlice(self.array, self.start + (-1 if self.backward else 1),
+                          self.backward)
+
+    def __bool__(self):
+        """Return receiver's boolean value."""
+        return 0 <= self.start < len(self.array)
+
+    def pop(self) -> Tuple[Value, LinkedList]:
+        """Override the superclass method."""
+        if not self:
+            raise IndexError
+        return (self.head, self.tail)
+
+    def _unload(self, res: List[Value]) -> LinkedList:
+        if self.backward:
+            res.extend(self.array[self.start::-1])
+        else:
+            res.extend(self.array[self.start:])
+        return EmptyList()
+
+
 class InstanceNode:
     """YANG data node instance implemented as a zipper structure."""
-    _key: InstanceKey
+
+    __slots__ = ("_key", "parinst", "schema_node", "revision", "value",
+                 "_changed", "_path", "_json_pointer")
 
     def __init__(self, key: InstanceKey, value: Value,
                  parinst: Optional["InstanceNode"],
-                 schema_node: "DataNode", timestamp: datetime):
+                 schema_node: "DataNode", revision: int,
+                 changed: bool = True):
         """Initialize the class instance."""
         self._key = key
         self.parinst = parinst         # type: Optional["InstanceNode"]
         """Parent instance node, or ``None`` for the root node."""
         self.schema_node = schema_node  # type: DataNode
         """Data node corresponding to the instance node."""
-        self.timestamp = timestamp     # type: datetime
-        """Time of the receiver's last modification."""
+        self.revision = revision       # type: int
+        """Revision of the receiver's last modification."""
         self.value = value             # type: Value
         """Value of the receiver."""
+        self._changed = changed
+        """Flag indicating that the parent's value has to be rebuilt."""
+        self._path = None  # type: Optional[Tuple[InstanceKey]]
+        self._json_pointer = None  # type: Optional[JSONPointer]
 
     @property
     def name(self) -> InstanceName:
         """Name of the receiver."""
         return self._key
 
+    @property
+    def timestamp(self) -> datetime:
+        """Date and time of the receiver's last modification."""
+        return revision_time(self.revision)
+
     @property
     def namespace(self) -> Optional[YangIdentifier]:
         """The receiver's namespace."""
@@ -149,13 +242,15 @@ class InstanceNode:
 
     @property
     def path(self) -> Tuple[InstanceKey]:
-        """Return the list of keys on the path from root to the receiver."""
-        res = []
-        inst: InstanceNode = self
-        while inst.parinst:
-            res.insert(0, inst._key)
-            inst = inst.parinst
-        return tuple(res)
+        """Return the tuple of keys on the path from root to the receiver.
+
+        The tuple is computed from the parent's path on first access and
+        then cached.
+        """
+        if self._path is None:
+            self._path = (self.parinst.path + (self._key,) if self.parinst
+                          else ())
+        return self._path
 
     def __str__(self) -> str:
         """Return string representation of the receiver's value."""
@@ -163,9 +258,18 @@ class InstanceNode:
         return (str(self.value) if isinstance(self.value, StructuredValue) else
                 sn.type.canonical_string(self.value))
 
+    def etag(self) -> str:
+        """Return entity tag of the receiver's subtree.
+
+        The entity tag changes whenever the subtree is modified.
+        """
+        return revision_etag(self.revision)
+
     def json_pointer(self) -> JSONPointer:
         """Return JSON Pointer [RFC6901]_ of the receiver."""
-        return "/" + "/".join(str(c) for c in self.path)
+        if self._json_pointer is None:
+            self._json_pointer = "/" + "/".join([str(c) for c in self.path])
+        return self._json_pointer
 
     def __getitem__(self, key: InstanceKey) -> "InstanceNode":
         """Return member or entry with the given key.
@@ -252,16 +356,25 @@ class InstanceNode:
         except (KeyError, IndexError, TypeError):
             raise NonexistentInstance(self.json_pointer(),
                                       f"item '{key}'") from None
+        if isinstance(newval, ArrayValue):
+            newval._index = self._index_after_delete(key)
         return self._copy(newval)
 
     def up(self) -> "InstanceNode":
         """Return an instance node corresponding to the receiver's parent.
 
+        If neither the receiver nor its siblings were changed, the
+        original parent instance node is returned.
+
         Raises:
             NonexistentInstance: If there is no parent.
         """
-        ts = max(self.timestamp, self.parinst.timestamp)
-        return self.parinst._copy(self._zip(), ts)
+        if not self._changed:
+            return self.parinst
+        rev = max(self.revision, self.parinst.revision)
+        val = self._zip()
+        val.revision = rev
+        return self.parinst._copy(val, rev)
 
     def top(self) -> "InstanceNode":
         """Return an instance node corresponding to the root of the data tree."""
@@ -321,19 +434,50 @@ class InstanceNode:
         return val
 
     def validate(self, scope: ValidationScope = ValidationScope.all,
-                 ctype: ContentType = ContentType.config) -> None:
+                 ctype: ContentType = ContentType.config,
+                 collect: bool = False, max_errors: int = None,
+                 cache: "ValidationCache" = None,
+                 profile: "ValidationProfile" = None
+                 ) -> Optional[List[ValidationError]]:
         """Validate the receiver's value.
 
+        If `collect` is true, validation continues after an error.
+        Checks of a node whose own schema or type check failed are
+        skipped, but its siblings and the rest of the data tree are
+        validated.
+
         Args:
             scope: Scope of the validation (syntax, semantics or all).
             ctype: Receiver's content type.
+            collect: Collect all errors instead of raising the first one.
+            max_errors: Maximum number of errors to collect (no limit
+                if it is ``None``).
+            cache: Cache of validated instances. Validation of an
+                instance found in the cache is skipped.
+            profile: Profile for recording the validation time.
+
+        Returns:
+            ``None`` if `collect` is false, otherwise the list of
+            collected errors (empty if the value is valid).
 
         Raises:
             SchemaError: If the value doesn't conform to the schema.
             SemanticError: If the value violates a semantic constraint.
             YangTypeError: If the value is a scalar of incorrect type.
         """
-        self.schema_node._validate(self, scope, ctype)
+        vctx = ValidationContext(collect, max_errors, cache, profile)
+        validate = (self.schema_node._validate if profile is None
+                    else profile._validate)
+        try:
+            try:
+                validate(self, scope, ctype, vctx)
+            except ValidationError as e:
+                vctx.add_error(e)
+        except _ErrorLimitReached:
+            pass
+        finally:
+            vctx.commit()
+        return vctx.errors
 
     def add_defaults(self, ctype: ContentType = None) -> "InstanceNode":
         """Return the receiver with defaults added recursively to its value.
@@ -366,22 +510,107 @@ class InstanceNode:
 
     def raw_value(self) -> RawValue:
         """Return receiver's value in a raw form (ready for JSON encoding)."""
-        if isinstance(self.value, ObjectValue):
-            return {m: self._member(m).raw_value() for m in self.value}
-        if isinstance(self.value, ArrayValue):
-            return [en.raw_value() for en in self]
-        return self.schema_node.type.to_raw(self.value)
+        return self.schema_node.to_raw(self.value)
+
+    def diff(self, other: "InstanceNode") -> "InstanceDiff":
+        """Return changes that transform receiver's value into `other`'s.
+
+        Subtrees shared by both values are skipped without inspecting
+        them, entries of lists and leaf-lists are matched by keys or
+        values, respectively. Metadata annotations are ignored.
+
+        Args:
+            other: Instance node of the same schema node as the receiver.
+
+        Raises:
+            InstanceValueError: If `other` belongs to a different schema
+                node.
+        """
+        if other.schema_node is not self.schema_node:
+            raise InstanceValueError(self.json_pointer(),
+                                     "diff of different schema nodes")
+        res = InstanceDiff()
+        res._compare(self.value, other.value, self.schema_node, (), "")
+        return res
+
+    def walk(self, data_path: DataPath = None, ctype: ContentType = None
+             ) -> Iterator[Tuple[Tuple[InstanceKey], "DataNode", Value]]:
+        """Iterate over the receiver's subtree without creating instance nodes.
+
+        The receiver and its descendant instances are visited in document
+        order. List and leaf-list instances are represented by their
+        entries, metadata annotations are skipped.
+
+        Args:
+            data_path: Only visit instances of this data node or its
+                descendants.
+            ctype: Only visit instances of this content type.
+
+        Returns:
+            Iterator of tuples containing path (see :attr:`path`), schema
+            node and value of each instance.
+        """
+        sn = self.schema_node
+        return _walk(self.path, sn, self.value, data_path,
+                     None if isinstance(sn, SchemaTreeNode)
+                     else sn.data_path(), ctype, False)
+
+    def iter_leaves(self, data_path: DataPath = None,
+                    ctype: ContentType = None
+                    ) -> Iterator[Tuple[Tuple[InstanceKey], "DataNode", Value]]:
+        """Iterate over leaf and leaf-list instances in the receiver's subtree.
+
+        This method is the same as :meth:`walk` except that only
+        instances of terminal nodes are visited.
+        """
+        sn = self.schema_node
+        return _walk(self.path, sn, self.value, data_path,
+                     None if isinstance(sn, SchemaTreeNode)
+                     else sn.data_path(), ctype, True)
+
+    def memory_report(self, depth: int = 1,
+                      seen: Dict[int, int] = None) -> RawObject:
+        """Report memory consumed by the receiver's value.
+
+        The value is traversed once, and every object is counted only
+        once even if it is shared by several parts of the data tree.
+        The report is a dictionary with the following items:
+
+        * ``bytes``: deep size of the value in bytes,
+        * ``objects``: number of objects,
+        * ``logical-bytes``: size that the value would have without
+          structure sharing,
+        * ``sharing``: ratio of bytes saved by structure sharing,
+        * ``members``: reports of the value's members (down to `depth`
+          levels of objects),
+        * ``lists``: totals for all lists and leaf-lists in the value,
+          keyed by data path (only at the top level of the report).
+
+        Args:
+            depth: Number of object levels with per-member reports.
+            seen: Dictionary of objects that were already counted. The
+                same dictionary may be passed to reports on several
+                versions of a data tree, so that the values they share
+                are counted only in the first report. The versions have
+                to be kept alive in the meantime.
+        """
+        mc = _MemoryCounter(seen)
+        res = mc.report(self.value, self.schema_node, depth)
+        res["lists"] = {dp: _MemoryCounter.add_sharing(rec)
+                        for dp, rec in mc.lists.items()}
+        return res
 
     def _member_names(self) -> List[InstanceName]:
         if isinstance(self.value, ObjectValue):
             return [m for m in self.value if not m.startswith("@")]
 
     def _member(self, name: InstanceName) -> "ObjectMember":
-        sibs = self.value.copy()
         try:
+            val = self.value[name]
             return ObjectMember(
-                name, sibs, sibs.pop(name), self,
-                self._member_schema_node(name), self.value.timestamp)
+                name, None, val, self, self._member_schema_node(name),
+                val.revision if isinstance(val, StructuredValue)
+                else self.value.revision, False)
         except KeyError:
             raise NonexistentInstance(self.json_pointer(),
                                       f"member '{name}'") from None
@@ -390,13 +619,24 @@ class InstanceNode:
         val = self.value
         try:
             i = len(val) + index if index < 0 else index
-            return ArrayEntry(i, LinkedList.from_list(val[:i], reverse=True),
-                              LinkedList.from_list(val[i + 1:]),
-                              val[index], self, self.schema_node,
-                              val.timestamp)
+            en = val[index]
+            return ArrayEntry(i, ArraySlice(val, i - 1, backward=True),
+                              ArraySlice(val, i + 1), en, self,
+                              self.schema_node,
+                              en.revision if isinstance(en, StructuredValue)
+                              else val.revision, val._unique_index(), False)
         except (IndexError, TypeError):
             raise NonexistentInstance(self.json_pointer(), "entry " + str(index)) from None
 
+    def _index_after_delete(self, index: int) -> Optional[Dict]:
+        """Return key index of receiver's array with entry `index` deleted."""
+        idx = self.value._unique_index()
+        if idx is None or not isinstance(self.schema_node, SequenceNode):
+            return None
+        i = len(self.value) + index if index < 0 else index
+        res = {k: p - 1 if p > i else p for k, p in idx.items() if p != i}
+        return res
+
     def _peek_schema_route(self, sroute: SchemaRoute) -> Value:
         irt = InstanceRoute()
         sn = self.schema_node
@@ -483,9 +723,16 @@ class InstanceNode:
 class RootNode(InstanceNode):
     """This class represents the root of the instance tree."""
 
+    __slots__ = ()
+
     def __init__(self, value: Value, schema_node: "DataNode",
-                 timestamp: datetime):
-        super().__init__("/", value, None, schema_node, timestamp)
+                 revision: int):
+        if isinstance(revision, datetime):
+            warnings.warn("timestamp argument is deprecated, pass a "
+                          "revision instead", DeprecationWarning, 2)
+            revision = (value.revision if isinstance(value, StructuredValue)
+                        else new_revision())
+        super().__init__("/", value, None, schema_node, revision)
 
     def up(self) -> None:
         """Override the superclass method.
@@ -495,9 +742,97 @@ class RootNode(InstanceNode):
         """
         raise NonexistentInstance(self.json_pointer(), "up of top")
 
-    def _copy(self, newval: Value, newts: datetime = None) -> InstanceNode:
+    def validate(self, scope: ValidationScope = ValidationScope.all,
+                 ctype: ContentType = ContentType.config,
+                 collect: bool = False, max_errors: int = None,
+                 cache: "ValidationCache" = None,
+                 profile: "ValidationProfile" = None,
+                 workers: int = None) -> Optional[List[ValidationError]]:
+        """Extend the superclass method.
+
+        If `workers` is greater than one, the data tree is split into
+        shards – top-level members, members of containers that contain
+        large lists, and slices of large lists – that are validated
+        concurrently in a pool of worker processes. Every worker holds
+        a copy of the data model and of the whole data tree, so that
+        XPath expressions and leafrefs are evaluated in full context.
+        Checks that span several shards, such as schema patterns of the
+        containers and list key uniqueness, **unique** and cardinality
+        constraints of sliced lists, are performed in a final pass that
+        also merges the results of the shards in document order. Errors
+        are thus reported in the same order as by the sequential
+        validation, and if `collect` is false, shards that haven't
+        started yet are cancelled as soon as an error is found.
+        The `cache` and `profile` are not used in this case.
+
+        Args:
+            workers: Number of worker processes.
+
+        Raises:
+            ValueError: If the receiver's schema doesn't belong to a
+                data model.
+        """
+        if not workers or workers < 2:
+            return super().validate(scope, ctype, collect, max_errors, cache,
+                                    profile)
+        dm = self.schema_node.data_model
+        if dm is None:
+            raise ValueError("schema without data model")
+        vctx = ValidationContext(True, max_errors if collect else 1)
+        shards = _split_shard(self, workers, vctx, True)
+        with ProcessPoolExecutor(
+                workers, initializer=_init_shard_worker,
+                initargs=(dm, self.value)) as pool:
+            futs = [pool.submit(_validate_shard, sh, scope, ctype,
+                                max_errors if collect else 1)
+                    for sh in shards]
+            pending = {}
+            for sh, fut in zip(shards, futs):
+                pending.setdefault(sh[0], []).append(fut)
+
+            def merge(path: Tuple[InstanceKey, ...]) -> None:
+                for fut in pending.pop(path, ()):
+                    errs, counts = fut.result()
+                    for sn, cnt in counts:
+                        vctx.val_counts[dm.get_data_node(sn)] += cnt
+                    for cls, epath, tag, message in errs:
+                        vctx.add_error(cls(epath, tag, message))
+
+            vctx.merge = merge
+            try:
+                try:
+                    self.schema_node._validate(self, scope, ctype, vctx)
+                except ValidationError as e:
+                    vctx.add_error(e)
+                for path in list(pending):
+                    merge(path)
+            except _ErrorLimitReached:
+                for fut in futs:
+                    fut.cancel()
+            finally:
+                vctx.commit()
+        if collect:
+            return vctx.errors
+        if vctx.errors:
+            raise vctx.errors[0]
+
+    def edit(self) -> "EditTransaction":
+        """Start a batch of edits of the receiver's data tree.
+
+        The returned transaction can be used as a context manager.
+        """
+        return EditTransaction(self)
+
+    def transient(self) -> "TransientRoot":
+        """Return a transient version of the receiver's data tree.
+
+        The receiver and its value are not changed.
+        """
+        return TransientRoot(self)
+
+    def _copy(self, newval: Value, newrev: int = None) -> InstanceNode:
         return RootNode(
-            newval, self.schema_node, newts if newts else newval.timestamp)
+            newval, self.schema_node, newrev if newrev else newval.revision)
 
     def _ancestors_or_self(
             self, qname: Union[QualName, bool] = None) -> List["RootNode"]:
@@ -513,12 +848,26 @@ class RootNode(InstanceNode):
 class ObjectMember(InstanceNode):
     """This class represents an object member."""
 
-    def __init__(self, key: InstanceName, siblings: Dict[InstanceName, Value],
+    __slots__ = ("_siblings",)
+
+    def __init__(self, key: InstanceName,
+                 siblings: Optional[Dict[InstanceName, Value]],
                  value: Value, parinst: Optional[InstanceNode],
-                 schema_node: "DataNode", timestamp: datetime):
-        super().__init__(key, value, parinst, schema_node, timestamp)
-        self.siblings = siblings  # type: Dict[InstanceName, Value]
+                 schema_node: "DataNode", revision: int,
+                 changed: bool = True):
+        super().__init__(key, value, parinst, schema_node, revision, changed)
+        self._siblings = siblings
+        """Sibling members, or ``None`` if they are yet to be extracted from
+        the parent's value."""
+
+    @property
+    def siblings(self) -> Dict[InstanceName, Value]:
         """Sibling members within the parent object."""
+        if self._siblings is None:
+            sibs = self.parinst.value.copy()
+            del sibs[self._key]
+            self._siblings = sibs
+        return self._siblings
 
     @property
     def qual_name(self) -> QualName:
@@ -538,12 +887,14 @@ class ObjectMember(InstanceNode):
             NonexistentInstance: If sibling member `name` doesn't exist.
         """
         ssn = self.parinst._member_schema_node(name)
+        if not self._changed:
+            return self.parinst._member(name)
         try:
             sibs = self.siblings.copy()
             newval = sibs.pop(name)
             sibs[self.name] = self.value
-            return ObjectMember(name, sibs, newval, self.parinst,
-                                ssn, self.timestamp)
+            return ObjectMember(name, sibs, newval, self.parinst, ssn,
+                                self.revision)
         except KeyError:
             raise NonexistentInstance(self.json_pointer(),
                                       f"member '{name}'") from None
@@ -558,39 +909,31 @@ class ObjectMember(InstanceNode):
             InstanceValueError: If the receiver's value is not a YANG list.
             NonexistentInstance: If no entry with matching keys exists.
         """
-        if not isinstance(self.schema_node, ListNode):
+        if not (isinstance(self.schema_node, ListNode) and
+                isinstance(self.value, ArrayValue)):
             raise InstanceValueError(self.json_pointer(), "lookup on non-list")
-        try:
-            for i in range(len(self.value)):
-                en = self.value[i]
-                flag = True
-                for k in keys:
-                    if en[k] != keys[k]:
-                        flag = False
-                        break
-                if flag:
-                    return self._entry(i)
+        i = self.schema_node._entry_position(self.value, keys)
+        if i is None:
             raise NonexistentInstance(self.json_pointer(), "entry lookup failed")
-        except KeyError:
-            raise NonexistentInstance(self.json_pointer(), "entry lookup failed") from None
-        except TypeError:
-            raise InstanceValueError(self.json_pointer(), "lookup on non-list") from None
+        return self._entry(i)
 
     def _zip(self) -> ObjectValue:
         """Zip the receiver into an object and return it."""
-        res = ObjectValue(self.siblings.copy(), self.timestamp)
+        res = (self.parinst.value if self._siblings is None
+               else self._siblings).copy()
         res[self.name] = self.value
+        res.revision = self.revision
         return res
 
-    def _copy(self, newval: Value, newts: datetime = None) -> "ObjectMember":
-        if newts:
-            ts = newts
+    def _copy(self, newval: Value, newrev: int = None) -> "ObjectMember":
+        if newrev:
+            rev = newrev
         elif isinstance(newval, StructuredValue):
-            ts = newval.timestamp
+            rev = newval.revision
         else:
-            ts = datetime.now()
-        return ObjectMember(self.name, self.siblings, newval, self.parinst,
-                            self.schema_node, ts)
+            rev = new_revision()
+        return ObjectMember(self.name, self._siblings, newval, self.parinst,
+                            self.schema_node, rev)
 
     def _ancestors_or_self(
             self, qname: Union[QualName, bool] = None) -> List[InstanceNode]:
@@ -607,14 +950,19 @@ class ObjectMember(InstanceNode):
 class ArrayEntry(InstanceNode):
     """This class represents an array entry."""
 
+    __slots__ = ("before", "after", "_index")
+
     def __init__(self, key: int, before: LinkedList, after: LinkedList,
                  value: Value, parinst: Optional[InstanceNode],
-                 schema_node: "DataNode", timestamp: datetime = None):
-        super().__init__(key, value, parinst, schema_node, timestamp)
+                 schema_node: "DataNode", revision: int = None,
+                 index: Dict = None, changed: bool = True):
+        super().__init__(key, value, parinst, schema_node, revision, changed)
         self.before = before  # type: LinkedList
         """Preceding entries of the parent array."""
         self.after = after  # type: LinkedList
         """Following entries of the parent array."""
+        self._index = index
+        """Key index of the parent array (covering all entries), or ``None``."""
 
     @property
     def index(self) -> int:
@@ -652,7 +1000,8 @@ class ArrayEntry(InstanceNode):
             raise NonexistentInstance(self.json_pointer(), "previous of first") from None
         return ArrayEntry(
             self.index - 1, nbef, self.after.cons(self.value), newval,
-            self.parinst, self.schema_node, self.timestamp)
+            self.parinst, self.schema_node, self.revision, self._index,
+            self._changed)
 
     def next(self) -> "ArrayEntry":
         """Return an instance node corresponding to the next entry.
@@ -666,7 +1015,8 @@ class ArrayEntry(InstanceNode):
             raise NonexistentInstance(self.json_pointer(), "next of last") from None
         return ArrayEntry(
             self.index + 1, self.before.cons(self.value), naft, newval,
-            self.parinst, self.schema_node, self.timestamp)
+            self.parinst, self.schema_node, self.revision, self._index,
+            self._changed)
 
     def insert_before(self, value: Union[RawValue, Value],
                       raw: bool = False) -> "ArrayEntry":
@@ -679,9 +1029,11 @@ class ArrayEntry(InstanceNode):
         Returns:
             An instance node of the new inserted entry.
         """
+        newval = self._cook_value(value, raw)
         return ArrayEntry(self.index, self.before, self.after.cons(self.value),
-                          self._cook_value(value, raw), self.parinst,
-                          self.schema_node, datetime.now())
+                          newval, self.parinst, self.schema_node,
+                          new_revision(), self._index_after_insert(
+                              self.index, newval))
 
     def insert_after(self, value: Union[RawValue, Value],
                      raw: bool = False) -> "ArrayEntry":
@@ -694,31 +1046,63 @@ class ArrayEntry(InstanceNode):
         Returns:
             An instance node of the newly inserted entry.
         """
-        return ArrayEntry(self.index, self.before.cons(self.value), self.after,
-                          self._cook_value(value, raw), self.parinst,
-                          self.schema_node, datetime.now())
+        newval = self._cook_value(value, raw)
+        return ArrayEntry(self.index + 1, self.before.cons(self.value),
+                          self.after, newval, self.parinst, self.schema_node,
+                          new_revision(), self._index_after_insert(
+                              self.index + 1, newval))
 
     def _cook_value(self, value: Union[RawValue, Value], raw: bool) -> Value:
         return super(SequenceNode, self.schema_node).from_raw(
             value, self.json_pointer()) if raw else value
 
+    def _index_after_insert(self, index: int,
+                            newval: Value) -> Optional[Dict]:
+        """Return key index of the parent array with `newval` inserted."""
+        if self._index is None:
+            return None
+        k = self.schema_node._entry_key(newval)
+        if k is None or k in self._index:
+            return None
+        res = {k: p + 1 if p >= index else p for k, p in self._index.items()}
+        res[k] = index
+        return res
+
+    def _index_after_update(self, newval: Value) -> Optional[Dict]:
+        """Return key index of the parent array with the receiver updated."""
+        if self._index is None:
+            return None
+        okey = self.schema_node._entry_key(self.value)
+        nkey = self.schema_node._entry_key(newval)
+        if nkey == okey:
+            return self._index
+        if nkey is None or nkey in self._index:
+            return None
+        res = self._index.copy()
+        del res[okey]
+        res[nkey] = self.index
+        return res
+
     def _zip(self) -> ArrayValue:
         """Zip the receiver into an array and return it."""
-        res = list(self.before)
+        res = self.before.to_list()
         res.reverse()
         res.append(self.value)
-        res.extend(list(self.after))
-        return ArrayValue(res, self.timestamp)
+        res.extend(self.after.to_list())
+        res = ArrayValue(res, self.revision)
+        res._index = self._index
+        return res
 
-    def _copy(self, newval: Value, newts: datetime = None) -> "ArrayEntry":
-        if newts:
-            ts = newts
+    def _copy(self, newval: Value, newrev: int = None) -> "ArrayEntry":
+        if newrev:
+            rev = newrev
         elif isinstance(newval, StructuredValue):
-            ts = newval.timestamp
+            rev = newval.revision
         else:
-            ts = datetime.now()
+            rev = new_revision()
         return ArrayEntry(self.index, self.before, self.after, newval,
-                          self.parinst, self.schema_node, ts)
+                          self.parinst, self.schema_node, rev,
+                          self._index_after_update(newval))
 
     def _ancestors_or_self(
             self, qname: Union[QualName, bool] = None) -> List[InstanceNode]:
@@ -760,9 +1144,883 @@ class ArrayEntry(InstanceNode):
         return [self.up().up()]
 
 
+def _walk(path: Tuple[InstanceKey], sn: "DataNode", value: Value,
+          data_path: Optional[DataPath], dpath: Optional[DataPath],
+          ctype: Optional[ContentType], leaves: bool
+          ) -> Iterator[Tuple[Tuple[InstanceKey], "DataNode", Value]]:
+    """Generate (path, schema node, value) tuples of a subtree in pre-order.
+
+    Args:
+        path: Path of the subtree root.
+        sn: Schema node of the subtree root.
+        value: Value of the subtree root.
+        data_path: Data path filter, or ``None``.
+        dpath: Data path of `sn`, or ``None`` for the schema root.
+        ctype: Content type filter, or ``None``.
+        leaves: Flag to be set if only terminal nodes are to be visited.
+    """
+    def inside(dp: Optional[DataPath]) -> Optional[bool]:
+        """Return ``None`` if `dp` is outside the data path filter."""
+        if dp is None:
+            return False
+        if dp == data_path or dp.startswith(data_path + "/"):
+            return True
+        return False if data_path.startswith(dp + "/") else None
+
+    children = {}
+    todo = [(path, sn, value, True if data_path is None else inside(dpath))]
+    if todo[0][3] is None:
+        return
+    while todo:
+        path, sn, value, ins = todo.pop()
+        if isinstance(value, ArrayValue) and isinstance(sn, SequenceNode):
+            todo.extend([(path + (i,), sn, value[i], ins)
+                         for i in range(len(value) - 1, -1, -1)])
+            continue
+        if ins and (not leaves or isinstance(sn, TerminalNode)):
+            yield (path, sn, value)
+        if not (isinstance(value, ObjectValue) and
+                isinstance(sn, InternalNode)):
+            continue
+        for m in reversed(list(value)):
+            if m.startswith("@"):
+                continue
+            try:
+                csn, cins = children[(sn, m)]
+            except KeyError:
+                csn = sn.get_data_child(*sn._iname2qname(m))
+                cins = (None if csn is None or ctype and not (
+                    csn.content_type().value & ctype.value) else
+                        True if data_path is None else inside(csn.data_path()))
+                children[(sn, m)] = (csn, cins)
+            if cins is not None:
+                todo.append((path + (m,), csn, value[m], ins or cins))
+
+
+class _MemoryCounter:
+    """Accumulator of sizes of cooked values."""
+
+    def __init__(self, seen: Optional[Dict[int, int]]):
+        self.seen = {} if seen is None else seen
+        """Logical sizes of already counted objects keyed by their ids."""
+        self.lists = {}  # type: Dict[DataPath, Dict[str, int]]
+        """Totals for lists and leaf-lists."""
+        self._children = {}  # type: Dict[Tuple, Optional[DataNode]]
+
+    @staticmethod
+    def add_sharing(rec: Dict[str, int]) -> RawObject:
+        """Add sharing ratio to a record with byte counts and return it."""
+        lb = rec["logical-bytes"]
+        rec["sharing"] = round(1 - rec["bytes"] / lb, 4) if lb else 0.0
+        return rec
+
+    def report(self, val: Value, sn: Optional["DataNode"],
+               depth: int) -> RawObject:
+        """Return memory report on `val`."""
+        members = {} if depth > 0 and isinstance(val, ObjectValue) else None
+        b, n, lb = self.count(val, sn, members, depth)
+        res = self.add_sharing(
+            {"bytes": b, "objects": n, "logical-bytes": lb})
+        if members is not None:
+            res["members"] = members
+        return res
+
+    def count(self, val: Value, sn: Optional["DataNode"],
+              members: Optional[Dict[InstanceName, RawObject]] = None,
+              depth: int = 0) -> Tuple[int, int, int]:
+        """Return bytes, number of objects and logical bytes of `val`.
+
+        If `members` is not ``None``, member reports are added to it.
+        """
+        if (isinstance(val, ArrayValue) and
+                isinstance(sn, SequenceNode)):
+            rec = self.lists.setdefault(sn.data_path(), {
+                "instances": 0, "entries": 0, "bytes": 0,
+                "logical-bytes": 0})
+            res = self._count(val, sn, members, depth)
+            rec["instances"] += 1
+            rec["entries"] += len(val)
+            rec["bytes"] += res[0]
+            rec["logical-bytes"] += res[2]
+            return res
+        return self._count(val, sn, members, depth)
+
+    def _count(self, val: Value, sn: Optional["DataNode"],
+               members: Optional[Dict[InstanceName, RawObject]],
+               depth: int) -> Tuple[int, int, int]:
+        vid = id(val)
+        if vid in self.seen:
+            return (0, 0, self.seen[vid])
+        b = sys.getsizeof(val)
+        n = 1
+        lb = b
+        if isinstance(val, StructuredValue):
+            for p in val._parts():
+                pb = self._scalar(p)
+                b += pb
+                n += 1 if pb else 0
+                lb += sys.getsizeof(p)
+        if isinstance(val, ObjectValue):
+            for m in val:
+                cb = self._scalar(m)
+                b += cb
+                n += 1 if cb else 0
+                lb += sys.getsizeof(m)
+                csn = self._child(sn, m)
+                if members is not None and not m.startswith("@"):
+                    rep = self.report(val[m], csn, depth - 1)
+                    members[m] = rep
+                    cb, cn, cl = (rep["bytes"], rep["objects"],
+                                  rep["logical-bytes"])
+                else:
+                    cb, cn, cl = self.count(val[m], csn)
+                b += cb
+                n += cn
+                lb += cl
+        elif isinstance(val, (list, tuple)):
+            esn = sn if isinstance(val, ArrayValue) and isinstance(
+                sn, SequenceNode) else None
+            for en in val:
+                cb, cn, cl = (self._count(en, esn, None, 0) if esn else
+                              self.count(en, None))
+                b += cb
+                n += cn
+                lb += cl
+        self.seen[vid] = lb
+        return (b, n, lb)
+
+    def _scalar(self, obj: object) -> int:
+        """Return size of `obj` if it hasn't been counted yet, else 0."""
+        oid = id(obj)
+        if oid in self.seen:
+            return 0
+        res = self.seen[oid] = sys.getsizeof(obj)
+        return res
+
+    def _child(self, sn: Optional["DataNode"],
+               name: InstanceName) -> Optional["DataNode"]:
+        """Return schema node of member `name`, or ``None``."""
+        if not isinstance(sn, InternalNode) or name.startswith("@"):
+            return None
+        try:
+            return self._children[(sn, name)]
+        except KeyError:
+            res = self._children[(sn, name)] = sn.get_data_child(
+                *sn._iname2qname(name))
+            return res
+
+
+_SHARD_SIZE = 100
+"""Minimum number of list entries in a shard."""
+
+
+_shard_root: Optional[RootNode] = None
+"""Data tree being validated in a worker process."""
+
+
+def _split_shard(inst: InstanceNode, workers: int, vctx: "ValidationContext",
+                 force: bool = False) -> Optional[List[tuple]]:
+    """Split an instance subtree into shards for parallel validation.
+
+    Args:
+        inst: Root of the subtree.
+        workers: Number of worker processes.
+        vctx: Validation context of the final pass, recording delegated
+            instances and sliced lists.
+        force: Flag to be set if the subtree has to be split even if it
+            contains no large list.
+
+    Returns:
+        List of shards, each consisting of an instance path and, for a
+        slice of a list, the start and stop index, or ``None`` if the
+        subtree is to be validated as a single shard.
+    """
+    val = inst.value
+    if isinstance(val, ArrayValue):
+        size = max(_SHARD_SIZE, -(-len(val) // (4 * workers)))
+        if (len(val) <= size or
+                not isinstance(inst.schema_node, SequenceNode)):
+            return None
+        vctx.sliced.add(inst.path)
+        return [(inst.path, i, min(i + size, len(val)))
+                for i in range(0, len(val), size)]
+    if not (isinstance(val, ObjectValue) and
+            isinstance(inst.schema_node, InternalNode)):
+        return None
+    subs = []
+    for m in val:
+        minst = inst._member(m)
+        subs.append((minst, _split_shard(minst, workers, vctx)))
+    if not force and all(sub is None for _, sub in subs):
+        return None
+    res = []
+    for minst, sub in subs:
+        if sub is None:
+            vctx.delegated.add(minst.path)
+            res.append((minst.path, None, None))
+        else:
+            res.extend(sub)
+    return res
+
+
+def _init_shard_worker(dm: "DataModel", value: ObjectValue) -> None:
+    """Initialize a worker process for parallel validation."""
+    global _shard_root
+    _shard_root = RootNode(value, dm.schema, value.revision)
+
+
+def _validate_shard(shard: tuple, scope: ValidationScope, ctype: ContentType,
+                    max_errors: Optional[int]) -> Tuple[list, list]:
+    """Validate a shard of the data tree in a worker process.
+
+    Returns:
+        Tuple of validation errors, each represented as a tuple of
+        exception class, path, tag and message, and validation counts
+        as pairs of data path and count.
+    """
+    path, start, stop = shard
+    inst = _shard_root
+    for k in path:
+        inst = inst[k]
+    vctx = ValidationContext(True, max_errors)
+    try:
+        if start is None:
+            insts = (inst,)
+        else:
+            insts = (inst[i] for i in range(start, stop))
+        for i in insts:
+            try:
+                i.schema_node._validate(i, scope, ctype, vctx)
+            except ValidationError as e:
+                vctx.add_error(e)
+    except _ErrorLimitReached:
+        pass
+    return ([(type(e), e.path, e.tag, e.message) for e in vctx.errors],
+            [(sn.data_path(), cnt) for sn, cnt in vctx.val_counts.items()])
+
+
+def _resolve_key(sel, val: StructuredValue, sn: "DataNode",
+                 jptr: JSONPointer) -> Tuple[InstanceKey, "DataNode"]:
+    """Return the key of an item addressed by a selector + its schema node.
+
+    Args:
+        sel: Selector from an instance route.
+        val: Value (object or array) containing the item.
+        sn: Schema node corresponding to `val`.
+        jptr: JSON Pointer of `val`.
+
+    Raises:
+        InstanceValueError: If `sel` is incompatible with `val`.
+        NonexistentInstance: If an array entry addressed by `sel` doesn't
+            exist.
+    """
+    key, csn = sel._key_step(val, sn)
+    if key is None:
+        raise NonexistentInstance(jptr or "/", f"entry '{sel!s}'")
+    if isinstance(val, ArrayValue):
+        if not isinstance(key, int):
+            raise InstanceValueError(jptr or "/", "member of array")
+        if key < 0:
+            key += len(val)
+        if not 0 <= key < len(val):
+            raise NonexistentInstance(jptr or "/", f"entry {key}")
+    elif isinstance(key, int):
+        raise InstanceValueError(jptr or "/", "entry of non-array")
+    return (key, csn)
+
+
+class _EditNode:
+    """Node of the tree of edits collected by a transaction."""
+
+    def __init__(self):
+        self.action = None  # type: Optional[str]
+        """Either ``"set"``, ``"delete"`` or ``None`` (no action)."""
+        self.value = None  # type: Union[RawValue, Value]
+        self.raw = False
+        self.children = {}  # type: Dict[object, Tuple[object, "_EditNode"]]
+        """Edits inside the node's value, indexed by instance keys.
+
+        Selectors that cannot be resolved when the edit is recorded are
+        indexed by their string representation (in a 1-tuple), and
+        the resulting error is raised by :meth:`EditTransaction.commit`.
+        """
+
+
+class EditTransaction:
+    """Batch of edits applied to a data tree at once.
+
+    Edits are grouped by common route prefixes, and applied in a single
+    traversal of the data tree, so that each structured value on the
+    routes is copied exactly once. Entry selectors are resolved against
+    the values before the edits of the parent instance are applied, so
+    that different selectors of the same instance share the same group.
+    """
+
+    def __init__(self, root: RootNode):
+        """Initialize the class instance.
+
+        Args:
+            root: Root node of the data tree to be edited.
+        """
+        self.root = root
+        """Root node of the original data tree."""
+        self.result = None  # type: Optional[RootNode]
+        """Root node of the edited data tree (set by :meth:`commit`)."""
+        self._edits = _EditNode()
+
+    def __enter__(self) -> "EditTransaction":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.commit()
+
+    def set(self, iroute: "InstanceRoute", value: Union[RawValue, Value],
+            raw: bool = False) -> None:
+        """Record the creation or replacement of an instance.
+
+        An object member is created if it doesn't exist, whereas a list
+        or leaf-list entry has to exist and is replaced. Edits recorded
+        earlier for descendants of the instance are discarded.
+
+        Args:
+            iroute: Route of the instance (relative to the root).
+            value: New value of the instance.
+            raw: Flag to be set if `value` is raw.
+        """
+        node = self._edit_node(iroute)
+        node.action = "set"
+        node.value = value
+        node.raw = raw
+        node.children = {}
+
+    def delete(self, iroute: "InstanceRoute") -> None:
+        """Record the deletion of an instance.
+
+        Args:
+            iroute: Route of the instance (relative to the root).
+
+        Raises:
+            InstanceValueError: If `iroute` addresses the root.
+        """
+        if not iroute:
+            raise InstanceValueError("/", "deletion of root")
+        node = self._edit_node(iroute)
+        node.action = "delete"
+        node.children = {}
+
+    def commit(self) -> RootNode:
+        """Apply all recorded edits.
+
+        Returns:
+            Root node of the edited data tree.
+
+        Raises:
+            InstanceValueError: If a route is incompatible with a value.
+            NonexistentInstance: If an edited instance or its parent
+                doesn't exist.
+            NonexistentSchemaNode: If a route isn't permitted by the schema.
+            NonDataNode: If a route addresses a non-data node.
+            RawTypeError: If a raw value is of incorrect type.
+        """
+        sn = self.root.schema_node
+        node = self._edits
+        if node.action == "set":
+            val = sn.from_raw(node.value, "") if node.raw else node.value
+        else:
+            val = self.root.value
+        if node.children:
+            val = self._apply(val, sn, node, "")
+        self.result = RootNode(val, sn, val.revision)
+        return self.result
+
+    def _edit_node(self, iroute: "InstanceRoute") -> _EditNode:
+        """Return the edit node for `iroute`, creating it if necessary."""
+        node = self._edits
+        val = self.root.value
+        sn = self.root.schema_node
+        jptr = ""
+        entry = False
+        for sel in iroute:
+            if sn is not None:
+                try:
+                    val = self._pending_value(node, val, sn, jptr, entry)
+                    key, sn = _resolve_key(sel, val, sn, jptr)
+                except YangsonException:
+                    sn = None
+            if sn is None:
+                # unresolvable selector - commit raises the error
+                node = node.children.setdefault(
+                    (str(sel),), (sel, _EditNode()))[1]
+                continue
+            entry = isinstance(val, ArrayValue)
+            jptr = f"{jptr}/{key}"
+            node = node.children.setdefault(key, (sel, _EditNode()))[1]
+            val = val[key] if entry or key in val else None
+        return node
+
+    @staticmethod
+    def _pending_value(node: _EditNode, val: Optional[Value],
+                       sn: "DataNode", jptr: JSONPointer,
+                       entry: bool) -> StructuredValue:
+        """Return the value in which the children of `node` are edited.
+
+        Args:
+            node: Edit node.
+            val: Original value of the instance, if any.
+            sn: Schema node of the instance.
+            jptr: JSON Pointer of the instance.
+            entry: Flag to be set if the instance is an array entry.
+        """
+        if node.action == "delete":
+            raise NonexistentInstance(jptr or "/", "deleted instance")
+        if node.action == "set":
+            if node.raw:
+                node.value = (sn.entry_from_raw(node.value, jptr) if entry
+                              else sn.from_raw(node.value, jptr))
+                node.raw = False
+            val = node.value
+        if not isinstance(val, StructuredValue):
+            raise InstanceValueError(jptr or "/", "scalar value")
+        return val
+
+    def _apply(self, val: Value, sn: "DataNode", node: _EditNode,
+               jptr: JSONPointer) -> StructuredValue:
+        """Return a copy of `val` with edits inside it applied."""
+        if not isinstance(val, StructuredValue):
+            raise InstanceValueError(jptr or "/", "scalar value")
+        array = isinstance(val, ArrayValue)
+        res = val.copy()
+        dels = []
+        for sel, cnode in node.children.values():
+            key, csn = _resolve_key(sel, val, sn, jptr)
+            cptr = f"{jptr}/{key}"
+            if cnode.action == "delete":
+                if key not in val and not array:
+                    raise NonexistentInstance(jptr or "/", f"item '{key}'")
+                if cnode.children:
+                    raise NonexistentInstance(cptr, "edit of deleted instance")
+                dels.append(key)
+                continue
+            if cnode.action == "set":
+                if not cnode.raw:
+                    cval = cnode.value
+                elif array:
+                    cval = csn.entry_from_raw(cnode.value, cptr)
+                else:
+                    cval = csn.from_raw(cnode.value, cptr)
+            else:
+                try:
+                    cval = val[key]
+                except KeyError:
+                    raise NonexistentInstance(
+                        jptr or "/", f"member '{key}'") from None
+            if cnode.children:
+                cval = self._apply(cval, csn, cnode, cptr)
+            res[key] = cval
+        for key in (sorted(set(dels), reverse=True) if array else dels):
+            del res[key]
+        return res
+
+
+class TransientRoot:
+    """Data tree temporarily open for in-place changes.
+
+    Structured values that the receiver creates are owned by it, and
+    changed in place by subsequent edits. Other values (those of the
+    original data tree and values passed to the edit methods) are copied
+    the first time they are changed, and the copies then become owned.
+    Method :meth:`persistent` ends the ownership without copying
+    anything.
+    """
+
+    def __init__(self, root: RootNode):
+        """Initialize the class instance.
+
+        Args:
+            root: Root node of the original data tree.
+        """
+        self.schema_node = root.schema_node  # type: DataNode
+        """Schema node of the data tree root."""
+        self.value = root.value  # type: StructuredValue
+        """Current value of the data tree."""
+        self._owner = object()  # type: Optional[object]
+        """Token marking values owned by the receiver."""
+
+    def peek(self, iroute: "InstanceRoute") -> Optional[Value]:
+        """Return a value inside the data tree.
+
+        The returned value must not be modified if it is structured.
+
+        Args:
+            iroute: Instance route (relative to the root).
+        """
+        return RootNode(self.value, self.schema_node, None).peek(iroute)
+
+    def set(self, iroute: "InstanceRoute", value: Union[RawValue, Value],
+            raw: bool = False) -> None:
+        """Create or replace an instance.
+
+        Args:
+            iroute: Route of the instance (relative to the root).
+            value: New value of the instance.
+            raw: Flag to be set if `value` is raw.
+
+        Raises:
+            InstanceValueError: If `iroute` is incompatible with a value,
+                or the receiver is no longer transient.
+            NonexistentInstance: If the parent instance doesn't exist.
+            NonexistentSchemaNode: If `iroute` isn't permitted by the schema.
+            RawTypeError: If `value` is raw and of incorrect type.
+        """
+        if not iroute:
+            self._check_owner()
+            self.value = (self.schema_node.from_raw(value, "") if raw
+                          else value)
+            return
+        vals, key, csn, jptr = self._parent_value(iroute)
+        pval = vals[-1]
+        if raw:
+            cptr = f"{jptr}/{key}"
+            value = (csn.entry_from_raw(value, cptr)
+                     if isinstance(pval, ArrayValue) else
+                     csn.from_raw(value, cptr))
+        pval[key] = value
+        self._modified(vals)
+
+    def append(self, iroute: "InstanceRoute", value: Union[RawValue, Value],
+               raw: bool = False) -> None:
+        """Append an entry to a list or leaf-list instance.
+
+        The list or leaf-list instance is created if it doesn't exist.
+
+        Args:
+            iroute: Route of the (leaf-)list instance (relative to the root).
+            value: Value of the new entry.
+            raw: Flag to be set if `value` is raw.
+
+        Raises:
+            InstanceValueError: If `iroute` is incompatible with a value,
+                doesn't address a (leaf-)list, or the receiver is no longer
+                transient.
+            NonexistentInstance: If the parent instance doesn't exist.
+            NonexistentSchemaNode: If `iroute` isn't permitted by the schema.
+            RawTypeError: If `value` is raw and of incorrect type.
+        """
+        if not iroute:
+            raise InstanceValueError("/", "entry of non-array")
+        vals, key, csn, jptr = self._parent_value(iroute)
+        pval = vals[-1]
+        if not isinstance(csn, SequenceNode) or isinstance(pval, ArrayValue):
+            raise InstanceValueError(f"{jptr}/{key}", "entry of non-array")
+        arr = pval.get(key)
+        if arr is None or arr._owner is not self._owner:
+            arr = ArrayValue() if arr is None else arr.copy()
+            arr._owner = self._owner
+            pval[key] = arr
+        if raw:
+            value = csn.entry_from_raw(value, f"{jptr}/{key}/{len(arr)}")
+        arr.append(value)
+        self._modified(vals)
+
+    def delete(self, iroute: "InstanceRoute") -> None:
+        """Delete an instance.
+
+        Args:
+            iroute: Route of the instance (relative to the root).
+
+        Raises:
+            InstanceValueError: If `iroute` is incompatible with a value,
+                addresses the root, or the receiver is no longer transient.
+            NonexistentInstance: If the instance doesn't exist.
+            NonexistentSchemaNode: If `iroute` isn't permitted by the schema.
+        """
+        if not iroute:
+            raise InstanceValueError("/", "deletion of root")
+        vals, key, csn, jptr = self._parent_value(iroute)
+        try:
+            del vals[-1][key]
+        except KeyError:
+            raise NonexistentInstance(jptr or "/", f"item '{key}'") from None
+        self._modified(vals)
+
+    def persistent(self) -> RootNode:
+        """Finish the changes and return the resulting data tree.
+
+        This takes constant time. The receiver cannot be used afterwards.
+
+        Raises:
+            InstanceValueError: If the receiver is no longer transient.
+        """
+        self._check_owner()
+        self._owner = None
+        return RootNode(self.value, self.schema_node, self.value.revision)
+
+    def _check_owner(self) -> None:
+        if self._owner is None:
+            raise InstanceValueError("/", "persistent tree")
+
+    def _owned(self, val: StructuredValue) -> StructuredValue:
+        """Return `val`, or its copy if it isn't owned by the receiver."""
+        if val._owner is self._owner:
+            return val
+        res = val.copy()
+        res._owner = self._owner
+        return res
+
+    @staticmethod
+    def _modified(vals: List[StructuredValue]) -> None:
+        """Record the change of values on a path, starting from the leaf.
+
+        Each value thus gets a higher revision than all its descendants.
+        """
+        for val in reversed(vals):
+            val._modified()
+
+    def _parent_value(self, iroute: "InstanceRoute") -> Tuple[
+            List[StructuredValue], InstanceKey, "DataNode", JSONPointer]:
+        """Prepare the parent of the instance addressed by `iroute`.
+
+        The caller is expected to pass the returned values to
+        :meth:`_modified` after changing the parent value.
+
+        Returns:
+            Tuple with the owned values from the root to the parent, the
+            instance key, schema node of the instance, and JSON Pointer of
+            the parent.
+        """
+        self._check_owner()
+        if not isinstance(self.value, StructuredValue):
+            raise InstanceValueError("/", "scalar value")
+        val = self.value = self._owned(self.value)
+        vals = [val]
+        sn = self.schema_node
+        jptr = ""
+        for sel in iroute[:-1]:
+            key, sn = _resolve_key(sel, val, sn, jptr)
+            try:
+                cval = val[key]
+            except KeyError:
+                raise NonexistentInstance(jptr or "/",
+                                          f"member '{key}'") from None
+            jptr = f"{jptr}/{key}"
+            if not isinstance(cval, StructuredValue):
+                raise InstanceValueError(jptr, "scalar value")
+            if cval._owner is not self._owner:
+                cval = self._owned(cval)
+                val[key] = cval
+            val = cval
+            vals.append(val)
+        key, csn = _resolve_key(iroute[-1], val, sn, jptr)
+        return (vals, key, csn, jptr)
+
+
+class InstanceChange:
+    """Change of an instance between two data trees."""
+
+    def __init__(self, kind: ChangeType, path: Tuple[InstanceKey],
+                 target: str, schema_node: "DataNode",
+                 old_value: Optional[Value], new_value: Optional[Value],
+                 point: Optional[str] = None):
+        """Initialize the class instance."""
+        self.kind = kind
+        """Type of the change."""
+        self.path = path
+        """Keys on the path to the instance (relative to the diff root)."""
+        self.target = target
+        """Resource identifier of the instance (relative to the diff root)."""
+        self.schema_node = schema_node
+        """Schema node of the instance."""
+        self.old_value = old_value
+        """Original value, or ``None`` for a created instance."""
+        self.new_value = new_value
+        """New value, or ``None`` for a deleted instance."""
+        self.point = point
+        """For an entry created in a user-ordered (leaf-)list, resource
+        identifier of the preceding entry, or empty string if the new
+        entry is the first one."""
+
+    def __str__(self) -> str:
+        """Return a string representation of the receiver."""
+        return f"{self.kind} {self.json_pointer()}"
+
+    def json_pointer(self) -> JSONPointer:
+        """Return JSON Pointer [RFC6901]_ of the instance."""
+        return "/" + "/".join([str(k).replace("~", "~0").replace("/", "~1")
+                               for k in self.path])
+
+    def raw_value(self) -> RawValue:
+        """Return the new value in a raw form."""
+        return (None if self.kind == ChangeType.delete else
+                self.schema_node.to_raw(self.new_value))
+
+
+class InstanceDiff(list):
+    """List of changes between two data trees.
+
+    The changes are ordered so that they can be applied one after another
+    to the original data tree. Array indices in paths of the changes
+    refer to the array as modified by the preceding changes.
+    """
+
+    _json_patch_ops = {ChangeType.create: "add", ChangeType.delete: "remove",
+                       ChangeType.replace: "replace"}
+
+    def json_patch(self) -> List[RawObject]:
+        """Return the receiver as a JSON Patch [RFC6902]_."""
+        res = []
+        for ch in self:
+            op = {"op": self._json_patch_ops[ch.kind],
+                  "path": ch.json_pointer()}
+            if ch.kind != ChangeType.delete:
+                op["value"] = ch.raw_value()
+            res.append(op)
+        return res
+
+    def yang_patch(self, patch_id: str) -> RawObject:
+        """Return the receiver as a YANG Patch [RFC8072]_.
+
+        Args:
+            patch_id: Identifier of the patch.
+        """
+        edits = []
+        for ch in self:
+            edit = {"edit-id": str(len(edits) + 1),
+                    "operation": str(ch.kind), "target": ch.target or "/"}
+            if ch.kind != ChangeType.delete:
+                sn = ch.schema_node
+                val = ch.raw_value()
+                if (isinstance(sn, SequenceNode) and
+                        not isinstance(ch.new_value, ArrayValue)):
+                    val = [val]
+                edit["value"] = {f"{sn.ns}:{sn.name}": val}
+            if ch.point is not None:
+                edit["operation"] = "insert"
+                if ch.point:
+                    edit["where"] = "after"
+                    edit["point"] = ch.point
+                else:
+                    edit["where"] = "first"
+            edits.append(edit)
+        return {"ietf-yang-patch:yang-patch": {
+            "patch-id": patch_id, "edit": edits}}
+
+    def _compare(self, old: Value, new: Value, sn: "DataNode",
+                 path: Tuple[InstanceKey], target: str) -> None:
+        """Append changes between two values of the same schema node."""
+        if old is new:
+            return
+        if (isinstance(old, ObjectValue) and isinstance(new, ObjectValue) and
+                isinstance(sn, InternalNode)):
+            for m in old:
+                if m.startswith("@"):
+                    continue
+                csn = sn.get_data_child(*sn._iname2qname(m))
+                if m in new:
+                    self._compare(old[m], new[m], csn, path + (m,),
+                                  f"{target}/{m}")
+                else:
+                    self.append(InstanceChange(
+                        ChangeType.delete, path + (m,), f"{target}/{m}",
+                        csn, old[m], None))
+            for m in new:
+                if m not in old and not m.startswith("@"):
+                    self.append(InstanceChange(
+                        ChangeType.create, path + (m,), f"{target}/{m}",
+                        sn.get_data_child(*sn._iname2qname(m)), None, new[m]))
+        elif (isinstance(old, ArrayValue) and isinstance(new, ArrayValue) and
+              isinstance(sn, SequenceNode)):
+            self._compare_arrays(old, new, sn, path, target)
+        elif old != new:
+            self.append(InstanceChange(
+                ChangeType.replace, path, target, sn, old, new))
+
+    def _compare_arrays(self, old: ArrayValue, new: ArrayValue,
+                        sn: "SequenceNode", path: Tuple[InstanceKey],
+                        target: str) -> None:
+        """Append changes between two arrays.
+
+        Both arrays are traversed in parallel. Entries shared by them are
+        skipped without computing their keys, and keys of the remaining
+        entries are looked up in the arrays' key indices, which are
+        usually cached.
+        """
+        olen = len(old)
+        nlen = len(new)
+        oidx = old.key_index(sn._entry_key)
+        nidx = new.key_index(sn._entry_key)
+        dels = []
+        adds = []
+        common = []
+        merged = len(oidx) == olen and len(nidx) == nlen
+        i = j = 0
+        okey = nkey = None
+        while merged and i < olen and j < nlen:
+            if old[i] is new[j]:
+                i += 1
+                j += 1
+                okey = nkey = None
+                continue
+            if okey is None:
+                okey = sn._entry_key(old[i])
+            if nkey is None:
+                nkey = sn._entry_key(new[j])
+            if okey == nkey:
+                common.append((i, j))
+                i += 1
+                j += 1
+                okey = nkey = None
+            elif nkey not in oidx:
+                adds.append(j)
+                j += 1
+                nkey = None
+            elif okey not in nidx:
+                dels.append(i)
+                i += 1
+                okey = None
+            else:
+                merged = False
+        if not merged:
+            if old != new:
+                self.append(InstanceChange(
+                    ChangeType.replace, path, target, sn, old, new))
+            return
+        dels.extend(range(i, olen))
+        adds.extend(range(j, nlen))
+        for i in reversed(dels):
+            self.append(InstanceChange(
+                ChangeType.delete, path + (i,),
+                self._entry_target(sn, target, old[i]), sn, old[i], None))
+        for j in adds:
+            point = None
+            if sn.user_ordered:
+                point = (self._entry_target(sn, target, new[j - 1])
+                         if j > 0 else "")
+            self.append(InstanceChange(
+                ChangeType.create, path + (j,),
+                self._entry_target(sn, target, new[j]), sn, None, new[j],
+                point))
+        for i, j in common:
+            self._compare(old[i], new[j], sn, path + (j,),
+                          self._entry_target(sn, target, new[j]))
+
+    @staticmethod
+    def _entry_target(sn: "SequenceNode", target: str,
+                      entry: Value) -> str:
+        """Return resource identifier of a (leaf-)list entry."""
+        if isinstance(sn, ListNode):
+            vals = [sn.get_data_child(*k).type.canonical_string(entry[m])
+                    for k, m in zip(sn.keys, sn._key_members)]
+        else:
+            vals = [sn.type.canonical_string(entry)]
+        return target + "=" + ",".join([quote(v, safe="") for v in vals])
+
+
 class InstanceRoute(list):
     """This class represents a route into an instance value."""
 
+    __slots__ = ()
+
     def __str__(self) -> str:
         """Return a string representation of the receiver."""
         return "".join([str(c) for c in self])
@@ -775,6 +2033,8 @@ class InstanceRoute(list):
 class MemberName:
     """Selectors of object members."""
 
+    __slots__ = ("name", "namespace")
+
     def __init__(self, name: YangIdentifier, ns: Optional[YangIdentifier]):
         """Initialize the class instance.
 
@@ -818,10 +2078,26 @@ class MemberName:
         """
         return inst[self.iname()]
 
+    def _key_step(self, val: ObjectValue,
+                  sn: "DataNode") -> Tuple[InstanceName, "DataNode"]:
+        """Return member name addressed by the receiver + its schema node.
+
+        Args:
+            val: Current value (object).
+            sn:  Current schema node.
+        """
+        cn = sn.get_data_child(self.name, self.namespace)
+        if cn is None:
+            raise NonexistentSchemaNode(sn.qual_name, self.name,
+                                        self.namespace)
+        return (cn.iname(), cn)
+
 
 class ActionName(MemberName):
     """Name of an action (can appear in RESTCONF resource IDs)."""
 
+    __slots__ = ()
+
     def peek_step(self, val: ObjectValue,
                   sn: "DataNode") -> Tuple[None, "DataNode"]:
         """Fail because there is no action instance."""
@@ -832,10 +2108,16 @@ class ActionName(MemberName):
         """Raise an exception because there is no action instance."""
         raise NonDataNode(inst.json_pointer(), "action " + self.iname())
 
+    def _key_step(self, val: ObjectValue, sn: "DataNode") -> None:
+        """Raise an exception because there is no action instance."""
+        raise NonDataNode(sn.data_path(), "action " + self.iname())
+
 
 class EntryIndex:
     """Numeric selectors for a list or leaf-list entry."""
 
+    __slots__ = ("index",)
+
     def __init__(self, index: int):
         """Initialize the class instance.
 
@@ -872,10 +2154,22 @@ class EntryIndex:
         """
         return inst[self.index]
 
+    def _key_step(self, val: ArrayValue,
+                  sn: "DataNode") -> Tuple[int, "DataNode"]:
+        """Return entry index addressed by the receiver + its schema node.
+
+        Args:
+            val: Current value (array).
+            sn:  Current schema node.
+        """
+        return (self.index, sn)
+
 
 class EntryValue:
     """Value-based selectors of an array entry."""
 
+    __slots__ = ("value",)
+
     def __init__(self, value: str):
         """Initialize the class instance.
 
@@ -906,10 +2200,8 @@ class EntryValue:
             val: Current value (array).
             sn:  Current schema node.
         """
-        try:
-            return (val[val.index(self.parse_value(sn))], sn)
-        except ValueError:
-            return None, sn
+        i = sn._entry_position(val, self.parse_value(sn))
+        return (None, sn) if i is None else (val[i], sn)
 
     def goto_step(self, inst: InstanceNode) -> InstanceNode:
         """Return member instance of `inst` addressed by the receiver.
@@ -917,17 +2209,29 @@ class EntryValue:
         Args:
             inst: Current instance.
         """
-        try:
-            return inst._entry(
-                inst.value.index(self.parse_value(inst.schema_node)))
-        except ValueError:
+        sn = inst.schema_node
+        i = sn._entry_position(inst.value, self.parse_value(sn))
+        if i is None:
             raise NonexistentInstance(inst.json_pointer(),
-                                      f"entry '{self.value!s}'") from None
+                                      f"entry '{self.value!s}'")
+        return inst._entry(i)
+
+    def _key_step(self, val: ArrayValue,
+                  sn: "DataNode") -> Tuple[Optional[int], "DataNode"]:
+        """Return entry index addressed by the receiver + its schema node.
+
+        Args:
+            val: Current value (array).
+            sn:  Current schema node.
+        """
+        return (sn._entry_position(val, self.parse_value(sn)), sn)
 
 
 class EntryKeys:
     """Key-based selectors for a list entry."""
 
+    __slots__ = ("keys",)
+
     def __init__(
             self, keys: Dict[Tuple[YangIdentifier, Optional[YangIdentifier]], str]):
         """Initialize the class instance.
@@ -973,19 +2277,8 @@ class EntryKeys:
             val: Current value (array).
             sn:  Current schema node.
         """
-        keys = self.parse_keys(sn)
-        for en in val:
-            flag = True
-            try:
-                for k in keys:
-                    if en[k] != keys[k]:
-                        flag = False
-                        break
-            except KeyError:
-                continue
-            if flag:
-                return (en, sn)
-        return (None, sn)
+        i = sn._entry_position(val, self.parse_keys(sn))
+        return (None, sn) if i is None else (val[i], sn)
 
     def goto_step(self, inst: InstanceNode) -> InstanceNode:
         """Return member instance of `inst` addressed by the receiver.
@@ -995,6 +2288,16 @@ class EntryKeys:
         """
         return inst.look_up(**self.parse_keys(inst.schema_node))
 
+    def _key_step(self, val: ArrayValue,
+                  sn: "DataNode") -> Tuple[Optional[int], "DataNode"]:
+        """Return entry index addressed by the receiver + its schema node.
+
+        Args:
+            val: Current value (array).
+            sn:  Current schema node.
+        """
+        return (sn._entry_position(val, self.parse_keys(sn)), sn)
+
 
 class ResourceIdParser(Parser):
     """Parser for RESTCONF resource identifiers."""
@@ -1120,4 +2423,6 @@ class InstanceIdParser(Parser):
 
 from .schemanode import (AnydataNode, CaseNode, ChoiceNode, DataNode,       # NOQA
                          InternalNode, LeafNode, LeafListNode, ListNode,
-                         RpcActionNode, SequenceNode, TerminalNode)
+                         RpcActionNode, SchemaTreeNode, SequenceNode,
+                         TerminalNode, ValidationCache, ValidationContext,
+                         ValidationProfile, _ErrorLimitReached)
@@ -22,10 +22,19 @@ This module implements the following classes:
 * StructuredValue: Abstract class for structured values of instance nodes.
 * ArrayValue: Cooked array value of an instance node.
 * ObjectValue: Cooked object value of an instance node.
+* PersistentObjectValue: Cooked object value with structure sharing.
 """
 
+from bisect import bisect_right
+from collections.abc import ItemsView, KeysView, ValuesView
 from datetime import datetime
-from typing import Dict, List, Union
+from itertools import count
+import math
+from threading import Lock
+import time
+import warnings
+from typing import (Any, Callable, Dict, Hashable, Iterator, List, Optional,
+                    Tuple, Union)
 from .typealiases import InstanceName, PrefName, ScalarValue
 
 # Type aliases
@@ -42,24 +51,144 @@ MetadataObject = Dict[PrefName, ScalarValue]
 """Metadata object [RFC 7952]_."""
 
 
+_revisions = count(1)
+"""Source of revision numbers."""
+
+_CLOCK_RESOLUTION = 1.0
+"""Maximum age (in seconds) of the newest clock sample at a new revision."""
+
+_CLOCK_SIZE = 4096
+"""Number of clock samples above which the older ones are thinned out."""
+
+_clock = [(0, time.time())]  # type: List[Tuple[int, float]]
+"""Samples of wall-clock time as pairs of revision and POSIX time."""
+
+_clock_lock = Lock()
+
+_epoch = format(int(time.time() * 1e6), "x")
+"""Process-specific prefix of entity tags."""
+
+
+def new_revision() -> int:
+    """Return a new revision number.
+
+    Revision numbers are unique and increase monotonically within the
+    Python process. Wall-clock time is sampled for the new revision if
+    the newest sample is older than ``_CLOCK_RESOLUTION`` (one second).
+    """
+    rev = next(_revisions)
+    now = time.time()
+    if now - _clock[-1][1] >= _CLOCK_RESOLUTION:
+        _sample_clock(rev, now)
+    return rev
+
+
+def _sample_clock(rev: int, now: float) -> None:
+    """Record a clock sample, thinning out the old ones if necessary."""
+    global _clock
+    with _clock_lock:
+        last = _clock[-1]
+        if rev <= last[0]:
+            return
+        _clock.append((rev, max(now, last[1])))
+        if len(_clock) > _CLOCK_SIZE:
+            half = _CLOCK_SIZE // 2
+            _clock = _clock[:half:2] + _clock[half:]
+
+
+def revision_time(rev: int) -> datetime:
+    """Return the date and time of a revision.
+
+    The result is the time of the newest clock sample taken at or before
+    the revision. It is therefore less than ``_CLOCK_RESOLUTION`` (one
+    second) earlier than the actual time of the revision, except for
+    old revisions whose samples may have been thinned out. Results
+    never decrease with increasing revisions, and the function doesn't
+    read the clock.
+
+    Args:
+        rev: Revision number.
+    """
+    clock = _clock
+    return datetime.fromtimestamp(
+        clock[bisect_right(clock, (rev, math.inf)) - 1][1])
+
+
+def revision_etag(rev: int) -> str:
+    """Return an entity tag corresponding to a revision.
+
+    Entity tags are unique also across different Python processes.
+
+    Args:
+        rev: Revision number.
+    """
+    return f"{_epoch}-{rev:x}"
+
+
 class StructuredValue:
-    """Abstract class for array and object values."""
+    """Abstract class for array and object values.
 
-    def __init__(self, ts: datetime):
+    Instance attributes are declared in slots of the concrete subclasses
+    because the built-in base classes do not allow non-empty slots in
+    this mix-in class.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, rev: int = None, ts: datetime = None):
         """Initialize class instance.
 
         Args:
-        :param ts: creation timestamp
+            rev: Revision number (a new one is used if it is ``None``).
+            ts: Deprecated, explicit timestamp of the value. A datetime
+                passed as the first argument is treated in the same way.
+        """
+        if isinstance(rev, datetime):
+            rev, ts = None, rev
+        if ts is not None:
+            warnings.warn("argument 'ts' is deprecated, timestamps are "
+                          "derived from revisions", DeprecationWarning, 3)
+        self.revision = rev if rev else new_revision()
+        """Revision of the last modification."""
+        self._ts = ts  # type: Optional[datetime]
+        """Timestamp set explicitly (deprecated), or ``None``."""
+        self._owner = None  # type: Optional[object]
+        """Owner of a value that may be changed in place, or ``None``."""
+        self._hash = None  # type: Optional[int]
+        """Cached hash value."""
+
+    def __getstate__(self) -> Tuple[None, Dict[str, object]]:
+        res = {a: getattr(self, a) for c in self.__class__.__mro__
+               for a in c.__dict__.get("__slots__", ())}
+        res["_hash"] = None  # string hashes differ between processes
+        return (None, res)
+
+    @property
+    def timestamp(self) -> datetime:
+        """Date and time of the last modification."""
+        return self._ts if self._ts else revision_time(self.revision)
+
+    @timestamp.setter
+    def timestamp(self, ts: datetime) -> None:
+        """Set the timestamp explicitly (deprecated).
+
+        The timestamp is reset by the next change of the receiver.
         """
-        self.timestamp = ts if ts else datetime.now()
+        warnings.warn("setting the timestamp is deprecated, timestamps are "
+                      "derived from revisions", DeprecationWarning, 2)
+        self._ts = ts
 
     def copy(self) -> "StructuredValue":
         """Return a shallow copy of the receiver."""
-        return self.__class__(super().copy(), datetime.now())
+        return self.__class__(super().copy())
 
     def __setitem__(self, key: InstanceKey, value: Value) -> None:
         super().__setitem__(key, value)
-        self.timestamp = datetime.now()
+        self._modified()
+
+    def __delitem__(self, key: InstanceKey) -> None:
+        super().__delitem__(key)
+        self._modified()
 
     def __eq__(self, val: "StructuredValue") -> bool:
         """Return ``True`` if the receiver equal to `val`.
@@ -67,34 +196,538 @@ class StructuredValue:
         Args:
         :param val: value to compare
         """
-        return self.__class__ == val.__class__ and hash(self) == hash(val)
+        if self is val:
+            return True
+        return (isinstance(val, StructuredValue) and
+                isinstance(self, ArrayValue) == isinstance(val, ArrayValue) and
+                hash(self) == hash(val))
+
+    def __ne__(self, val: "StructuredValue") -> bool:
+        """Return ``True`` if the receiver is not equal to `val`."""
+        return not self.__eq__(val)
 
     def __hash__(self) -> int:
         """Return hash value for the receiver."""
         raise NotImplementedError()
 
+    def _identical(self, val: Value) -> bool:
+        """Return ``True`` if `val` is structurally identical to the receiver.
+
+        Unlike :meth:`__eq__`, which compares only hash values, this
+        method compares all items and their classes, so it isn't
+        affected by hash collisions.
+
+        Args:
+            val: Value to compare.
+        """
+        if self is val:
+            return True
+        if self.__class__ is not val.__class__ or len(self) != len(val):
+            return False
+        if isinstance(self, ArrayValue):
+            pairs = zip(self, val)
+        else:
+            try:
+                pairs = [(self[k], val[k]) for k in self]
+            except KeyError:
+                return False
+        for x, y in pairs:
+            if isinstance(x, StructuredValue):
+                if not x._identical(y):
+                    return False
+            elif x.__class__ is not y.__class__ or x != y:
+                return False
+        return True
+
+    def _modified(self) -> None:
+        """Record that the receiver was changed in place."""
+        self.revision = new_revision()
+        self._hash = None
+        self._ts = None
+
+    def _parts(self) -> List[object]:
+        """Return auxiliary objects owned by the receiver (not its items)."""
+        return []
+
 
 class ArrayValue(StructuredValue, list):
     """This class represents cooked array values."""
 
-    def __init__(self, val: List[EntryValue] = [], ts: datetime = None):
-        StructuredValue.__init__(self, ts)
+    __slots__ = ("revision", "_owner", "_hash", "_ts", "_index")
+
+    def __init__(self, val: List[EntryValue] = [], rev: int = None,
+                 ts: datetime = None):
+        StructuredValue.__init__(self, rev, ts)
         list.__init__(self, val)
+        self._index = None  # type: Optional[Dict[Hashable, int]]
+        """Index of entry keys, or ``None`` if it hasn't been built yet."""
+
+    def append(self, value: EntryValue) -> None:
+        super().append(value)
+        self._modified()
+
+    def extend(self, values: List[EntryValue]) -> None:
+        super().extend(values)
+        self._modified()
+
+    def insert(self, index: int, value: EntryValue) -> None:
+        super().insert(index, value)
+        self._modified()
+
+    def pop(self, index: int = -1) -> EntryValue:
+        self._modified()
+        return super().pop(index)
+
+    def remove(self, value: EntryValue) -> None:
+        super().remove(value)
+        self._modified()
+
+    def clear(self) -> None:
+        super().clear()
+        self._modified()
+
+    def sort(self, *, key: Callable[[EntryValue], Any] = None,
+             reverse: bool = False) -> None:
+        super().sort(key=key, reverse=reverse)
+        self._modified()
+
+    def reverse(self) -> None:
+        super().reverse()
+        self._modified()
+
+    def __iadd__(self, values: List[EntryValue]) -> "ArrayValue":
+        super().__iadd__(values)
+        self._modified()
+        return self
+
+    def __imul__(self, n: int) -> "ArrayValue":
+        super().__imul__(n)
+        self._modified()
+        return self
 
     def __hash__(self) -> int:
-        """Return hash value for the receiver."""
-        return tuple([x.__hash__() for x in self]).__hash__()
+        """Return hash value for the receiver.
+
+        The hash value is computed from hash values of the entries, and
+        cached until the receiver is changed.
+        """
+        if self._hash is None:
+            self._hash = tuple([x.__hash__() for x in self]).__hash__()
+        return self._hash
+
+    def _modified(self) -> None:
+        """Extend the superclass method."""
+        super()._modified()
+        self._index = None
+
+    def key_index(self, key: Callable[[EntryValue], Optional[Hashable]]
+                  ) -> Dict[Hashable, int]:
+        """Return the index of receiver's entries.
+
+        The index maps entry keys to positions of the first entries
+        having them. It is built on first use and kept with the receiver
+        until the receiver is modified in place.
+
+        Args:
+            key: Function computing the key of an entry (or ``None`` if the
+                entry has no key).
+        """
+        if self._index is None:
+            res = {}
+            for i in range(len(self)):
+                k = key(self[i])
+                if k is not None:
+                    res.setdefault(k, i)
+            self._index = res
+        return self._index
+
+    def _parts(self) -> List[object]:
+        """Override the superclass method."""
+        return [] if self._index is None else [self._index]
+
+    def _unique_index(self) -> Optional[Dict[Hashable, int]]:
+        """Return receiver's index if it exists and covers all entries."""
+        idx = self._index
+        return idx if idx is not None and len(idx) == len(self) else None
 
 
 class ObjectValue(StructuredValue, dict):
     """This class represents cooked object values."""
 
+    __slots__ = ("revision", "_owner", "_hash", "_ts")
+
     def __init__(self, val: Dict[InstanceName, Value] = {},
-                 ts: datetime = None):
-        StructuredValue.__init__(self, ts)
+                 rev: int = None, ts: datetime = None):
+        StructuredValue.__init__(self, rev, ts)
         dict.__init__(self, val)
 
     def __hash__(self) -> int:
-        """Return hash value for the receiver."""
-        sks = sorted(self.keys())
-        return tuple([(k, self[k].__hash__()) for k in sks]).__hash__()
+        """Return hash value for the receiver.
+
+        The hash value is computed from names and hash values of the
+        members, and cached until the receiver is changed.
+        """
+        if self._hash is None:
+            sks = sorted(self.keys())
+            self._hash = tuple(
+                [(k, self[k].__hash__()) for k in sks]).__hash__()
+        return self._hash
+
+    def pop(self, key: InstanceName, *default: Value) -> Value:
+        self._modified()
+        return super().pop(key, *default)
+
+    def popitem(self) -> Tuple[InstanceName, Value]:
+        res = super().popitem()
+        self._modified()
+        return res
+
+    def setdefault(self, key: InstanceName, default: Value = None) -> Value:
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+    def update(self, *args, **kw) -> None:
+        super().update(*args, **kw)
+        self._modified()
+
+    def clear(self) -> None:
+        super().clear()
+        self._modified()
+
+    def __ior__(self, other: Dict[InstanceName, Value]) -> "ObjectValue":
+        self.update(other)
+        return self
+
+
+class PersistentObjectValue(ObjectValue):
+    """Cooked object value with structure sharing.
+
+    Members are stored in a hash array mapped trie rather than in the
+    underlying dictionary. Copying the receiver takes constant time, and
+    adding, replacing or deleting a member copies only O(log n) trie
+    nodes, the rest being shared with the original. As in standard
+    dictionaries, the members are kept in insertion order. Keys are
+    recorded in a linked chain (newest first) that is extended in
+    constant time by every added member and shared by copies. A
+    deletion invalidates the chain, and it is rebuilt from sequence
+    numbers of the trie leaves on the next iteration.
+
+    The underlying dictionary contains only a placeholder entry, so that
+    code inspecting it directly, such as the JSON encoder, does not
+    treat the receiver as empty and retrieves the members through
+    :meth:`items`.
+    """
+
+    __slots__ = ("_root", "_len", "_chain", "_order")
+
+    min_size = 64
+    """Minimum number of members for which this class is preferred."""
+
+    def __init__(self, val: Dict[InstanceName, Value] = {},
+                 rev: int = None, ts: datetime = None):
+        StructuredValue.__init__(self, rev, ts)
+        dict.__setitem__(self, _placeholder, None)
+        self._root = _HamtNode(0, ())  # type: _HamtNode
+        self._len = 0
+        self._chain = ()  # type: Optional[tuple]
+        """Pairs of key and the rest of the chain, or ``None`` if the
+        chain has to be rebuilt."""
+        self._order = ()  # type: Optional[Tuple[InstanceName, ...]]
+        """Keys in insertion order, or ``None`` if not known."""
+        for k in val:
+            self._set(k, val[k])
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self.items()), self.revision))
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[InstanceName]:
+        if self._order is None:
+            if self._chain is None:
+                keys = [lf[1] for lf in sorted(
+                    _hamt_leaves(self._root), key=lambda lf: lf[3])]
+                chain = ()
+                for k in keys:
+                    chain = (k, chain)
+                self._chain = chain
+            else:
+                keys = []
+                chain = self._chain
+                while chain:
+                    keys.append(chain[0])
+                    chain = chain[1]
+                keys.reverse()
+            self._order = tuple(keys)
+        return iter(self._order)
+
+    def __reversed__(self) -> Iterator[InstanceName]:
+        return reversed(tuple(self))
+
+    def __contains__(self, key: InstanceName) -> bool:
+        try:
+            _hamt_get(self._root, _hamt_hash(key), key)
+        except KeyError:
+            return False
+        return True
+
+    def __getitem__(self, key: InstanceName) -> Value:
+        return _hamt_get(self._root, _hamt_hash(key), key)
+
+    def __setitem__(self, key: InstanceName, value: Value) -> None:
+        self._set(key, value)
+        self._modified()
+
+    def __delitem__(self, key: InstanceName) -> None:
+        root = _hamt_delete(self._root, _hamt_hash(key), key, 0)
+        self._root = _HamtNode(0, ()) if root is None else root
+        self._len -= 1
+        self._chain = self._order = None
+        self._modified()
+
+    def get(self, key: InstanceName, default: Value = None) -> Value:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> KeysView:
+        return KeysView(self)
+
+    def values(self) -> ValuesView:
+        return ValuesView(self)
+
+    def items(self) -> ItemsView:
+        return ItemsView(self)
+
+    def pop(self, key: InstanceName, *default: Value) -> Value:
+        try:
+            res = self[key]
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+        del self[key]
+        return res
+
+    def setdefault(self, key: InstanceName, default: Value = None) -> Value:
+        try:
+            return self[key]
+        except KeyError:
+            self[key] = default
+            return default
+
+    def update(self, other: Dict[InstanceName, Value] = {}, **kw) -> None:
+        if hasattr(other, "keys"):
+            for k in other.keys():
+                self._set(k, other[k])
+        else:
+            for k, v in other:
+                self._set(k, v)
+        for k in kw:
+            self._set(k, kw[k])
+        self._modified()
+
+    def popitem(self) -> Tuple[InstanceName, Value]:
+        if not self._len:
+            raise KeyError("popitem(): dictionary is empty")
+        key = tuple(self)[-1] if self._chain is None else self._chain[0]
+        return (key, self.pop(key))
+
+    def clear(self) -> None:
+        self._root = _HamtNode(0, ())
+        self._len = 0
+        self._chain = self._order = ()
+        self._modified()
+
+    def _parts(self) -> List[object]:
+        """Override the superclass method."""
+        res = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            res.append(node)
+            res.append(node.items)
+            for it in node.items:
+                if isinstance(it, tuple):
+                    res.append(it)
+                else:
+                    stack.append(it)
+        chain = self._chain
+        while chain:
+            res.append(chain)
+            chain = chain[1]
+        return res
+
+    def copy(self) -> "PersistentObjectValue":
+        """Return a copy of the receiver sharing its structure."""
+        res = self.__class__()
+        res._root = self._root
+        res._len = self._len
+        res._chain = self._chain
+        res._order = self._order
+        return res
+
+    def _set(self, key: InstanceName, value: Value) -> None:
+        self._root, added = _hamt_set(
+            self._root, (_hamt_hash(key), key, value, next(_hamt_seq)), 0)
+        if added:
+            self._len += 1
+            if self._chain is not None:
+                self._chain = (key, self._chain)
+            self._order = None
+
+
+_placeholder = object()
+"""Key of the placeholder entry in dictionaries of persistent values."""
+
+_HamtLeaf = Tuple[int, InstanceName, Value, int]
+"""Trie leaf: hash of the key, key, value and insertion sequence number."""
+
+_hamt_seq = count()
+"""Generator of insertion sequence numbers of trie leaves."""
+
+
+class _HamtNode:
+    """Bitmap-indexed node of a hash array mapped trie."""
+
+    __slots__ = ("bitmap", "items")
+
+    def __init__(self, bitmap: int, items: tuple):
+        self.bitmap = bitmap
+        """Bit *i* is set iff there is an item for hash fragment *i*."""
+        self.items = items
+        """Leaves and subnodes ordered by hash fragments."""
+
+
+class _HamtCollision:
+    """Trie node with leaves whose keys have the same hash."""
+
+    __slots__ = ("hash", "items")
+
+    def __init__(self, hash: int, items: tuple):
+        self.hash = hash
+        self.items = items
+
+
+def _hamt_hash(key: InstanceName) -> int:
+    return hash(key) & 0xFFFFFFFFFFFFFFFF
+
+
+def _hamt_index(bitmap: int, bit: int) -> int:
+    return bin(bitmap & (bit - 1)).count("1")
+
+
+def _hamt_get(node: _HamtNode, h: int, key: InstanceName) -> Value:
+    shift = 0
+    while True:
+        if isinstance(node, _HamtCollision):
+            for lf in node.items:
+                if lf[1] == key:
+                    return lf[2]
+            raise KeyError(key)
+        bit = 1 << ((h >> shift) & 31)
+        if not node.bitmap & bit:
+            raise KeyError(key)
+        node = node.items[_hamt_index(node.bitmap, bit)]
+        if isinstance(node, tuple):
+            if node[1] == key:
+                return node[2]
+            raise KeyError(key)
+        shift += 5
+
+
+def _hamt_pair(a: _HamtLeaf, b: _HamtLeaf, shift: int):
+    """Return a new subtrie containing leaves `a` and `b`."""
+    if a[0] == b[0]:
+        return _HamtCollision(a[0], (a, b))
+    fa = (a[0] >> shift) & 31
+    fb = (b[0] >> shift) & 31
+    if fa == fb:
+        return _HamtNode(1 << fa, (_hamt_pair(a, b, shift + 5),))
+    return _HamtNode((1 << fa) | (1 << fb), (a, b) if fa < fb else (b, a))
+
+
+def _hamt_set(node, leaf: _HamtLeaf, shift: int) -> Tuple[object, bool]:
+    """Return new trie with `leaf` set + flag whether a key was added.
+
+    A replaced leaf keeps its sequence number.
+    """
+    h = leaf[0]
+    if isinstance(node, _HamtCollision):
+        if h == node.hash:
+            for i in range(len(node.items)):
+                old = node.items[i]
+                if old[1] == leaf[1]:
+                    return (_HamtCollision(h, node.items[:i] +
+                                           (leaf[:3] + old[3:],) +
+                                           node.items[i + 1:]), False)
+            return (_HamtCollision(h, node.items + (leaf,)), True)
+        node = _HamtNode(1 << ((node.hash >> shift) & 31), (node,))
+    bit = 1 << ((h >> shift) & 31)
+    i = _hamt_index(node.bitmap, bit)
+    its = node.items
+    if not node.bitmap & bit:
+        return (_HamtNode(node.bitmap | bit, its[:i] + (leaf,) + its[i:]),
+                True)
+    it = its[i]
+    if isinstance(it, tuple):
+        if it[1] == leaf[1]:
+            new, added = leaf[:3] + it[3:], False
+        else:
+            new, added = _hamt_pair(it, leaf, shift + 5), True
+    else:
+        new, added = _hamt_set(it, leaf, shift + 5)
+    return (_HamtNode(node.bitmap, its[:i] + (new,) + its[i + 1:]), added)
+
+
+def _hamt_delete(node, h: int, key: InstanceName, shift: int):
+    """Return new trie without `key`.
+
+    The result may also be a single leaf or ``None`` if nothing is left.
+
+    Raises:
+        KeyError: If `key` isn't in the trie.
+    """
+    if isinstance(node, _HamtCollision):
+        its = tuple([lf for lf in node.items if lf[1] != key])
+        if len(its) == len(node.items):
+            raise KeyError(key)
+        return its[0] if len(its) == 1 else _HamtCollision(h, its)
+    bit = 1 << ((h >> shift) & 31)
+    if not node.bitmap & bit:
+        raise KeyError(key)
+    i = _hamt_index(node.bitmap, bit)
+    its = node.items
+    it = its[i]
+    if isinstance(it, tuple):
+        if it[1] != key:
+            raise KeyError(key)
+        new = None
+    else:
+        new = _hamt_delete(it, h, key, shift + 5)
+    if new is not None:
+        return _HamtNode(node.bitmap, its[:i] + (new,) + its[i + 1:])
+    its = its[:i] + its[i + 1:]
+    if not its:
+        return None
+    if shift > 0 and len(its) == 1 and isinstance(its[0], tuple):
+        return its[0]
+    return _HamtNode(node.bitmap ^ bit, its)
+
+
+def _hamt_leaves(node) -> Iterator[_HamtLeaf]:
+    """Iterate over all leaves of a trie."""
+    stack = [node.items]
+    while stack:
+        for it in stack.pop():
+            if isinstance(it, tuple):
+                yield it
+            else:
+                stack.append(it.items)
@@ -84,9 +84,12 @@ class SchemaData:
         Args:
             yang_lib: Dictionary with YANG library data.
             mod_path: List of directories to search for YANG modules.
+            scaled_decimal: Flag for representing decimal64 values as
+                scaled integers.
     """
 
-    def __init__(self, yang_lib: Dict[str, Any], mod_path: List[str]) -> None:
+    def __init__(self, yang_lib: Dict[str, Any], mod_path: List[str],
+                 scaled_decimal: bool = False) -> None:
         """Initialize the schema structures."""
         self.identity_adjs = {}  # type: Dict[QualName, IdentityAdjacency]
         """Dictionary of identity bases."""
@@ -98,6 +101,8 @@ class SchemaData:
         """Dictionary of module data."""
         self._module_sequence = []  # type: List[ModuleId]
         """List that defines the order of module processing."""
+        self.scaled_decimal = scaled_decimal
+        """Flag for representing decimal64 values as scaled integers."""
         self._from_yang_library(yang_lib)
 
     def _from_yang_library(self, yang_lib: Dict[str, Any]) -> None:
@@ -19,6 +19,9 @@
 
 This module implements the following classes:
 
+* ValidationCache: Bounded cache of validated subtrees.
+* ValidationProfile: Timing profile of validations.
+* ValidationContext: State of a single validation run.
 * SchemaNode: Abstract class for schema nodes.
 * InternalNode: Abstract class for schema nodes that have children.
 * GroupNode: Anonymous group of schema nodes.
@@ -41,22 +44,28 @@ This module implements the following classes:
 * AnyxmlNode: YANG anyxml node.
 """
 
-from datetime import datetime
-from typing import Any, Dict, List, MutableSet, Optional, Set, Tuple
+from collections import Counter, OrderedDict
+import json
+from threading import Lock
+from time import perf_counter
+from typing import (Any, Callable, Dict, Hashable, List, MutableSet,
+                    Optional, Set, Tuple, Union)
 from .constraint import Must
-from .datatype import (DataType, LinkType,
+from .datatype import (DataType, LeafrefType, LinkType,
                        RawScalar, IdentityrefType)
 from .enumerations import Axis, ContentType, DefaultDeny, ValidationScope
 from .exceptions import (
     AnnotationTypeError, InvalidArgument,
     MissingAnnotationTarget, MissingAugmentTarget, RawMemberError,
     RawTypeError, SchemaError, SemanticError, UndefinedAnnotation,
-    YangsonException, YangTypeError)
+    ValidationError, YangsonException, YangTypeError)
 from .instvalue import (
-    ArrayValue, EntryValue, MetadataObject, ObjectValue, Value)
+    ArrayValue, EntryValue, InstanceKey, MetadataObject, ObjectValue,
+    PersistentObjectValue, StructuredValue, Value, new_revision)
 from .schemadata import IdentityAdjacency, SchemaContext
-from .schpattern import (ChoicePattern, ConditionalPattern, Empty, Member,
-                         NotAllowed, Pair, SchemaPattern)
+from .schpattern import (ChoicePattern, CompiledPattern, Conditional,
+                         ConditionalPattern, Empty, Member, NotAllowed, Pair,
+                         SchemaPattern)
 from .statement import Statement
 from .typealiases import (DataPath, InstanceName, JSONPointer, QualName,
                           RawEntry, RawList, RawObject, RawValue,
@@ -64,6 +73,275 @@ from .typealiases import (DataPath, InstanceName, JSONPointer, QualName,
                           YangIdentifier)
 from .xpathparser import XPathParser
 
+_val_count_lock = Lock()
+"""Lock protecting validation counters of schema nodes."""
+
+
+class _ErrorLimitReached(Exception):
+    """Maximum number of collected validation errors was reached."""
+    pass
+
+
+class ValidationCache:
+    """Bounded cache of instances that passed validation.
+
+    Instances of containers and list entries are cached if all XPath
+    expressions evaluated during their validation – "must" and "when"
+    expressions and leafref paths – access only data inside them. The
+    values of "when" conditions of their schema patterns that refer to
+    data outside become part of the cache key.
+
+    The cache may be shared by validations of different data trees,
+    also concurrently. When it is full, the least recently used entry
+    is discarded.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        """Initialize the class instance.
+
+        Args:
+            maxsize: Maximum number of cached instances.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        """Number of instances whose validation was skipped."""
+        self.misses = 0
+        """Number of cacheable instances that had to be validated."""
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        """Return the number of cached instances."""
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Remove all entries from the receiver."""
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, key: Tuple) -> bool:
+        """Return ``True`` if an instance with `key` passed validation."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def _add(self, key: Tuple) -> None:
+        """Record that an instance with `key` passed validation."""
+        with self._lock:
+            self._entries[key] = None
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class _CachedValue:
+    """Instance value as a part of validation cache keys.
+
+    Structured values compare equal if their hash values are equal, so
+    cached values have to be compared exactly.
+    """
+
+    __slots__ = ("value", "_hash")
+
+    def __init__(self, value: Value):
+        """Initialize the class instance."""
+        self.value = value
+        self._hash = hash(value)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: "_CachedValue") -> bool:
+        val = self.value
+        return isinstance(other, _CachedValue) and (
+            val._identical(other.value) if isinstance(val, StructuredValue)
+            else val.__class__ is other.value.__class__ and
+            val == other.value)
+
+
+class ValidationProfile:
+    """Timing profile of validations.
+
+    For every schema node, the profile records the number of validations
+    of its instances (or sequences of instances) and their cumulative
+    time, together with the time spent in the node's own type checks,
+    XPath evaluations and schema pattern checks. The number of
+    evaluations and their time are also recorded for every "must" and
+    "when" expression.
+
+    The profile accumulates data from all validations that use it, but
+    it must not be used by concurrent validations.
+    """
+
+    categories = ("type", "xpath", "pattern")
+    """Categories of checks whose time is recorded separately."""
+
+    def __init__(self):
+        """Initialize the class instance."""
+        self.nodes: Dict["SchemaNode", Dict[str, Union[int, float]]] = {}
+        """Records of schema nodes."""
+        self.expressions: Dict[
+            Tuple["SchemaNode", str, "Expr"], List[Union[int, float]]] = {}
+        """Numbers of evaluations and times of XPath expressions."""
+        self._inner = 0.0
+
+    def clear(self) -> None:
+        """Remove all records from the receiver."""
+        self.nodes.clear()
+        self.expressions.clear()
+
+    def report(self) -> str:
+        """Return the receiver's data as JSON text.
+
+        Schema nodes and expressions are sorted by decreasing time, all
+        times are in seconds.
+        """
+        nodes = []
+        for sn, rec in self.nodes.items():
+            nodes.append(dict(node=self._path(sn), **rec))
+        nodes.sort(key=lambda r: -r["time"])
+        exprs = []
+        for (sn, kind, ex), (calls, tm) in self.expressions.items():
+            exprs.append({"node": self._path(sn), "kind": kind,
+                          "expression": str(ex), "calls": calls,
+                          "time": tm})
+        exprs.sort(key=lambda r: -r["time"])
+        return json.dumps({"nodes": nodes, "expressions": exprs}, indent=2)
+
+    @staticmethod
+    def _path(sn: "SchemaNode") -> DataPath:
+        return "/" if sn.parent is None else sn.data_path()
+
+    def _record(self, sn: "SchemaNode") -> Dict[str, Union[int, float]]:
+        rec = self.nodes.get(sn)
+        if rec is None:
+            rec = {"calls": 0, "time": 0.0}
+            rec.update(dict.fromkeys(self.categories, 0.0))
+            self.nodes[sn] = rec
+        return rec
+
+    def _validate(self, inst: "InstanceNode", scope: ValidationScope,
+                  ctype: ContentType, vctx: "ValidationContext") -> None:
+        """Validate `inst` and record the time under its schema node."""
+        sn = inst.schema_node
+        start = perf_counter()
+        try:
+            sn._validate(inst, scope, ctype, vctx)
+        finally:
+            rec = self._record(sn)
+            rec["calls"] += 1
+            rec["time"] += perf_counter() - start
+
+    def _call(self, sn: "SchemaNode", category: str, func: Callable,
+              *args: Any, expr: Tuple[str, "Expr"] = None) -> Any:
+        """Call `func` with `args` and record its time.
+
+        Time of nested recorded calls is excluded from `category`.
+
+        Args:
+            sn: Schema node whose check is performed.
+            category: Category of the check.
+            func: Function performing the check.
+            args: Arguments of `func`.
+            expr: Kind and XPath expression to be recorded.
+        """
+        inner = self._inner
+        self._inner = 0.0
+        start = perf_counter()
+        try:
+            return func(*args)
+        finally:
+            dur = perf_counter() - start
+            self._record(sn)[category] += dur - self._inner
+            if expr is not None:
+                erec = self.expressions.setdefault((sn,) + expr, [0, 0.0])
+                erec[0] += 1
+                erec[1] += dur
+            self._inner = inner + dur
+
+
+class ValidationContext:
+    """State of a single validation run.
+
+    Schema nodes, types and schema patterns are shared by all
+    validations, so everything that a validation computes is kept here.
+    This allows for validating multiple instances concurrently.
+    """
+
+    def __init__(self, collect: bool = False, max_errors: int = None,
+                 cache: ValidationCache = None,
+                 profile: ValidationProfile = None):
+        """Initialize the class instance."""
+        self.when: Dict[Conditional, bool] = {}
+        """Values of "when" conditions of schema patterns."""
+        self.val_counts: Counter = Counter()
+        """Numbers of validations performed per schema node."""
+        self.errors: Optional[List[ValidationError]] = [] if collect else None
+        """Collected errors, or ``None`` if errors are not collected."""
+        self.max_errors = max_errors
+        """Maximum number of errors to collect."""
+        self.delegated: Set[Tuple[InstanceKey, ...]] = set()
+        """Paths of instances that are validated elsewhere."""
+        self.sliced: Set[Tuple[InstanceKey, ...]] = set()
+        """Paths of lists whose entries are validated elsewhere."""
+        self.merge: Optional[Callable[[Tuple[InstanceKey, ...]], None]] = None
+        """Optional function merging the results of validation performed
+        elsewhere, called with the path of a delegated instance or sliced
+        list."""
+        self.cache = cache
+        """Optional cache of validated instances."""
+        self.profile = profile
+        """Optional profile recording the validation time."""
+
+    def add_error(self, err: ValidationError) -> None:
+        """Record a validation error.
+
+        Args:
+            err: Validation error.
+
+        Raises:
+            ValidationError: If errors are not being collected.
+        """
+        if self.errors is None:
+            raise err
+        self.errors.append(err)
+        if self.max_errors is not None and len(self.errors) >= self.max_errors:
+            raise _ErrorLimitReached()
+
+    def merge_delegated(self, path: Tuple[InstanceKey, ...]) -> None:
+        """Merge the results of validation performed elsewhere.
+
+        This is done at the place where the instance would be validated,
+        so that errors are recorded in document order.
+
+        Args:
+            path: Path of a delegated instance or sliced list.
+        """
+        if self.merge is not None:
+            self.merge(path)
+
+    def commit(self) -> None:
+        """Add the validation counts to the schema nodes."""
+        with _val_count_lock:
+            for sn, cnt in self.val_counts.items():
+                sn.val_count += cnt
+        self.val_counts.clear()
+
+
+def _level_escape(expr: "Expr", level: int) -> Optional[int]:
+    """Return the number of levels that `expr` may access above an ancestor.
+
+    Args:
+        expr: XPath expression.
+        level: Number of levels between the ancestor and the context node.
+    """
+    reach = expr.reach()
+    return None if reach is None else reach - level
+
 
 class Annotation:
     """Class for metadata annotations [RFC 7952]."""
@@ -158,6 +436,14 @@ class SchemaNode:
         """
         raise NotImplementedError
 
+    def to_raw(self, val: Value) -> RawValue:
+        """Return raw form of an instance value of the receiver.
+
+        Args:
+            val: Instance value.
+        """
+        raise NotImplementedError
+
     def clear_val_counters(self) -> None:
         """Clear receiver's validation counter."""
         self.val_count = 0
@@ -180,13 +466,14 @@ class SchemaNode:
         return res
 
     def _validate(self, inst: "InstanceNode", scope: ValidationScope,
-                  ctype: ContentType) -> None:
+                  ctype: ContentType, vctx: ValidationContext) -> None:
         """Validate instance against the receiver.
 
         Args:
             inst: Instance node to be validated.
             scope: Scope of the validation (syntax, semantics or all)
             ctype: Content type of the instance.
+            vctx: Validation context.
 
         Returns:
             ``None`` if validation succeeds.
@@ -196,7 +483,7 @@ class SchemaNode:
             SemanticError: If `inst` violates a semantic rule.
             YangTypeError: If `inst` is a scalar of incorrect type.
         """
-        self.val_count += 1
+        vctx.val_counts[self] += 1
 
     def _iname2qname(self, iname: InstanceName) -> QualName:
         """Translate instance name to qualified name in the receiver's context.
@@ -346,6 +633,7 @@ class InternalNode(SchemaNode):
         super().__init__()
         self.children: List[SchemaNode] = []
         self._mandatory_children: MutableSet[SchemaNode] = set()
+        self._escape: Optional[int] = None
 
     @property
     def mandatory(self) -> bool:
@@ -433,7 +721,8 @@ class InternalNode(SchemaNode):
         """Override the superclass method."""
         if not isinstance(rval, dict):
             raise RawTypeError(jptr, "object")
-        res = ObjectValue()
+        res = (PersistentObjectValue() if
+               len(rval) >= PersistentObjectValue.min_size else ObjectValue())
         for qn in rval:
             if qn.startswith("@"):
                 if qn != "@":
@@ -451,6 +740,21 @@ class InternalNode(SchemaNode):
                 res[ch.iname()] = ch.from_raw(rval[qn], npath)
         return res
 
+    def to_raw(self, val: ObjectValue) -> RawObject:
+        """Override the superclass method."""
+        res = {}
+        for m in val:
+            if m.startswith("@"):
+                res[m] = self._metadata_to_raw(val[m])
+            else:
+                res[m] = self.get_data_child(
+                    *self._iname2qname(m)).to_raw(val[m])
+        return res
+
+    def _metadata_to_raw(self, mo: MetadataObject) -> RawMetadataObject:
+        ans = self.schema_root().annotations
+        return {m: ans[self._iname2qname(m)].type.to_raw(mo[m]) for m in mo}
+
     def _process_metadata(self, rmo: RawMetadataObject,
                           jptr: JSONPointer) -> MetadataObject:
         res = {}
@@ -461,8 +765,9 @@ class InternalNode(SchemaNode):
             except KeyError:
                 raise UndefinedAnnotation(jptr, mem)
             res[mem] = an.type.from_raw(rmo[mem])
-            if res[mem] not in an.type:
-                raise AnnotationTypeError(jptr, mem, an.type.error_message)
+            err = an.type._checker(res[mem])
+            if err:
+                raise AnnotationTypeError(jptr, mem, err[1])
         return res
 
     def _node_digest(self) -> Dict[str, Any]:
@@ -477,13 +782,31 @@ class InternalNode(SchemaNode):
         return res
 
     def _validate(self, inst: "InstanceNode", scope: ValidationScope,
-                  ctype: ContentType) -> None:
+                  ctype: ContentType, vctx: ValidationContext) -> None:
         """Extend the superclass method."""
         if scope.value & ValidationScope.syntax.value:   # schema
-            self._check_schema_pattern(inst, ctype)
+            try:
+                if vctx.profile is None:
+                    self._check_schema_pattern(inst, ctype, vctx)
+                else:
+                    vctx.profile._call(self, "pattern",
+                                       self._check_schema_pattern,
+                                       inst, ctype, vctx)
+            except ValidationError as e:
+                vctx.add_error(e)
         for m in inst:
-            inst._member(m).validate(scope, ctype)
-        super()._validate(inst, scope, ctype)
+            minst = inst._member(m)
+            if vctx.delegated and minst.path in vctx.delegated:
+                vctx.merge_delegated(minst.path)
+                continue
+            try:
+                if vctx.profile is None:
+                    minst.schema_node._validate(minst, scope, ctype, vctx)
+                else:
+                    vctx.profile._validate(minst, scope, ctype, vctx)
+            except ValidationError as e:
+                vctx.add_error(e)
+        super()._validate(inst, scope, ctype, vctx)
 
     def _add_child(self, node: SchemaNode) -> None:
         node.parent = self
@@ -493,20 +816,23 @@ class InternalNode(SchemaNode):
         """Return the set of instance names under the receiver."""
         return frozenset([c.iname() for c in self.data_children()])
 
-    def _check_schema_pattern(self, inst: "InstanceNode",
-                              ctype: ContentType) -> None:
+    def _check_schema_pattern(self, inst: "InstanceNode", ctype: ContentType,
+                              vctx: ValidationContext) -> None:
         p = self.schema_pattern
-        p._eval_when(inst)
+        p._eval_when(inst, vctx)
+        if (self._compiled_pattern is not None and
+                self._compiled_pattern.check(inst, ctype, vctx)):
+            return
         for m in inst:
-            newp = p.deriv(m, ctype)
+            newp = p.deriv(m, ctype, vctx)
             if isinstance(newp, NotAllowed):
                 raise SchemaError(
                     inst.json_pointer(),
                     ("" if ctype == ContentType.all else ctype.name + " ") +
                     "member-not-allowed", m)
             p = newp
-        if not p.nullable(ctype):
-            mms = p._mandatory_members(ctype)
+        if not p.nullable(ctype, vctx):
+            mms = p._mandatory_members(ctype, vctx)
             msg = "one of " if len(mms) > 1 else ""
             raise SchemaError(
                 inst.json_pointer(), "missing-data",
@@ -515,9 +841,47 @@ class InternalNode(SchemaNode):
     def _make_schema_patterns(self) -> None:
         """Build schema pattern for the receiver and its data descendants."""
         self.schema_pattern = self._schema_pattern()
+        self._compiled_pattern = CompiledPattern.compile(self.schema_pattern)
         for dc in self.data_children():
             if isinstance(dc, InternalNode):
                 dc._make_schema_patterns()
+        self._check_locality()
+
+    def _check_locality(self) -> None:
+        """Find out whether XPath expressions in the receiver are local.
+
+        The receiver's `_escape` attribute is set to the number of levels
+        above the receiver's instance that the expressions may access
+        (``None`` if unbounded). Validation results of a data node can be
+        cached if only the conditions of its schema pattern reach
+        outside.
+        """
+        own = [m.expression.reach() for m in self.must]
+        for dc in self.data_children():
+            if isinstance(dc, InternalNode):
+                own.append(dc._escape)
+                continue
+            own.extend([_level_escape(m.expression, 1) for m in dc.must])
+            if (isinstance(dc, TerminalNode) and
+                    isinstance(dc.type, LinkType) and
+                    dc.type.require_instance):
+                own.append(_level_escape(dc.type.path, 1)
+                           if isinstance(dc.type, LeafrefType) else None)
+        outer = []
+        whens = []
+        for c in self.schema_pattern._conditionals():
+            esc = _level_escape(c.when, 1 if isinstance(c, Member) else 0)
+            if esc is None or esc > 0:
+                whens.append(c)
+                outer.append(esc)
+            else:
+                own.append(esc)
+        local = None not in own and max(own, default=0) <= 0
+        self._escape = (None if None in own + outer else
+                        max(own + outer, default=0))
+        if isinstance(self, DataNode):
+            self._cacheable = local
+            self._cache_whens = whens
 
     def _schema_pattern(self) -> SchemaPattern:
         todo = [c for c in self.children
@@ -669,10 +1033,17 @@ class InternalNode(SchemaNode):
         """Handle anydata statement."""
         self._handle_child(AnydataNode(), stmt, sctx)
 
-    def _ascii_tree(self, indent: str, no_types: bool, val_count: bool) -> str:
+    def _ascii_tree(self, indent: str, no_types: bool, val_count: bool,
+                    profile: ValidationProfile = None) -> str:
         """Return the receiver's subtree as ASCII art."""
         def suffix(sn):
-            return f" {{{sn.val_count}}}\n" if val_count else "\n"
+            res = f" {{{sn.val_count}}}" if val_count else ""
+            rec = profile.nodes.get(sn) if profile else None
+            if rec:
+                res += f" <{1000 * rec['time']:.3f} ms: " + ", ".join(
+                    [f"{c} {1000 * rec[c]:.3f}"
+                     for c in ValidationProfile.categories]) + ">"
+            return res + "\n"
         if not self.children:
             return ""
         cs = []
@@ -682,9 +1053,11 @@ class InternalNode(SchemaNode):
         res = ""
         for c in cs[:-1]:
             res += (indent + c._tree_line(no_types) + suffix(c) +
-                    c._ascii_tree(indent + "|  ", no_types, val_count))
+                    c._ascii_tree(indent + "|  ", no_types, val_count,
+                                  profile))
         return (res + indent + cs[-1]._tree_line(no_types) + suffix(cs[-1]) +
-                cs[-1]._ascii_tree(indent + "   ", no_types, val_count))
+                cs[-1]._ascii_tree(indent + "   ", no_types, val_count,
+                                   profile))
 
     def clear_val_counters(self) -> None:
         """Clear validation counters in the receiver and its subtree."""
@@ -725,6 +1098,8 @@ class SchemaTreeNode(GroupNode):
         """Initialize the class instance."""
         super().__init__()
         self.annotations: Dict[QualName, Annotation] = {}
+        self.data_model: Optional["DataModel"] = None
+        """Data model whose schema tree is rooted at the receiver."""
 
     def data_parent(self) -> InternalNode:
         """Override the superclass method."""
@@ -747,6 +1122,8 @@ class DataNode(SchemaNode):
         """Initialize the class instance."""
         super().__init__()
         self.default_deny: "DefaultDeny" = DefaultDeny.none
+        self._cacheable = False
+        self._cache_whens: List[Conditional] = []
 
     def orphan_instance(self, rval: RawValue) -> "ObjectMember":
         """Return an isolated instance of the receiver.
@@ -755,7 +1132,8 @@ class DataNode(SchemaNode):
             rval: Raw value to be used for the returned instance.
         """
         val = self.from_raw(rval)
-        return ObjectMember(self.iname(), {}, val, None, self, datetime.now())
+        return ObjectMember(self.iname(), ObjectValue(), val, None, self,
+                            new_revision())
 
     def split_instance_route(self, route: "InstanceRoute") -> Optional[Tuple[
             "InstanceRoute", "InstanceRoute"]]:
@@ -794,11 +1172,25 @@ class DataNode(SchemaNode):
                 return None
 
     def _validate(self, inst: "InstanceNode", scope: ValidationScope,
-                  ctype: ContentType) -> None:
+                  ctype: ContentType, vctx: ValidationContext) -> None:
         """Extend the superclass method."""
+        key = None
+        if vctx.cache is not None and self._cacheable:
+            key = self._cache_key(inst, scope, ctype)
+        if key is not None:
+            if vctx.cache._lookup(key):
+                vctx.val_counts[self] += 1
+                return
+            nerr = 0 if vctx.errors is None else len(vctx.errors)
         if scope.value & ValidationScope.semantics.value:
-            self._check_must(inst)        # must expressions
-        super()._validate(inst, scope, ctype)
+            try:
+                self._check_must(inst, vctx.profile)    # must expressions
+            except ValidationError as e:
+                vctx.add_error(e)
+        super()._validate(inst, scope, ctype, vctx)
+        if key is not None and (vctx.errors is None or
+                                len(vctx.errors) == nerr):
+            vctx.cache._add(key)
 
     def _default_instance(self, pnode: "InstanceNode", ctype: ContentType,
                           lazy: bool = False) -> "InstanceNode":
@@ -812,9 +1204,26 @@ class DataNode(SchemaNode):
                 return wd.up()
         return pnode
 
-    def _check_must(self, inst: "InstanceNode") -> None:
+    def _cache_key(self, inst: "InstanceNode", scope: ValidationScope,
+                   ctype: ContentType) -> Optional[Tuple]:
+        """Return the key of `inst` in validation cache.
+
+        ``None`` is returned if the instance's value is not hashable.
+        """
+        whens = tuple([c._when_value(inst) for c in self._cache_whens])
+        try:
+            key = (self, _CachedValue(inst.value), scope, ctype, whens)
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _check_must(self, inst: "InstanceNode",
+                    profile: ValidationProfile = None) -> None:
         for m in self.must:
-            if not m.expression.evaluate(inst):
+            if not (m.expression.evaluate(inst) if profile is None else
+                    profile._call(self, "xpath", m.expression.evaluate, inst,
+                                  expr=("must", m.expression))):
                 raise SemanticError(inst.json_pointer(), m.error_tag,
                                     m.error_message)
 
@@ -850,6 +1259,10 @@ class TerminalNode(SchemaNode):
             raise RawTypeError(jptr, self.type.yang_type() + " value")
         return res
 
+    def to_raw(self, val: ScalarValue) -> RawScalar:
+        """Override the superclass method."""
+        return self.type.to_raw(val)
+
     def _node_digest(self) -> Dict[str, Any]:
         res = super()._node_digest()
         res["type"] = self.type._type_digest(self.config)
@@ -859,27 +1272,29 @@ class TerminalNode(SchemaNode):
         return res
 
     def _validate(self, inst: "InstanceNode", scope: ValidationScope,
-                  ctype: ContentType) -> None:
+                  ctype: ContentType, vctx: ValidationContext) -> None:
         """Extend the superclass method."""
-        if (scope.value & ValidationScope.syntax.value and
-                inst.value not in self.type):
-            raise YangTypeError(inst.json_pointer(), self.type.error_tag,
-                                self.type.error_message)
+        if scope.value & ValidationScope.syntax.value:
+            err = (self.type._checker(inst.value) if vctx.profile is None else
+                   vctx.profile._call(self, "type", self.type._checker,
+                                      inst.value))
+            if err:
+                raise YangTypeError(inst.json_pointer(), *err)
         if (isinstance(self.type, LinkType) and        # referential integrity
                 scope.value & ValidationScope.semantics.value and
                 self.type.require_instance):
             try:
-                tgt = inst._deref()
+                tgt = (inst._deref() if vctx.profile is None else
+                       vctx.profile._call(self, "xpath", inst._deref))
             except YangsonException:
                 tgt = []
             if not tgt:
                 raise SemanticError(inst.json_pointer(), "instance-required")
-        super()._validate(inst, scope, ctype)
+        super()._validate(inst, scope, ctype, vctx)
 
     def _default_value(self, inst: "InstanceNode", ctype: ContentType,
                        lazy: bool) -> "InstanceNode":
-        inst.value = self.default
-        return inst
+        return inst.update(self.default)
 
     def _post_process(self) -> None:
         super()._post_process()
@@ -892,7 +1307,8 @@ class TerminalNode(SchemaNode):
         di = self._default_instance(inst, ContentType.all)
         return [] if di is None else [self]
 
-    def _ascii_tree(self, indent: str, no_types: bool, val_count: bool) -> str:
+    def _ascii_tree(self, indent: str, no_types: bool, val_count: bool,
+                    profile: ValidationProfile = None) -> str:
         return ""
 
     def _state_roots(self) -> List[SchemaNode]:
@@ -930,7 +1346,7 @@ class ContainerNode(DataNode, InternalNode):
 
     def _default_value(self, inst: "InstanceNode", ctype: ContentType,
                        lazy: bool) -> Optional["InstanceNode"]:
-        inst.value = ObjectValue()
+        inst = inst.update(ObjectValue())
         return inst if lazy else self._add_defaults(inst, ctype)
 
     def _default_nodes(self, inst: "InstanceNode") -> List["InstanceNode"]:
@@ -965,16 +1381,29 @@ class SequenceNode(DataNode):
         return self.min_elements > 0
 
     def _validate(self, inst: "InstanceNode", scope: ValidationScope,
-                  ctype: ContentType) -> None:
+                  ctype: ContentType, vctx: ValidationContext) -> None:
         """Extend the superclass method."""
         if isinstance(inst, ArrayEntry):
-            super()._validate(inst, scope, ctype)
+            super()._validate(inst, scope, ctype, vctx)
         else:
             if scope.value & ValidationScope.semantics.value:
-                self._check_list_props(inst)
-                self._check_cardinality(inst)
-            for e in inst:
-                super()._validate(e, scope, ctype)
+                for check in (self._check_list_props, self._check_cardinality):
+                    try:
+                        check(inst)
+                    except ValidationError as e:
+                        vctx.add_error(e)
+            if vctx.sliced and inst.path in vctx.sliced:
+                vctx.merge_delegated(inst.path)
+                return
+            for en in inst:
+                try:
+                    super()._validate(en, scope, ctype, vctx)
+                except ValidationError as e:
+                    vctx.add_error(e)
+
+    def _entry_key(self, entry: EntryValue) -> Optional[Hashable]:
+        """Return the key identifying an entry, or ``None`` if it has none."""
+        return None
 
     def _check_cardinality(self, inst: "InstanceNode") -> None:
         if len(inst.value) < self.min_elements:
@@ -1016,6 +1445,16 @@ class SequenceNode(DataNode):
             res.append(self.entry_from_raw(en, f"{jptr}/{i}"))
         return res
 
+    def to_raw(self, val: Union[ArrayValue, EntryValue]) -> RawValue:
+        """Override the superclass method.
+
+        Args:
+            val: Array value, or a single entry.
+        """
+        if isinstance(val, ArrayValue):
+            return [super(SequenceNode, self).to_raw(en) for en in val]
+        return super().to_raw(val)
+
     def entry_from_raw(self, rval: RawEntry,
                        jptr: JSONPointer = "") -> EntryValue:
         """Transform a raw (leaf-)list entry into the cooked form.
@@ -1041,6 +1480,7 @@ class ListNode(SequenceNode, InternalNode):
         self.keys: List[QualName] = []
         self._key_members = []
         self.unique: List[List[SchemaRoute]] = []
+        self._unique_extractors: List[Optional[List[Callable]]] = []
 
     def _node_digest(self) -> Dict[str, Any]:
         res = super()._node_digest()
@@ -1051,8 +1491,40 @@ class ListNode(SequenceNode, InternalNode):
         """Check uniqueness of keys and "unique" properties, if applicable."""
         if self.keys:
             self._check_keys(inst)
-        for u in self.unique:
-            self._check_unique(u, inst)
+        if self.unique:
+            self._check_unique(inst)
+
+    def _entry_key(self, entry: EntryValue) -> Optional[Tuple[ScalarValue]]:
+        """Override the superclass method."""
+        if not (self._key_members and isinstance(entry, ObjectValue)):
+            return None
+        try:
+            return tuple([entry[k] for k in self._key_members])
+        except KeyError:
+            return None
+
+    def _entry_position(self, val: ArrayValue,
+                        keys: Dict[InstanceName, ScalarValue]) -> Optional[int]:
+        """Return position of the first entry with the given keys.
+
+        The array's key index is used if `keys` contains exactly the list
+        keys, otherwise the entries are searched sequentially.
+
+        Args:
+            val: Array of list entries.
+            keys: Dictionary of key values.
+        """
+        if self._key_members and keys.keys() == set(self._key_members):
+            return val.key_index(self._entry_key).get(
+                tuple([keys[k] for k in self._key_members]))
+        for i in range(len(val)):
+            en = val[i]
+            try:
+                if all([en[k] == keys[k] for k in keys]):
+                    return i
+            except (KeyError, TypeError):
+                continue
+        return None
 
     def _check_keys(self, inst: "InstanceNode") -> None:
         ukeys = set()
@@ -1069,17 +1541,92 @@ class ListNode(SequenceNode, InternalNode):
                     repr(kval[0] if len(kval) < 2 else kval))
             ukeys.add(kval)
 
-    def _check_unique(self, unique: List[SchemaRoute],
-                      inst: "InstanceNode") -> None:
-        uvals = set()
-        for en in inst:
-            den = en.add_defaults()
-            uval = tuple([den._peek_schema_route(sr) for sr in unique])
-            if None not in uval:
-                if uval in uvals:
-                    raise SemanticError(inst.json_pointer(), "data-not-unique")
+    def _check_unique(self, inst: "InstanceNode") -> None:
+        """Check all "unique" properties in one pass over list entries.
+
+        Values of compiled "unique" specifications are extracted directly
+        from entry values, other specifications are evaluated on entries
+        with all defaults added.
+        """
+        uvals = [set() for u in self.unique]
+        compiled = None not in self._unique_extractors
+        for en in (inst.value if compiled else inst):
+            den = None
+            for i, ext in enumerate(self._unique_extractors):
+                if ext is None:
+                    if den is None:
+                        den = en.add_defaults()
+                    uval = tuple([den._peek_schema_route(sr)
+                                  for sr in self.unique[i]])
                 else:
-                    uvals.add(uval)
+                    val = en if compiled else en.value
+                    uval = tuple([ex(val) for ex in ext])
+                if None not in uval:
+                    if uval in uvals[i]:
+                        raise SemanticError(inst.json_pointer(),
+                                            "data-not-unique")
+                    uvals[i].add(uval)
+
+    def _unique_extractor(self, route: SchemaRoute) -> Optional[Callable]:
+        """Compile a function extracting the value of a "unique" leaf.
+
+        The function receives an entry value and returns the value of
+        the leaf addressed by `route`, or its default value if it is in
+        use, or ``None``. Defaults of other nodes are not added.
+
+        Returns:
+            The extractor, or ``None`` if the route passes through a
+            conditional schema node.
+        """
+        leaf = self
+        for qn in route:
+            leaf = leaf.get_child(*qn)
+            if leaf is None:
+                return None
+        if not isinstance(leaf, LeafNode):
+            return None
+        chain = []
+        n = leaf
+        while n is not self:
+            if n.when or not isinstance(
+                    n, (ContainerNode, ChoiceNode, CaseNode, LeafNode,
+                        GroupNode)):
+                return None
+            chain.append(n)
+            n = n.parent
+        chain.reverse()
+        steps = [(n, n.iname() if isinstance(n, DataNode) else None,
+                  isinstance(n, CaseNode) or
+                  n.content_type().value & n.parent.content_type().value != 0)
+                 for n in chain]
+
+        def extract(val: ObjectValue) -> Optional[ScalarValue]:
+            dflt = True
+            for n, iname, ok in steps:
+                if not isinstance(val, ObjectValue):
+                    return None
+                if iname is not None and iname in val:
+                    val = val[iname]
+                    dflt = True
+                    continue
+                dflt = dflt and ok
+                if iname is None:
+                    if isinstance(n, CaseNode):
+                        ch = n.parent
+                        ac = ch._active_case(val)
+                        dflt = dflt and (ac is n if ac else (
+                            ch.default_case is not None and
+                            ch.get_child(*ch.default_case) is n))
+                    continue
+                if not dflt:
+                    return None
+                if isinstance(n, LeafNode):
+                    return n.default
+                if n.presence:
+                    return None
+                val = ObjectValue()
+            return val
+        return extract
 
     def _default_instance(self, pnode: "InstanceNode", ctype: ContentType,
                           lazy: bool = False) -> "InstanceNode":
@@ -1093,6 +1640,9 @@ class ListNode(SequenceNode, InternalNode):
             if not kn._mandatory:
                 kn._mandatory = True
                 self._mandatory_children.add(kn)
+        for u in self.unique:
+            exs = [self._unique_extractor(sr) for sr in u]
+            self._unique_extractors.append(None if None in exs else exs)
 
     def _key_stmt(self, stmt: Statement, sctx: SchemaContext) -> None:
         self.keys = []
@@ -1119,7 +1669,7 @@ class ListNode(SequenceNode, InternalNode):
         """
         val = self.entry_from_raw(rval)
         return ArrayEntry(0, EmptyList(), EmptyList(), val, None, self,
-                          val.timestamp)
+                          val.revision)
 
 
 class ChoiceNode(InternalNode):
@@ -1273,6 +1823,20 @@ class LeafListNode(SequenceNode, TerminalNode):
     def _yang_class(self) -> str:
         return "leaf-list"
 
+    def _entry_key(self, entry: EntryValue) -> Optional[ScalarValue]:
+        """Override the superclass method."""
+        return entry
+
+    def _entry_position(self, val: ArrayValue,
+                        value: ScalarValue) -> Optional[int]:
+        """Return position of the first entry equal to `value`.
+
+        Args:
+            val: Array of leaf-list entries.
+            value: Entry value.
+        """
+        return val.key_index(self._entry_key).get(value)
+
     def _check_list_props(self, inst: "InstanceNode") -> None:
         if (self.content_type() == ContentType.config and
                 len(set(inst.value)) < len(inst.value)):
@@ -1325,6 +1889,16 @@ class AnyContentNode(DataNode):
             return res
         return convert(rval)
 
+    def to_raw(self, val: Value) -> RawValue:
+        """Override the superclass method."""
+        def convert(val):
+            if isinstance(val, list):
+                return [convert(x) for x in val]
+            if isinstance(val, dict):
+                return {x: convert(val[x]) for x in val}
+            return val
+        return convert(val)
+
     def _default_instance(self, pnode: "InstanceNode", ctype: ContentType,
                           lazy: bool = False) -> "InstanceNode":
         return pnode
@@ -1332,7 +1906,8 @@ class AnyContentNode(DataNode):
     def _tree_line(self, no_type: bool = False) -> str:
         return super()._tree_line() + ("" if self._mandatory else "?")
 
-    def _ascii_tree(self, indent: str, no_types: bool, val_count: bool) -> str:
+    def _ascii_tree(self, indent: str, no_types: bool, val_count: bool,
+                    profile: ValidationProfile = None) -> str:
         return ""
 
     def _post_process(self) -> None:
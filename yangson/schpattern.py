@@ -17,12 +17,13 @@
 
 """This module defines classes for schema patterns."""
 
-from typing import List, Optional
+from typing import Iterable, List, Optional
 from .enumerations import ContentType
 from .typealiases import InstanceName, _Singleton, YangIdentifier
 from .xpathast import Expr
 if False:                       # fake import for type aliases
     from .instance import InstanceNode
+    from .schemanode import ValidationContext
 
 
 class SchemaPattern:
@@ -33,37 +34,46 @@ class SchemaPattern:
         """Make `p` an optional pattern."""
         return Alternative.combine(Empty(), p)
 
-    def nullable(self, ctype: ContentType) -> bool:
+    def nullable(self, ctype: ContentType,
+                 vctx: "ValidationContext") -> bool:
         """Return ``True`` the receiver is nullable."""
         return False
 
-    def empty(self) -> bool:
+    def empty(self, vctx: "ValidationContext") -> bool:
         """Return ``True`` if the receiver is (conditionally) empty."""
         return False
 
-    def _active(self, ctype: ContentType) -> bool:
+    def _active(self, ctype: ContentType, vctx: "ValidationContext") -> bool:
         """Return ``True`` the receiver is active in the current context."""
         return True
 
-    def _eval_when(self, cnode: "InstanceNode") -> None:
+    def _eval_when(self, cnode: "InstanceNode",
+                   vctx: "ValidationContext") -> None:
         return
 
-    def _mandatory_members(self, ctype: ContentType) -> List[InstanceName]:
+    def _mandatory_members(self, ctype: ContentType,
+                           vctx: "ValidationContext") -> List[InstanceName]:
+        return []
+
+    def _conditionals(self) -> List["Conditional"]:
+        """Return all conditional patterns inside the receiver."""
         return []
 
 
 class Empty(SchemaPattern, metaclass=_Singleton):
     """Singleton class representing the empty pattern."""
 
-    def nullable(self, ctype: ContentType) -> bool:
+    def nullable(self, ctype: ContentType,
+                 vctx: "ValidationContext") -> bool:
         """Override the superclass method."""
         return True
 
-    def deriv(self, x: str, ctype: ContentType) -> SchemaPattern:
+    def deriv(self, x: str, ctype: ContentType,
+              vctx: "ValidationContext") -> SchemaPattern:
         """Return derivative of the receiver."""
         return NotAllowed()
 
-    def empty(self) -> bool:
+    def empty(self, vctx: "ValidationContext") -> bool:
         """Override the superclass method."""
         return True
 
@@ -76,7 +86,8 @@ class Empty(SchemaPattern, metaclass=_Singleton):
 
 class NotAllowed(SchemaPattern, metaclass=_Singleton):
 
-    def deriv(self, x: str, ctype: ContentType) -> SchemaPattern:
+    def deriv(self, x: str, ctype: ContentType,
+              vctx: "ValidationContext") -> SchemaPattern:
         """Return derivative of the receiver."""
         return self
 
@@ -93,20 +104,29 @@ class Conditional(SchemaPattern):
     def __init__(self, when: Expr):
         """Initialize the class instance."""
         self.when = when
-        self._val_when = None  # type: bool
 
-    def empty(self) -> bool:
+    def empty(self, vctx: "ValidationContext") -> bool:
         """Override the superclass method."""
-        return self.when and not self._val_when
+        return self.when and not vctx.when[self]
+
+    def check_when(self, vctx: "ValidationContext") -> bool:
+        return not self.when or vctx.when[self]
 
-    def check_when(self) -> bool:
-        return not self.when or self._val_when
+    def _eval_when(self, cnode: "InstanceNode",
+                   vctx: "ValidationContext") -> None:
+        if vctx.profile is None:
+            vctx.when[self] = self._when_value(cnode)
+        else:
+            vctx.when[self] = vctx.profile._call(
+                cnode.schema_node, "xpath", self._when_value, cnode,
+                expr=("when", self.when))
 
-    def _eval_when(self, cnode: "InstanceNode") -> None:
-        self._val_when = bool(self.when.evaluate(cnode))
+    def _when_value(self, cnode: "InstanceNode") -> bool:
+        """Evaluate the receiver's condition for the instance `cnode`."""
+        return bool(self.when.evaluate(cnode))
 
-    def _active(self, ctype: ContentType) -> bool:
-        return super()._active(ctype) and self.check_when()
+    def _active(self, ctype: ContentType, vctx: "ValidationContext") -> bool:
+        return super()._active(ctype, vctx) and self.check_when(vctx)
 
 
 class Typeable(SchemaPattern):
@@ -119,8 +139,8 @@ class Typeable(SchemaPattern):
     def match_ctype(self, ctype) -> bool:
         return self.ctype.value & ctype.value != 0
 
-    def _active(self, ctype: ContentType) -> bool:
-        return super()._active(ctype) and self.match_ctype(ctype)
+    def _active(self, ctype: ContentType, vctx: "ValidationContext") -> bool:
+        return super()._active(ctype, vctx) and self.match_ctype(ctype)
 
 
 class ConditionalPattern(Conditional):
@@ -131,18 +151,25 @@ class ConditionalPattern(Conditional):
         super().__init__(when)
         self.pattern = p
 
-    def _eval_when(self, cnode: "InstanceNode") -> None:
-        super()._eval_when(cnode)
-        self.pattern._eval_when(cnode)
+    def _eval_when(self, cnode: "InstanceNode",
+                   vctx: "ValidationContext") -> None:
+        super()._eval_when(cnode, vctx)
+        self.pattern._eval_when(cnode, vctx)
 
-    def nullable(self, ctype: ContentType) -> bool:
+    def _conditionals(self) -> List[Conditional]:
+        return [self] + self.pattern._conditionals()
+
+    def nullable(self, ctype: ContentType,
+                 vctx: "ValidationContext") -> bool:
         """Override the superclass method."""
-        return (not self.check_when() or self.pattern.nullable(ctype))
+        return (not self.check_when(vctx) or
+                self.pattern.nullable(ctype, vctx))
 
-    def deriv(self, x: str, ctype: ContentType) -> SchemaPattern:
+    def deriv(self, x: str, ctype: ContentType,
+              vctx: "ValidationContext") -> SchemaPattern:
         """Return derivative of the receiver."""
-        return (self.pattern.deriv(x, ctype) if self.check_when() else
-                NotAllowed())
+        return (self.pattern.deriv(x, ctype, vctx) if self.check_when(vctx)
+                else NotAllowed())
 
     def tree(self, indent: int = 0):
         return (" " * indent + "Conditional\n" +
@@ -151,8 +178,10 @@ class ConditionalPattern(Conditional):
     def __str__(self) -> str:
         return str(self.pattern)
 
-    def _mandatory_members(self, ctype: ContentType) -> List[InstanceName]:
-        return self.pattern._mandatory_members(ctype) if self._active(ctype) else []
+    def _mandatory_members(self, ctype: ContentType,
+                           vctx: "ValidationContext") -> List[InstanceName]:
+        return (self.pattern._mandatory_members(ctype, vctx)
+                if self._active(ctype, vctx) else [])
 
 
 class Member(Typeable, Conditional):
@@ -163,19 +192,28 @@ class Member(Typeable, Conditional):
         Conditional.__init__(self, when)
         self.name = name
 
-    def _eval_when(self, cnode: "InstanceNode") -> None:
+    def _eval_when(self, cnode: "InstanceNode",
+                   vctx: "ValidationContext") -> None:
         if self.when:
-            dummy = cnode.put_member(self.name, (None,))
-            super()._eval_when(dummy)
+            super()._eval_when(cnode, vctx)
+
+    def _when_value(self, cnode: "InstanceNode") -> bool:
+        dummy = cnode.put_member(self.name, (None,))
+        return super()._when_value(dummy)
+
+    def _conditionals(self) -> List[Conditional]:
+        return [self] if self.when else []
 
-    def nullable(self, ctype: ContentType) -> bool:
+    def nullable(self, ctype: ContentType,
+                 vctx: "ValidationContext") -> bool:
         """Override the superclass method."""
-        return not (self._active(ctype))
+        return not (self._active(ctype, vctx))
 
-    def deriv(self, x: str, ctype: ContentType) -> SchemaPattern:
+    def deriv(self, x: str, ctype: ContentType,
+              vctx: "ValidationContext") -> SchemaPattern:
         """Return derivative of the receiver."""
         return (Empty() if
-                self.name == x and self._active(ctype)
+                self.name == x and self._active(ctype, vctx)
                 else NotAllowed())
 
     def tree(self, indent: int = 0):
@@ -184,8 +222,9 @@ class Member(Typeable, Conditional):
     def __str__(self) -> str:
         return f"member '{self.name}'"
 
-    def _mandatory_members(self, ctype: ContentType) -> List[InstanceName]:
-        return [self.name] if self._active(ctype) else []
+    def _mandatory_members(self, ctype: ContentType,
+                           vctx: "ValidationContext") -> List[InstanceName]:
+        return [self.name] if self._active(ctype, vctx) else []
 
 
 class Alternative(SchemaPattern):
@@ -202,19 +241,26 @@ class Alternative(SchemaPattern):
         self.left = p
         self.right = q
 
-    def _eval_when(self, cnode: "InstanceNode") -> None:
-        super()._eval_when(cnode)
-        self.left._eval_when(cnode)
-        self.right._eval_when(cnode)
+    def _eval_when(self, cnode: "InstanceNode",
+                   vctx: "ValidationContext") -> None:
+        super()._eval_when(cnode, vctx)
+        self.left._eval_when(cnode, vctx)
+        self.right._eval_when(cnode, vctx)
 
-    def nullable(self, ctype: ContentType) -> bool:
+    def _conditionals(self) -> List[Conditional]:
+        return self.left._conditionals() + self.right._conditionals()
+
+    def nullable(self, ctype: ContentType,
+                 vctx: "ValidationContext") -> bool:
         """Override the superclass method."""
-        return self.left.nullable(ctype) or self.right.nullable(ctype)
+        return (self.left.nullable(ctype, vctx) or
+                self.right.nullable(ctype, vctx))
 
-    def deriv(self, x: str, ctype: ContentType) -> SchemaPattern:
+    def deriv(self, x: str, ctype: ContentType,
+              vctx: "ValidationContext") -> SchemaPattern:
         """Return derivative of the receiver."""
-        return Alternative.combine(self.left.deriv(x, ctype),
-                                   self.right.deriv(x, ctype))
+        return Alternative.combine(self.left.deriv(x, ctype, vctx),
+                                   self.right.deriv(x, ctype, vctx))
 
     def tree(self, indent: int = 0):
         return (" " * indent + "Alternative\n" +
@@ -224,9 +270,10 @@ class Alternative(SchemaPattern):
     def __str__(self) -> str:
         return f"{self.left!s} or {self.right!s}"
 
-    def _mandatory_members(self, ctype: ContentType) -> List[InstanceName]:
-        lm = self.left._mandatory_members(ctype)
-        rm = self.right._mandatory_members(ctype)
+    def _mandatory_members(self, ctype: ContentType,
+                           vctx: "ValidationContext") -> List[InstanceName]:
+        lm = self.left._mandatory_members(ctype, vctx)
+        rm = self.right._mandatory_members(ctype, vctx)
         return [] if not lm or not rm else lm + rm
 
 
@@ -238,11 +285,11 @@ class ChoicePattern(Alternative, Typeable):
         self.ctype = ContentType.all  # type: ContentType
         self.name = name
 
-    def nullable(self, ctype: ContentType):
+    def nullable(self, ctype: ContentType, vctx: "ValidationContext"):
         return not self.match_ctype(ctype)
 
-    def deriv(self, x: str, ctype: ContentType):
-        return (super().deriv(x, ctype) if self.match_ctype(ctype) else
+    def deriv(self, x: str, ctype: ContentType, vctx: "ValidationContext"):
+        return (super().deriv(x, ctype, vctx) if self.match_ctype(ctype) else
                 NotAllowed())
 
     def tree(self, indent: int = 0):
@@ -257,10 +304,11 @@ class ChoicePattern(Alternative, Typeable):
 class Pair(SchemaPattern):
 
     @classmethod
-    def combine(cls, p: SchemaPattern, q: SchemaPattern):
-        if p.empty():
+    def combine(cls, p: SchemaPattern, q: SchemaPattern,
+                vctx: "ValidationContext"):
+        if p.empty(vctx):
             return q
-        if q.empty():
+        if q.empty(vctx):
             return p
         if isinstance(p, NotAllowed):
             return p
@@ -272,20 +320,26 @@ class Pair(SchemaPattern):
         self.left = p
         self.right = q
 
-    def nullable(self, ctype: ContentType) -> bool:
+    def nullable(self, ctype: ContentType,
+                 vctx: "ValidationContext") -> bool:
         """Override the superclass method."""
-        return (self.left.nullable(ctype) and
-                self.right.nullable(ctype))
+        return (self.left.nullable(ctype, vctx) and
+                self.right.nullable(ctype, vctx))
 
-    def deriv(self, x: str, ctype: ContentType) -> SchemaPattern:
+    def deriv(self, x: str, ctype: ContentType,
+              vctx: "ValidationContext") -> SchemaPattern:
         """Return derivative of the receiver."""
         return Alternative.combine(
-            Pair.combine(self.left.deriv(x, ctype), self.right),
-            Pair.combine(self.right.deriv(x, ctype), self.left))
+            Pair.combine(self.left.deriv(x, ctype, vctx), self.right, vctx),
+            Pair.combine(self.right.deriv(x, ctype, vctx), self.left, vctx))
+
+    def _eval_when(self, cnode: "InstanceNode",
+                   vctx: "ValidationContext") -> None:
+        self.left._eval_when(cnode, vctx)
+        self.right._eval_when(cnode, vctx)
 
-    def _eval_when(self, cnode: "InstanceNode") -> None:
-        self.left._eval_when(cnode)
-        self.right._eval_when(cnode)
+    def _conditionals(self) -> List[Conditional]:
+        return self.left._conditionals() + self.right._conditionals()
 
     def tree(self, indent: int = 0):
         return (" " * indent + "Pair\n" +
@@ -295,5 +349,156 @@ class Pair(SchemaPattern):
     def __str__(self) -> str:
         return str(self.left)
 
-    def _mandatory_members(self, ctype: ContentType) -> List[InstanceName]:
-        return self.left._mandatory_members(ctype) + self.right._mandatory_members(ctype)
+    def _mandatory_members(self, ctype: ContentType,
+                           vctx: "ValidationContext") -> List[InstanceName]:
+        return (self.left._mandatory_members(ctype, vctx) +
+                self.right._mandatory_members(ctype, vctx))
+
+
+class CompiledPattern:
+    """Schema pattern compiled into a linear-time membership checker.
+
+    Every member name is mapped to a bit of an integer bitset. A member
+    is allowed if it is active and all its guards – "when" conditions
+    and content types of enclosing choices together with the bitsets of
+    competing choice cases – are satisfied. When all members have been
+    checked, the pattern structure is consulted just once in order to
+    find out whether all mandatory members are present.
+
+    The checker only decides whether an object is valid. In the case of
+    an error, the derivative-based algorithm has to be used to obtain
+    the error details.
+    """
+
+    @classmethod
+    def compile(cls, p: SchemaPattern) -> Optional["CompiledPattern"]:
+        """Compile a schema pattern.
+
+        Args:
+            p: Schema pattern to compile.
+
+        Returns:
+            Compiled pattern, or ``None`` if `p` contains a construct
+            that isn't supported by the compiler.
+        """
+        res = cls()
+        try:
+            res._assign(p)
+            res.root = res._compile(p, ())
+        except ValueError:
+            return None
+        return res
+
+    def __init__(self):
+        """Initialize the class instance."""
+        self.slots = {}
+        self.root = None
+
+    def check(self, names: Iterable[InstanceName], ctype: ContentType,
+              vctx: "ValidationContext") -> bool:
+        """Return ``True`` if the object members match the pattern.
+
+        "When" conditions of the original pattern have to be evaluated
+        before calling this method.
+
+        Args:
+            names: Names of object members.
+            ctype: Content type of the object.
+            vctx: Validation context with values of "when" conditions.
+        """
+        seen = 0
+        for m in names:
+            slot = self.slots.get(m)
+            if slot is None:
+                return False
+            bit, member, guards = slot
+            if not member._active(ctype, vctx):
+                return False
+            for guard, mask in guards:
+                if mask is None:
+                    if not guard.check_when(vctx):
+                        return False
+                elif seen & mask or not guard.match_ctype(ctype):
+                    return False
+            seen |= bit
+        return self._nullable(self.root, seen, ctype, vctx)
+
+    def _nullable(self, item: tuple, seen: int, ctype: ContentType,
+                  vctx: "ValidationContext") -> bool:
+        kind = item[0]
+        if kind == "member":
+            return bool(seen & item[1]) or not item[2]._active(ctype, vctx)
+        if kind == "pair":
+            for it in item[1]:
+                if not self._nullable(it, seen, ctype, vctx):
+                    return False
+            return True
+        if kind == "optional":
+            return (not seen & item[2] or
+                    self._nullable(item[1], seen, ctype, vctx))
+        if kind == "conditional":
+            return (not item[1].check_when(vctx) or
+                    self._nullable(item[2], seen, ctype, vctx))
+        if kind == "choice":
+            if seen & item[3]:
+                return self._nullable(item[2], seen, ctype, vctx)
+            if seen & item[5]:
+                return self._nullable(item[4], seen, ctype, vctx)
+            return not item[1].match_ctype(ctype)
+        return True
+
+    def _compile(self, p: SchemaPattern, guards: tuple) -> tuple:
+        if isinstance(p, Empty):
+            return ("empty",)
+        if isinstance(p, Member):
+            bit = self.slots[p.name][0]
+            self.slots[p.name] = (bit, p, guards)
+            return ("member", bit, p)
+        if isinstance(p, Pair):
+            items = []
+            for it in (self._compile(p.left, guards),
+                       self._compile(p.right, guards)):
+                items.extend(it[1] if it[0] == "pair" else (it,))
+            return ("pair", tuple(items))
+        if isinstance(p, ConditionalPattern):
+            return ("conditional", p,
+                    self._compile(p.pattern, guards + ((p, None),)))
+        if isinstance(p, ChoicePattern):
+            lmask = self._mask(p.left)
+            rmask = self._mask(p.right)
+            return ("choice", p,
+                    self._compile(p.left, guards + ((p, rmask),)), lmask,
+                    self._compile(p.right, guards + ((p, lmask),)), rmask)
+        if isinstance(p, Alternative):
+            if isinstance(p.left, Empty):
+                opt = p.right
+            elif isinstance(p.right, Empty):
+                opt = p.left
+            else:
+                raise ValueError(p)
+            return ("optional", self._compile(opt, guards), self._mask(opt))
+        raise ValueError(p)
+
+    def _mask(self, p: SchemaPattern) -> int:
+        """Return the bitset of all members appearing in `p`."""
+        if isinstance(p, Member):
+            return self.slots[p.name][0]
+        if isinstance(p, (Pair, Alternative)):
+            return self._mask(p.left) | self._mask(p.right)
+        if isinstance(p, ConditionalPattern):
+            return self._mask(p.pattern)
+        return 0
+
+    def _assign(self, p: SchemaPattern) -> None:
+        """Reserve bits for all members appearing in `p`."""
+        if isinstance(p, Member):
+            if p.name in self.slots:
+                raise ValueError(p.name)
+            self.slots[p.name] = (1 << len(self.slots), p, ())
+        elif isinstance(p, (Pair, Alternative)):
+            self._assign(p.left)
+            self._assign(p.right)
+        elif isinstance(p, ConditionalPattern):
+            self._assign(p.pattern)
+        elif not isinstance(p, Empty):
+            raise ValueError(p)
@@ -0,0 +1,220 @@
+# Copyright © 2016-2019 CZ.NIC, z. s. p. o.
+#
+# This file is part of Yangson.
+#
+# Yangson is free software: you can redistribute it and/or modify it under the
+# terms of the GNU Lesser General Public License as published by the Free
+# Software Foundation, either version 3 of the License, or (at your option) any
+# later version.
+#
+# Yangson is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE.  See the GNU Lesser General Public License for more
+# details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with Yangson.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Native validators for well-known derived types.
+
+Values of many frequently used types from the modules
+*ietf-inet-types* and *ietf-yang-types* are restricted by long
+patterns. This module provides hand-optimised functions that can be
+used instead of the regular expressions.
+
+This module implements the following functions:
+
+* find_validator: Return the native validator for a typedef, if any.
+* register_validator: Register a native validator for a typedef.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .constraint import Pattern, PatternKey
+from .typealiases import YangIdentifier
+
+# Type aliases
+NativeValidator = Callable[[str], Any]
+"""Function returning a true value if a string satisfies all patterns."""
+
+native_validators: Dict[Tuple[YangIdentifier, YangIdentifier],
+                        Tuple[PatternKey, NativeValidator]] = {}
+"""Registry of native validators keyed by module and typedef name."""
+
+
+def register_validator(module: YangIdentifier, typedef: YangIdentifier,
+                       patterns: PatternKey,
+                       validator: NativeValidator) -> None:
+    """Register a native validator for a typedef.
+
+    A native validator must not accept any value that doesn't match
+    `patterns`. It may reject some matching values, typically those
+    containing non-ASCII characters, which are then checked against
+    the patterns.
+
+    Args:
+        module: Name of the module in which the typedef is defined.
+        typedef: Name of the typedef.
+        patterns: All patterns that the typedef imposes, including
+            those of its base types, in the order of their definition.
+        validator: The validator function.
+    """
+    native_validators[(module, typedef)] = (patterns, validator)
+
+
+def find_validator(module: YangIdentifier, typedef: YangIdentifier,
+                   patterns: List[Pattern]) -> Optional[NativeValidator]:
+    """Return the native validator registered for a typedef.
+
+    The validator is returned only if `patterns` are exactly those for
+    which it was registered, so that different revisions of the module
+    cannot be confused.
+
+    Args:
+        module: Name of the module in which the typedef is defined.
+        typedef: Name of the typedef.
+        patterns: Patterns of the type derived from the typedef.
+    """
+    ent = native_validators.get((module, typedef))
+    if ent and ent[0] == tuple([(p.pattern, p.invert_match)
+                                for p in patterns]):
+        return ent[1]
+    return None
+
+
+_HEX = "0123456789abcdefABCDEF"
+_HEX_COLON = _HEX + ":"
+_LDH = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_"
+_ALNUM = _LDH[:-2]
+_NAME_START = _LDH[:52] + "_"
+_octets = frozenset([str(i) for i in range(256)])
+_ipv4_lengths = frozenset([str(i) for i in range(33)])
+_ipv6_lengths = frozenset([f"{i:02d}" for i in range(100)] +
+                          [str(i) for i in range(129)])
+
+
+def _dotted_quad(s: str) -> bool:
+    a = s.split(".")
+    return (len(a) == 4 and a[0] in _octets and a[1] in _octets and
+            a[2] in _octets and a[3] in _octets)
+
+
+def _zone(zone: str) -> bool:
+    return zone != "" and all(c in _ALNUM for c in zone)
+
+
+def _ipv4_address(s: str) -> bool:
+    addr, sep, zone = s.partition("%")
+    return _dotted_quad(addr) and (not sep or _zone(zone))
+
+
+def _ipv4_prefix(s: str) -> bool:
+    addr, sep, plen = s.partition("/")
+    return plen in _ipv4_lengths and _dotted_quad(addr)
+
+
+def _ipv6_plain(s: str) -> bool:
+    """Check an IPv6 address consisting only of hexadecimal groups."""
+    if s.strip(_HEX_COLON):
+        return False
+    head, sep, tail = s.partition("::")
+    if sep:
+        if "::" in tail:
+            return False
+        groups = head.split(":") if head else []
+        if tail:
+            groups += tail.split(":")
+        if len(groups) > 7:
+            return False
+    else:
+        groups = s.split(":")
+        if len(groups) != 8:
+            return False
+    return "" not in groups and max(map(len, groups), default=0) < 5
+
+
+def _ipv6_address(s: str) -> bool:
+    addr, sep, zone = s.partition("%")
+    return _ipv6_plain(addr) and (not sep or _zone(zone))
+
+
+def _ipv6_prefix(s: str) -> bool:
+    addr, sep, plen = s.partition("/")
+    return plen in _ipv6_lengths and _ipv6_plain(addr)
+
+
+def _domain_name(s: str) -> bool:
+    if s == ".":
+        return True
+    if s[-1:] == ".":
+        s = s[:-1]
+    for label in s.split("."):
+        if not (0 < len(label) < 64 and label[-1] in _ALNUM and
+                label[0] != "-" and not label.strip(_LDH)):
+            return False
+    return True
+
+
+def _yang_identifier(s: str) -> bool:
+    return s != "" and s[0] in _NAME_START and not (
+        s.strip(_LDH + ".") or s[:3].lower() == "xml")
+
+
+_ipv4_pattern = (
+    r"(([0-9]|[1-9][0-9]|1[0-9][0-9]|2[0-4][0-9]|25[0-5])\.){3}"
+    r"([0-9]|[1-9][0-9]|1[0-9][0-9]|2[0-4][0-9]|25[0-5])")
+_ipv6_pattern = (
+    r"((:|[0-9a-fA-F]{0,4}):)([0-9a-fA-F]{0,4}:){0,5}"
+    r"((([0-9a-fA-F]{0,4}:)?(:|[0-9a-fA-F]{0,4}))|"
+    r"(((25[0-5]|2[0-4][0-9]|[01]?[0-9]?[0-9])\.){3}"
+    r"(25[0-5]|2[0-4][0-9]|[01]?[0-9]?[0-9])))")
+_ipv6_pattern2 = (r"(([^:]+:){6}(([^:]+:[^:]+)|(.*\..*)))|"
+                  r"((([^:]+:)*[^:]+)?::(([^:]+:)*[^:]+)?)")
+_zone_pattern = r"(%[\p{N}\p{L}]+)?"
+_hex_string_pattern = r"([0-9a-fA-F]{2}(:[0-9a-fA-F]{2})*)?"
+
+for _mod, _tdef, _pats, _val in [
+    ("ietf-inet-types", "ipv4-address",
+     (_ipv4_pattern + _zone_pattern,), _ipv4_address),
+    ("ietf-inet-types", "ipv4-address-no-zone",
+     (_ipv4_pattern + _zone_pattern, r"[0-9\.]*"), _dotted_quad),
+    ("ietf-inet-types", "ipv4-prefix",
+     (_ipv4_pattern + r"/(([0-9])|([1-2][0-9])|(3[0-2]))",), _ipv4_prefix),
+    ("ietf-inet-types", "ipv6-address",
+     (_ipv6_pattern + _zone_pattern, _ipv6_pattern2 + "(%.+)?"),
+     _ipv6_address),
+    ("ietf-inet-types", "ipv6-address-no-zone",
+     (_ipv6_pattern + _zone_pattern, _ipv6_pattern2 + "(%.+)?",
+      r"[0-9a-fA-F:\.]*"), _ipv6_plain),
+    ("ietf-inet-types", "ipv6-prefix",
+     (_ipv6_pattern +
+      r"(/(([0-9])|([0-9]{2})|(1[0-1][0-9])|(12[0-8])))",
+      _ipv6_pattern2 + "(/.+)"), _ipv6_prefix),
+    ("ietf-inet-types", "domain-name",
+     (r"((([a-zA-Z0-9_]([a-zA-Z0-9\-_]){0,61})?[a-zA-Z0-9]\.)*"
+      r"([a-zA-Z0-9_]([a-zA-Z0-9\-_]){0,61})?[a-zA-Z0-9]\.?)|\.",),
+     _domain_name),
+    ("ietf-yang-types", "dotted-quad", (_ipv4_pattern,), _dotted_quad),
+    ("ietf-yang-types", "yang-identifier",
+     (r"[a-zA-Z_][a-zA-Z0-9\-_.]*", r".|..|[^xX].*|.[^mM].*|..[^lL].*"),
+     _yang_identifier),
+    ("ietf-yang-types", "mac-address",
+     (r"[0-9a-fA-F]{2}(:[0-9a-fA-F]{2}){5}",),
+     re.compile(r"[0-9a-fA-F]{2}(?::[0-9a-fA-F]{2}){5}").fullmatch),
+    ("ietf-yang-types", "phys-address", (_hex_string_pattern,),
+     re.compile(r"(?:[0-9a-fA-F]{2}(?::[0-9a-fA-F]{2})*)?").fullmatch),
+    ("ietf-yang-types", "hex-string", (_hex_string_pattern,),
+     re.compile(r"(?:[0-9a-fA-F]{2}(?::[0-9a-fA-F]{2})*)?").fullmatch),
+    ("ietf-yang-types", "uuid",
+     (r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-"
+      r"[0-9a-fA-F]{12}",),
+     re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-"
+                r"[0-9a-fA-F]{4}-[0-9a-fA-F]{12}").fullmatch),
+    ("ietf-yang-types", "date-and-time",
+     (r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?"
+      r"(Z|[\+\-]\d{2}:\d{2})",),
+     re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}"
+                r"(?:\.[0-9]+)?(?:Z|[+-][0-9]{2}:[0-9]{2})").fullmatch)]:
+    register_validator(_mod, _tdef, tuple([(p, False) for p in _pats]),
+                       _val)
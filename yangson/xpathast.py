@@ -25,11 +25,11 @@ class is intended to be public:
 """
 
 import decimal
-from math import ceil, copysign, floor
+from math import ceil, copysign, floor, fsum
 from pyxb.utils.xmlre import XMLToPython, RegularExpressionError
 from xml.sax.saxutils import quoteattr
 import re
-from typing import List, Optional, Tuple
+from typing import List, Optional, Set, Tuple
 from .schemadata import SchemaContext
 from .enumerations import Axis, MultiplicativeOp
 from .exceptions import InvalidArgument, XPathTypeError
@@ -73,6 +73,63 @@ class Expr:
         """
         return self._eval(XPathContext(node, node, 1, 1))
 
+    def dependencies(self) -> Optional[Set[Optional[QualName]]]:
+        """Return qualified names of data nodes the receiver depends on.
+
+        The value of the receiver may change only if an instance of a
+        data node with one of the returned names, or its ancestor or
+        descendant, is changed. The set may also contain ``None`` that
+        stands for the context node.
+
+        Returns:
+            Set of qualified names, or ``None`` if the dependencies
+            cannot be determined statically.
+        """
+        deps = set()
+        return deps if self._dependencies(deps, True) else None
+
+    def _dependencies(self, deps: Set[Optional[QualName]],
+                      final: bool) -> bool:
+        """Add dependencies of the receiver to `deps`.
+
+        Args:
+            deps: Set of dependencies collected so far.
+            final: Flag indicating that the receiver's value is a result,
+                not only a context for a subsequent location step.
+
+        Returns:
+            ``False`` if the dependencies cannot be determined statically.
+        """
+        return True
+
+    def reach(self) -> Optional[int]:
+        """Return the number of levels above the context node that may be used.
+
+        Evaluation of the receiver may only access the ancestor of the
+        context node that is the returned number of levels up, and its
+        descendants.
+
+        Returns:
+            Number of levels, or ``None`` if it is not bounded.
+        """
+        res = self._reach(0)
+        return None if res is None else max(res[0], 0)
+
+    def _reach(self, cnode: int) -> Optional[Tuple[int, int]]:
+        """Return the highest nodes that may be accessed and selected.
+
+        Heights of nodes are relative to the node at which the evaluation
+        started.
+
+        Args:
+            cnode: Height of the context node.
+
+        Returns:
+            Tuple of the maximum height of accessed nodes and the maximum
+            height of selected nodes, or ``None`` if it is not bounded.
+        """
+        return (cnode, cnode)
+
     def _eval_float(self, xctx: XPathContext) -> float:
         val = self._eval(xctx)
         try:
@@ -162,6 +219,16 @@ class UnaryExpr(Expr):
     def _children_ast(self, indent: int) -> str:
         return self.expr.syntax_tree(indent) if self.expr else ""
 
+    def _dependencies(self, deps: Set[Optional[QualName]],
+                      final: bool) -> bool:
+        if self.expr is None:
+            deps.add(None)
+            return True
+        return self.expr._dependencies(deps, True)
+
+    def _reach(self, cnode: int) -> Optional[Tuple[int, int]]:
+        return (cnode, cnode) if self.expr is None else self.expr._reach(cnode)
+
 
 class BinaryExpr(Expr):
     """Abstract superclass of binary expressions."""
@@ -180,6 +247,25 @@ class BinaryExpr(Expr):
     def _children_ast(self, indent: int) -> str:
         return self.left.syntax_tree(indent) + self.right.syntax_tree(indent)
 
+    def _dependencies(self, deps: Set[Optional[QualName]],
+                      final: bool) -> bool:
+        return (self.left._dependencies(deps, True) and
+                self.right._dependencies(deps, True))
+
+    def _reach(self, cnode: int) -> Optional[Tuple[int, int]]:
+        return self._reach_all(cnode, [self.left, self.right])
+
+    @staticmethod
+    def _reach_all(cnode: int,
+                   exprs: List[Expr]) -> Optional[Tuple[int, int]]:
+        res = (cnode, cnode)
+        for ex in exprs:
+            er = ex._reach(cnode)
+            if er is None:
+                return None
+            res = (max(res[0], er[0]), max(res[1], er[1]))
+        return res
+
     def _eval_ops(self, xctx: XPathContext) -> Tuple[XPathValue, XPathValue]:
         return (self.left._eval(xctx), self.right._eval(xctx))
 
@@ -391,6 +477,18 @@ class PathExpr(BinaryExpr):
     def __str__(self) -> str:
         return self._as_str("/", spaces=False)
 
+    def _dependencies(self, deps: Set[Optional[QualName]],
+                      final: bool) -> bool:
+        return (self.left._dependencies(deps, False) and
+                self.right._dependencies(deps, final))
+
+    def _reach(self, cnode: int) -> Optional[Tuple[int, int]]:
+        lr = self.left._reach(cnode)
+        if lr is None:
+            return None
+        rr = self.right._reach(lr[1])
+        return None if rr is None else (max(lr[0], rr[0]), rr[1])
+
     def _eval(self, xctx: XPathContext) -> XPathValue:
         ns = self.left._eval(xctx)
         if not isinstance(ns, NodeSet):
@@ -414,6 +512,18 @@ class FilterExpr(Expr):
     def _children_ast(self, indent) -> str:
         return self.primary.syntax_tree(indent) + self._predicates_str(indent)
 
+    def _dependencies(self, deps: Set[Optional[QualName]],
+                      final: bool) -> bool:
+        return self.primary._dependencies(deps, final) and all(
+            [p._dependencies(deps, True) for p in self.predicates])
+
+    def _reach(self, cnode: int) -> Optional[Tuple[int, int]]:
+        res = self.primary._reach(cnode)
+        if res is None:
+            return None
+        pr = BinaryExpr._reach_all(res[1], self.predicates)
+        return None if pr is None else (max(res[0], pr[0]), res[1])
+
     def _eval(self, xctx: XPathContext) -> XPathValue:
         res = self.primary._eval(xctx)
         return self._apply_predicates(res, xctx)
@@ -430,6 +540,18 @@ class LocationPath(BinaryExpr):
         sep = "" if isinstance(self.left, Root) else "/"
         return f"{self.left}{sep}{self.right}"
 
+    def _dependencies(self, deps: Set[Optional[QualName]],
+                      final: bool) -> bool:
+        return (self.left._dependencies(deps, False) and
+                self.right._dependencies(deps, final))
+
+    def _reach(self, cnode: int) -> Optional[Tuple[int, int]]:
+        lr = self.left._reach(cnode)
+        if lr is None:
+            return None
+        rr = self.right._reach(lr[1])
+        return None if rr is None else (max(lr[0], rr[0]), rr[1])
+
 
 class Root(Expr):
 
@@ -441,6 +563,13 @@ class Root(Expr):
     def __str__(self) -> str:
         return "/"
 
+    def _dependencies(self, deps: Set[Optional[QualName]],
+                      final: bool) -> bool:
+        return not final
+
+    def _reach(self, cnode: int) -> None:
+        return None
+
 
 class Step(Expr):
 
@@ -473,6 +602,30 @@ class Step(Expr):
     def _children_ast(self, indent) -> str:
         return self._predicates_str(indent)
 
+    def _dependencies(self, deps: Set[Optional[QualName]],
+                      final: bool) -> bool:
+        if self.qname:
+            deps.add(self.qname)
+        elif final:
+            if self.axis != Axis.self:
+                return False
+            deps.add(None)
+        return all([p._dependencies(deps, True) for p in self.predicates])
+
+    def _reach(self, cnode: int) -> Optional[Tuple[int, int]]:
+        if self.axis in (Axis.ancestor, Axis.ancestor_or_self):
+            return None
+        if self.axis in (Axis.child, Axis.descendant):
+            height = cnode - 1
+        elif self.axis == Axis.parent:
+            height = cnode + 1
+        else:
+            height = cnode
+        acc = cnode + 1 if self.axis in (
+            Axis.following_sibling, Axis.preceding_sibling) else height
+        pr = BinaryExpr._reach_all(height, self.predicates)
+        return None if pr is None else (max(acc, cnode, pr[0]), height)
+
     def _node_trans(self, xctx) -> NodeExpr:
         return {
             Axis.ancestor: lambda n, qn=self.qname: n._ancestors(qn),
@@ -535,6 +688,13 @@ class FuncConcat(Expr):
     def _children_ast(self, indent: int) -> str:
         return "".join([ex.syntax_tree(indent) for ex in self.parts])
 
+    def _dependencies(self, deps: Set[Optional[QualName]],
+                      final: bool) -> bool:
+        return all([ex._dependencies(deps, True) for ex in self.parts])
+
+    def _reach(self, cnode: int) -> Optional[Tuple[int, int]]:
+        return BinaryExpr._reach_all(cnode, self.parts)
+
     def _eval(self, xctx: XPathContext) -> str:
         return "".join([ex._eval_string(xctx) for ex in self.parts])
 
@@ -561,6 +721,14 @@ class FuncCurrent(Expr):
     def __str__(self) -> str:
         return "current()"
 
+    def _dependencies(self, deps: Set[Optional[QualName]],
+                      final: bool) -> bool:
+        deps.add(None)
+        return True
+
+    def _reach(self, cnode: int) -> Optional[Tuple[int, int]]:
+        return (max(cnode, 0), 0)
+
 
 class FuncDeref(UnaryExpr):
 
@@ -571,6 +739,13 @@ class FuncDeref(UnaryExpr):
         ref = ns[0]
         return NodeSet(ref._deref())
 
+    def _dependencies(self, deps: Set[Optional[QualName]],
+                      final: bool) -> bool:
+        return False
+
+    def _reach(self, cnode: int) -> None:
+        return None
+
 
 class FuncDerivedFrom(BinaryExpr):
 
@@ -764,6 +939,15 @@ class FuncSubstring(BinaryExpr):
     def _children_ast(self, indent: int) -> str:
         return super()._children_ast(indent) + self.length.syntax_tree(indent)
 
+    def _dependencies(self, deps: Set[Optional[QualName]],
+                      final: bool) -> bool:
+        return super()._dependencies(deps, final) and (
+            self.length is None or self.length._dependencies(deps, True))
+
+    def _reach(self, cnode: int) -> Optional[Tuple[int, int]]:
+        return self._reach_all(cnode, [self.left, self.right] + (
+            [self.length] if self.length else []))
+
     def _eval(self, xctx: XPathContext) -> str:
         string = self.left._eval_string(xctx)
         rres = self.right._eval_float(xctx)
@@ -804,8 +988,8 @@ class FuncSum(UnaryExpr):
         if not isinstance(ns, NodeSet):
             raise XPathTypeError(str(ns))
         try:
-            return float(sum([n.value for n in ns]))
-        except TypeError:
+            return fsum([float(n.value) for n in ns])
+        except (TypeError, ValueError):
             return float('nan')
 
 
@@ -821,6 +1005,14 @@ class FuncTranslate(BinaryExpr):
     def _children_ast(self, indent: int) -> str:
         return super()._children_ast(indent) + self.nchars.syntax_tree(indent)
 
+    def _dependencies(self, deps: Set[Optional[QualName]],
+                      final: bool) -> bool:
+        return (super()._dependencies(deps, final) and
+                self.nchars._dependencies(deps, True))
+
+    def _reach(self, cnode: int) -> Optional[Tuple[int, int]]:
+        return self._reach_all(cnode, [self.left, self.right, self.nchars])
+
     def _eval(self, xctx: XPathContext) -> str:
         string, old = self._eval_ops_string(xctx)
         new = self.nchars._eval_string(xctx)[:len(old)]